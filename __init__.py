@@ -1 +1 @@
-__version__ = '2.5.1'
+__version__ = '2.6.0'
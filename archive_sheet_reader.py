@@ -0,0 +1,37 @@
+from kitten_utils import Log
+from sheet_reader_base import SheetReaderBase
+
+class ArchiveSheetReader(SheetReaderBase):
+    ''' The mentors spreadsheet as recorded in a PageArchive (see --record / --replay). The spreadsheet is never
+        updated when replaying, completed mentees are only printed.
+    '''
+    def __init__(self, archive):
+        super().__init__()
+        self._archive = archive
+        self._completed_mentees = {}
+
+    def load_mentors_spreadsheet(self, auth):
+        state = self._archive.get_state('mentor_spreadsheet')
+        if state is None:
+            Log.error(f'ERROR: No mentor spreadsheet found in page archive {self._archive.path}')
+            return None
+
+        self.restore_workbook_state(state)
+        self._build_mentor_index()
+        Log.success(f'Loaded mentor spreadsheet from page archive {self._archive.path}')
+        return state['config_yaml']
+
+    def get_current_mentees(self):
+        current_mentees = self._archive.get_state('current_mentees')
+        if current_mentees is None:
+            Log.error(f'ERROR: No mentee status was recorded in page archive {self._archive.path}')
+            return []
+        return current_mentees
+
+    def set_completed_mentees(self, mentor, mentee_ids):
+        self._completed_mentees.setdefault(mentor, []).extend(mentee_ids)
+
+    def commit_updates(self, dry_run = False):
+        for mentor, mentee_ids in self._completed_mentees.items():
+            print(f'Replay, not updating the mentor spreadsheet: {mentor} completed mentees {mentee_ids}')
+        self._completed_mentees = {}
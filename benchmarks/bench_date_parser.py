@@ -0,0 +1,63 @@
+''' Benchmark date parsing of a mentor sheet "date received" column and animal page dates.
+
+        $ python benchmarks/bench_date_parser.py [--rows 5000] [--distinct 300]
+
+    Reported per row: the previous Utils.string_to_datetime (three strptime formats tried through nested exceptions),
+    DateParser.parse() one value at a time, and DateParser.parse_column() for the whole column.
+'''
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from kitten_utils import DateParser
+
+def legacy_string_to_datetime(date_str):
+    try:
+        date_obj = datetime.strptime(date_str, '%d-%b-%Y')
+    except ValueError:
+        try:
+            date_obj = datetime.strptime(date_str, '%d-%B-%Y')
+        except ValueError:
+            try:
+                date_obj = datetime.strptime(date_str, '%m/%d/%Y')
+            except ValueError:
+                date_obj = None
+    return date_obj
+
+def make_column(rows, distinct, date_format):
+    ''' A column of dates as found in a mentor sheet: a limited set of distinct dates, plus some empty cells
+    '''
+    random.seed(1)
+    first_day = datetime(2021, 1, 1)
+    dates = [(first_day + timedelta(days = random.randint(0, 730))).strftime(date_format) for _ in range(distinct)]
+    return [random.choice(dates) if random.random() > 0.05 else '' for _ in range(rows)]
+
+def per_row_us(fn, column):
+    start = time.perf_counter()
+    fn(column)
+    return 1e6 * (time.perf_counter() - start) / len(column)
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('--rows', help = 'rows per column', type = int, default = 5000)
+    arg_parser.add_argument('--distinct', help = 'distinct dates per column', type = int, default = 300)
+    args = arg_parser.parse_args()
+
+    for label, date_format in [('d-Mon-Y (1st format)', '%d-%b-%Y'), ('m/d/Y (3rd format)', '%m/%d/%Y')]:
+        column = make_column(args.rows, args.distinct, date_format)
+        legacy = per_row_us(lambda c: [legacy_string_to_datetime(v) for v in c], column)
+        single = per_row_us(lambda c: [DateParser().parse(v) for v in c], column) # no memo or format carry-over
+        parse = per_row_us(lambda c: [p.parse(v) for p in [DateParser()] for v in c], column)
+        batch = per_row_us(lambda c: DateParser().parse_column(c), column)
+
+        assert DateParser().parse_column(column) == [legacy_string_to_datetime(v) for v in column]
+        print(f'{label}: legacy {legacy:.2f} us/row, DateParser fresh per value {single:.2f} us/row, '
+              f'parse() {parse:.2f} us/row, parse_column() {batch:.2f} us/row')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+''' End-to-end benchmark: run the full KittenScraper flow (headless) against a local stand-in shelter web app and mentors
+    spreadsheet (see fake_shelter.py).
+
+        $ python benchmarks/bench_e2e.py [--animals 50] [--latency 0.05] [--workers 1] [--engine browser] [--status]
+        $ python benchmarks/bench_e2e.py --save_baseline        # record benchmarks/baselines/bench_e2e.json
+        $ python benchmarks/bench_e2e.py                        # ... later runs fail (exit 1) on regressions
+
+    Chrome and chromedriver are required, same as a regular run. The run uses a temporary home directory so the lookup
+    cache, run state, mentors snapshot and the output report never touch (or reuse) your own.
+
+    Reported: pages per second (every page served by the stand-in), per-animal and per-person lookup latency, and
+    total chromedriver calls. A regression is a metric more than --tolerance worse than the stored baseline. Page and
+    chromedriver call counts are deterministic, timings depend on the machine: re-record the baseline (--save_baseline)
+    when comparing timings on a different machine.
+'''
+from argparse import ArgumentParser
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from fake_shelter import FakeSheetReader, StandInShelter
+from kitten_metrics import Metrics
+from kitten_scraper import KittenScraper
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'baselines', 'bench_e2e.json')
+
+# (metric, True if higher is better)
+#
+REGRESSION_METRICS = [('pages_per_second', True),
+                      ('animal_latency_ms.p50', False),
+                      ('animal_latency_ms.p95', False),
+                      ('person_latency_ms.p50', False),
+                      ('person_latency_ms.p95', False),
+                      ('driver_calls', False),
+                      ('pages', False)]
+
+def timed(fn, latencies):
+    ''' Wrap fn, appending the duration of each call (ms) to latencies
+    '''
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            latencies.append(1000 * (time.perf_counter() - start))
+    return wrapper
+
+def latency_summary(latencies):
+    if not latencies:
+        return {'count' : 0, 'mean' : 0.0, 'p50' : 0.0, 'p95' : 0.0}
+    latencies = sorted(latencies)
+    return {'count' : len(latencies),
+            'mean'  : statistics.mean(latencies),
+            'p50'   : latencies[len(latencies) // 2],
+            'p95'   : latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]}
+
+def run_scraper(shelter, args):
+    ''' Run KittenScraper.run() once against the stand-in, return the results dict
+    '''
+    with tempfile.TemporaryDirectory() as home:
+        os.environ['HOME'] = home
+        config_file = os.path.join(home, 'config.yaml')
+        with open(config_file, 'w') as f:
+            f.write('username : benchmark\npassword : benchmark\n')
+
+        argv = ['--config', config_file,
+                '--input', ','.join(str(a_number) for a_number in shelter.animals),
+                '--workers', str(args.workers),
+                '--person_workers', str(args.person_workers),
+                '--engine', args.engine]
+        if args.status:
+            argv += ['--status', 'verbose']
+
+        scraper = KittenScraper(mentor_sheet_reader = FakeSheetReader(shelter))
+        animal_latencies = []
+        person_latencies = []
+        scraper._read_animal = timed(scraper._read_animal, animal_latencies)
+        scraper._get_person_data = timed(scraper._get_person_data, person_latencies)
+
+        Metrics.reset()
+        output = io.StringIO()
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(output if not args.verbose else sys.stdout):
+                scraper.run(argv)
+        except SystemExit:
+            print(output.getvalue())
+            raise RuntimeError('KittenScraper exited early, see output above') from None
+        wall_seconds = time.perf_counter() - start
+
+    driver_calls = Metrics.counters('driver_calls.')
+    return {
+        'scenario'            : {key : getattr(args, key) for key in ['animals', 'foster_parents', 'history_pages', 'mentors',
+                                                                      'mentees_per_mentor', 'latency', 'workers',
+                                                                      'person_workers', 'engine', 'status']},
+        'wall_seconds'        : wall_seconds,
+        'pages'               : shelter.page_count(),
+        'pages_per_second'    : shelter.page_count() / wall_seconds,
+        'pages_by_type'       : dict(sorted(shelter.requests_by_page.items())),
+        'animal_latency_ms'   : latency_summary(animal_latencies),
+        'person_latency_ms'   : latency_summary(person_latencies),
+        'driver_calls'        : sum(driver_calls.values()),
+        'driver_calls_by_page': dict(sorted(driver_calls.items())),
+        'phases'              : Metrics.summary()['phases']
+    }
+
+def metric_value(results, metric):
+    value = results
+    for key in metric.split('.'):
+        value = value[key]
+    return value
+
+def find_regressions(results, baseline, tolerance):
+    ''' Return a description of each metric that is more than tolerance (fraction) worse than the baseline
+    '''
+    regressions = []
+    for metric, higher_is_better in REGRESSION_METRICS:
+        current, expected = metric_value(results, metric), metric_value(baseline, metric)
+        if not expected:
+            continue
+        change = (current - expected) / expected
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f'{metric}: {current:.1f} vs baseline {expected:.1f} ({100 * change:+.0f}%)')
+    return regressions
+
+def print_results(results):
+    animal, person = results['animal_latency_ms'], results['person_latency_ms']
+    print(f'Wall time: {results["wall_seconds"]:.2f} s')
+    print(f'Pages: {results["pages"]} ({results["pages_per_second"]:.1f} pages/s) '
+          f'{", ".join(f"{page} {count}" for page, count in results["pages_by_type"].items())}')
+    print(f'Animal lookups: {animal["count"]}, mean {animal["mean"]:.0f} ms, p50 {animal["p50"]:.0f} ms, p95 {animal["p95"]:.0f} ms')
+    print(f'Person lookups: {person["count"]}, mean {person["mean"]:.0f} ms, p50 {person["p50"]:.0f} ms, p95 {person["p95"]:.0f} ms')
+    print(f'Chromedriver calls: {results["driver_calls"]} '
+          f'({", ".join(f"{page} {count}" for page, count in results["driver_calls_by_page"].items())})')
+    print(f'Phases: {", ".join(f"{phase} {seconds:.2f} s" for phase, seconds in results["phases"].items())}')
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('--animals', help = 'animals in the daily report', type = int, default = 50)
+    arg_parser.add_argument('--foster_parents', help = 'foster parents the animals are spread across', type = int, default = 15)
+    arg_parser.add_argument('--history_pages', help = 'pages of foster history per person', type = int, default = 3)
+    arg_parser.add_argument('--mentors', help = 'mentor sheets in the stand-in mentors spreadsheet', type = int, default = 5)
+    arg_parser.add_argument('--mentees_per_mentor', help = 'mentees listed on each mentor sheet', type = int, default = 4)
+    arg_parser.add_argument('--latency', help = 'simulated server latency per page (seconds)', type = float, default = 0.05)
+    arg_parser.add_argument('--workers', help = 'KittenScraper --workers', type = int, default = 1)
+    arg_parser.add_argument('--person_workers', help = 'KittenScraper --person_workers', type = int, default = 1)
+    arg_parser.add_argument('--engine', help = 'KittenScraper --engine', choices = ['browser', 'http'], default = 'browser')
+    arg_parser.add_argument('--status', help = 'also check mentee status (KittenScraper --status verbose)', action = 'store_true')
+    arg_parser.add_argument('--baseline', help = f'baseline results (defaults to {os.path.relpath(DEFAULT_BASELINE)})', default = DEFAULT_BASELINE)
+    arg_parser.add_argument('--save_baseline', help = 'save these results as the new baseline', action = 'store_true')
+    arg_parser.add_argument('--tolerance', help = 'allowed regression vs the baseline, as a fraction', type = float, default = 0.2)
+    arg_parser.add_argument('--output', help = 'also write the results (JSON) to this file', default = None)
+    arg_parser.add_argument('--verbose', help = 'show KittenScraper output', action = 'store_true')
+    args = arg_parser.parse_args()
+
+    shelter = StandInShelter(animals = args.animals,
+                             foster_parents = args.foster_parents,
+                             history_pages = args.history_pages,
+                             mentors = args.mentors,
+                             mentees_per_mentor = args.mentees_per_mentor,
+                             latency = args.latency).start()
+    try:
+        results = run_scraper(shelter, args)
+    finally:
+        shelter.stop()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent = 2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok = True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent = 2)
+        print(f'Saved baseline {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline found ({args.baseline}), run with --save_baseline to record one')
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['scenario'] != results['scenario']:
+        print(f'Baseline was recorded with a different scenario, not comparing: {baseline["scenario"]}')
+        return 0
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if not regressions:
+        print(f'No regressions vs baseline (tolerance {100 * args.tolerance:.0f}%)')
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+''' Benchmark the person history crawl against a saved 10-page "list animals" fixture.
+
+        $ python benchmarks/bench_history_listing.py [--latency 0.15] [--workers 4]
+
+    The fixture pages are served by a local HTTP server with simulated per-request latency. Reported:
+
+        - In-process parse cost per page, and the number of chromedriver round trips the previous per-<tr>/<td>
+          parsing would have needed for the same page.
+        - Wall time of a sequential crawl vs a crawl that prefetches the remaining pages concurrently.
+'''
+from argparse import ArgumentParser
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from http_page_fetcher import HttpPageFetcher
+import listing_parser
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'fixtures', 'person_history')
+
+def serve_fixture(latency):
+    class Handler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            page = int(parse_qs(urlsplit(self.path).query).get('page', ['1'])[0])
+            path = os.path.join(FIXTURE_DIR, f'list_animals_page{page}.html')
+            body = open(path, 'rb').read() if os.path.exists(path) else b'<html><body>No more animals</body></html>'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('--latency', help = 'simulated server latency per page (seconds)', type = float, default = 0.15)
+    arg_parser.add_argument('--workers', help = 'concurrent prefetch workers', type = int, default = 4)
+    args = arg_parser.parse_args()
+
+    pages_html = [open(os.path.join(FIXTURE_DIR, name)).read() for name in sorted(os.listdir(FIXTURE_DIR))]
+
+    # Parse cost
+    #
+    iterations = 20
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parsed = [listing_parser.parse_listing_rows(html) for html in pages_html]
+    parse_ms = 1000 * (time.perf_counter() - start) / (iterations * len(pages_html))
+    legacy_round_trips = sum(2 + len(rows) + sum(len(cols) for cols in rows) for rows in parsed) / len(parsed)
+    print(f'Parse: {parse_ms:.2f} ms per page (in-process), previously ~{legacy_round_trips:.0f} chromedriver round trips per page')
+
+    # Crawl wall time
+    #
+    server = serve_fixture(args.latency)
+    page_url = lambda page_number: f'http://127.0.0.1:{server.server_port}/list_animals?page={page_number}&personid=123456'
+    fetcher = HttpPageFetcher([], 'kitten-scraper-benchmark', pool_size = args.workers)
+    fetch_html = lambda url: fetcher.fetch(url).html
+
+    results = {}
+    for label, workers in [('sequential', 1), (f'prefetch x{args.workers}', args.workers)]:
+        start = time.perf_counter()
+        pages = listing_parser.crawl_listing(fetch_html, page_url, prefetch_workers = workers)
+        results[label] = time.perf_counter() - start
+        history = listing_parser.summarize_history(pages)
+        print(f'Crawl ({label}): {len(pages)} pages in {results[label]:.2f} s, '
+              f'prev_animals_fostered = {history["prev_animals_fostered"]}, losses = {history["euthanized_count"] + history["unassisted_death_count"]}, '
+              f'current animals = {sum(len(animals) for animals in history["current_animals"].values())}')
+
+    print(f'Speedup: {results["sequential"] / results[f"prefetch x{args.workers}"]:.1f}x')
+    fetcher.close()
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+''' Micro-benchmarks of the CPU-bound pieces of a run, on synthetic data (see synthetic_data.py) at several scales.
+
+        $ python benchmarks/bench_micro.py [--scales 10,100,1000,10000] [--cases find_matching_mentors,...]
+        $ python benchmarks/bench_micro.py --compare benchmarks/results/micro_<commit>.json
+
+    Scale is the number of mentees in the mentor workbook (MENTEES_PER_MENTOR per mentor sheet), and the number of
+    animals in the daily report / animal records. Each case is timed like pytest-benchmark: a warmup call, then rounds
+    until --min_time has elapsed, reporting min/mean/median/stddev per call.
+
+    Results are saved as JSON, named by the current commit (benchmarks/results/micro_<commit>.json), so trends can be
+    compared across commits with --compare.
+'''
+from argparse import ArgumentParser
+import contextlib
+from datetime import datetime
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from kitten_report_reader import KittenReportReader
+from kitten_scraper import KittenScraper
+from kitten_utils import DateParser, Utils
+import synthetic_data
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'results')
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'fixtures')
+
+CASES = {}
+
+class SkipCase(Exception):
+    ''' Raised by a case setup that can't run at this scale (e.g. a missing optional module)
+    '''
+
+def case(name):
+    ''' Register a benchmark case. The decorated function is called with (scale, work_dir) and returns the function to
+        time (called with no arguments), or raises SkipCase.
+    '''
+    def decorator(setup):
+        CASES[name] = setup
+        return setup
+    return decorator
+
+@case('find_matching_mentors')
+def find_matching_mentors_case(scale, work_dir):
+    ''' 100 person lookups (emails, full name, person id), a quarter of them not in the mentor workbook
+    '''
+    workbook, mentees = synthetic_data.mentor_workbook(scale)
+    reader = synthetic_data.SyntheticSheetReader(workbook)
+    reader.load_mentors_spreadsheet(None)
+
+    rng = random.Random(2)
+    queries = [[email, name, str(pid)] for name, pid, email in rng.sample(mentees, min(75, len(mentees)))]
+    queries += [[f'nobody{n}@example.com', synthetic_data.person_name(rng), str(rng.randint(100000, 999999))] for n in range(0, 25)]
+    return lambda: [reader.find_matching_mentors(match_strings) for match_strings in queries]
+
+@case('build_mentor_index')
+def build_mentor_index_case(scale, work_dir):
+    workbook, _ = synthetic_data.mentor_workbook(scale)
+    return lambda: synthetic_data.SyntheticSheetReader(workbook).load_mentors_spreadsheet(None)
+
+@case('levenshtein_ratio')
+def levenshtein_ratio_case(scale, work_dir):
+    ''' One foster parent name against every mentee name
+    '''
+    _, mentees = synthetic_data.mentor_workbook(scale)
+    names = [name for name, _, _ in mentees]
+    return lambda: [Utils.levenshtein_ratio('Jordan Nguyen', name) for name in names]
+
+@case('string_to_datetime')
+def string_to_datetime_case(scale, work_dir):
+    ''' The "date received" column of every mentor sheet
+    '''
+    workbook, _ = synthetic_data.mentor_workbook(scale)
+    dates = [values[i] for values in workbook.values() for i in range(0, len(values), 6)]
+    return lambda: [Utils.string_to_datetime(date_str) for date_str in dates]
+
+@case('string_to_datetime_cold')
+def string_to_datetime_cold_case(scale, work_dir):
+    ''' Same column, parsed by a new DateParser every round: nothing parsed yet, no format learned yet
+    '''
+    workbook, _ = synthetic_data.mentor_workbook(scale)
+    dates = [values[i] for values in workbook.values() for i in range(0, len(values), 6)]
+    def parse():
+        date_parser = DateParser()
+        return [date_parser.parse(date_str) for date_str in dates]
+    return parse
+
+@case('read_report_xls')
+def read_report_xls_case(scale, work_dir):
+    ''' Legacy xls daily report. Committed fixtures are used for the smaller scales, larger ones are written with xlwt
+        (if installed).
+    '''
+    path = os.path.join(FIXTURES_DIR, 'daily_report', f'daily_report_{scale}.xls')
+    if not os.path.exists(path):
+        path = os.path.join(work_dir, f'report_{scale}.xls')
+        try:
+            synthetic_data.write_daily_report(path, scale)
+        except ImportError:
+            raise SkipCase(f'no fixture for scale {scale}, and xlwt is not installed to write one') from None
+    return lambda: quietly(KittenReportReader().read_animal_numbers_from_xls, path)
+
+@case('read_report_csv')
+def read_report_csv_case(scale, work_dir):
+    path = os.path.join(work_dir, f'report_{scale}.csv')
+    synthetic_data.write_daily_report(path, scale)
+    return lambda: quietly(KittenReportReader().read_animal_numbers_from_xls, path)
+
+@case('read_report_xlsx')
+def read_report_xlsx_case(scale, work_dir):
+    path = os.path.join(work_dir, f'report_{scale}.xlsx')
+    synthetic_data.write_daily_report(path, scale)
+    return lambda: quietly(KittenReportReader().read_animal_numbers_from_xls, path)
+
+@case('get_animal_details_string')
+def get_animal_details_string_case(scale, work_dir):
+    ''' Animal details for every foster parent in the report
+    '''
+    animal_data = synthetic_data.animal_records(scale)
+    foster_parents, _, _ = synthetic_data.person_records(animal_data)
+    scraper = report_scraper()
+    return lambda: [scraper._get_animal_details_string(animals, animal_data) for animals in foster_parents.values()]
+
+@case('output_results')
+def output_results_case(scale, work_dir):
+    animal_data = synthetic_data.animal_records(scale)
+    foster_parents, persons_data, animals_not_in_foster = synthetic_data.person_records(animal_data)
+    scraper = report_scraper()
+    csv_filename = os.path.join(work_dir, f'output_{scale}.csv')
+    return lambda: quietly(scraper._output_results, list(animal_data), animal_data, foster_parents, persons_data, animals_not_in_foster, None, csv_filename)
+
+def report_scraper():
+    ''' A KittenScraper with just enough configuration to format the report
+    '''
+    scraper = KittenScraper()
+    scraper._dog_mode = False
+    return scraper
+
+def quietly(fn, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args)
+
+def time_case(fn, min_time):
+    ''' pytest-benchmark style timing: one warmup call, then rounds until min_time has elapsed (at least 3)
+    '''
+    fn()
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < 3 or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {'rounds' : len(timings),
+            'min'    : min(timings),
+            'mean'   : statistics.mean(timings),
+            'median' : statistics.median(timings),
+            'stddev' : statistics.stdev(timings)}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd = os.path.dirname(os.path.realpath(__file__)),
+                              capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('--scales', help = 'comma-separated scales (mentees / animals)', default = '10,100,1000,10000')
+    arg_parser.add_argument('--cases', help = f'comma-separated cases (defaults to all: {",".join(CASES)})', default = ','.join(CASES))
+    arg_parser.add_argument('--min_time', help = 'minimum time spent timing each case (seconds)', type = float, default = 0.5)
+    arg_parser.add_argument('--output', help = 'results file (defaults to benchmarks/results/micro_<commit>.json)', default = None)
+    arg_parser.add_argument('--compare', help = 'previous results file to compare against', default = None)
+    args = arg_parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    case_names = args.cases.split(',')
+    unknown = [name for name in case_names if name not in CASES]
+    if unknown:
+        arg_parser.error(f'unknown case(s): {", ".join(unknown)}')
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = {(result['case'], result['scale']) : result for result in json.load(f)['results']}
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in case_names:
+            for scale in scales:
+                try:
+                    fn = CASES[name](scale, work_dir)
+                except SkipCase as skip:
+                    print(f'{name:<26} {scale:>6}  skipped ({skip})')
+                    continue
+                result = {'case' : name, 'scale' : scale, **time_case(fn, args.min_time)}
+                results.append(result)
+
+                line = f'{name:<26} {scale:>6}  median {1000 * result["median"]:9.3f} ms  min {1000 * result["min"]:9.3f} ms  ({result["rounds"]} rounds)'
+                if (name, scale) in previous:
+                    line += f'  {result["median"] / previous[(name, scale)]["median"]:.2f}x vs {os.path.basename(args.compare)}'
+                print(line)
+
+    commit = git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f'micro_{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok = True)
+    with open(output, 'w') as f:
+        json.dump({'commit'  : commit,
+                   'date'    : datetime.now().isoformat(timespec = 'seconds'),
+                   'python'  : platform.python_version(),
+                   'machine' : platform.machine(),
+                   'results' : results}, f, indent = 2)
+    print(f'Saved results {output}')
+
+if __name__ == '__main__':
+    main()
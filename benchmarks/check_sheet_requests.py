@@ -0,0 +1,99 @@
+''' Check the number of Google Sheets API requests GoogleSheetReader makes, against a local stub of the API (see
+    fake_sheets_api.py). No credentials or network needed.
+
+        $ python benchmarks/check_sheet_requests.py [--mentors 10] [--mentees_per_mentor 8]
+
+    Checked:
+
+        - Loading the workbook reads every worksheet with one values:batchGet request (per 50 ranges)
+        - Reloading an unchanged workbook uses the local snapshot, no values:batchGet
+        - Current mentees are answered from the loaded values, no requests
+        - Autoupdate reads the completed cells with one request and writes them with one batchUpdate (plus opening the
+          spreadsheet for its sheet ids, after a snapshot load)
+
+    Exits 1 if any check fails.
+'''
+from argparse import ArgumentParser
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from fake_sheets_api import FakeSheetsClient, mentor_spreadsheet
+import google_sheet_reader
+from google_sheet_reader import GoogleSheetReader
+
+AUTH = {'google_spreadsheet_key' : 'fake-spreadsheet', 'google_client_secret' : 'client_secret.json'}
+
+def load(client):
+    ''' Load the workbook with a new GoogleSheetReader, return the reader and the config YAML
+    '''
+    reader = GoogleSheetReader()
+    with contextlib.redirect_stdout(io.StringIO()):
+        config_yaml = reader.load_mentors_spreadsheet(AUTH)
+    return reader, config_yaml
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('--mentors', help = 'mentor sheets in the workbook', type = int, default = 10)
+    arg_parser.add_argument('--mentees_per_mentor', help = 'mentees listed on each mentor sheet', type = int, default = 8)
+    args = arg_parser.parse_args()
+
+    workbook, mentees = mentor_spreadsheet(args.mentors, args.mentees_per_mentor)
+    client = FakeSheetsClient(workbook)
+    google_sheet_reader.pygsheets.authorize = lambda *args, **kwargs: client
+
+    failures = []
+    def check(description, requests, expected):
+        actual = {request_type : requests.get(request_type, 0) for request_type in expected}
+        ok = actual == expected
+        print(f'{"ok  " if ok else "FAIL"} {description}: {actual}{"" if ok else f", expected {expected}"}')
+        if not ok:
+            failures.append(description)
+
+    batch_gets = -(-(args.mentors + 2) // GoogleSheetReader._BATCH_GET_MAX_RANGES) # mentor sheets, surgery sheet, Config
+
+    with tempfile.TemporaryDirectory() as home:
+        os.environ['HOME'] = home # keep the snapshot out of your own ~/.kitten-scraper
+
+        reader, config_yaml = load(client)
+        check('load workbook', client.requests, {'drive.files.get' : 1, 'spreadsheets.get' : 1, 'values.batchGet' : batch_gets})
+        if config_yaml != workbook['Config'][1][0] or len(reader._mentor_sheets) != args.mentors:
+            failures.append('load workbook contents')
+            print(f'FAIL load workbook contents: {len(reader._mentor_sheets)} mentor sheets')
+
+        client.reset_counts()
+        reader, _ = load(client)
+        check('reload unchanged workbook (snapshot)', client.requests, {'drive.files.get' : 1, 'spreadsheets.get' : 0, 'values.batchGet' : 0})
+
+        client.reset_counts()
+        with contextlib.redirect_stdout(io.StringIO()):
+            current_mentees = reader.get_current_mentees()
+        check('current mentees', client.requests, {'spreadsheets.get' : 0, 'values.batchGet' : 0})
+        if sum(len(current['mentees']) for current in current_mentees) != args.mentors * args.mentees_per_mentor:
+            failures.append('current mentees contents')
+            print('FAIL current mentees contents')
+
+        client.reset_counts()
+        mentor = next(iter(mentees))
+        with contextlib.redirect_stdout(io.StringIO()):
+            reader.set_completed_mentees(mentor, mentees[mentor][0:3])
+            reader.commit_updates()
+        # spreadsheets.get: the cells, plus opening the spreadsheet for its sheet ids (not opened by the snapshot load)
+        check('autoupdate 3 completed mentees', client.requests, {'spreadsheets.get' : 2, 'spreadsheets.batchUpdate' : 1})
+        if len(client.updates) != 6: # strikethrough name + notes, per mentee
+            failures.append('autoupdate contents')
+            print(f'FAIL autoupdate contents: {len(client.updates)} cell updates')
+
+        client.revision += 1
+        client.reset_counts()
+        load(client)
+        check('reload edited workbook', client.requests, {'drive.files.get' : 1, 'spreadsheets.get' : 1, 'values.batchGet' : batch_gets})
+
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
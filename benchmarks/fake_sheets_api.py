@@ -0,0 +1,154 @@
+''' A local stub of the parts of the Google Sheets/Drive API (through pygsheets) that GoogleSheetReader uses, with a
+    counter per request type, used by check_sheet_requests.py.
+
+        FakeSheetsClient(workbook)      stands in for the pygsheets client returned by pygsheets.authorize()
+        mentor_spreadsheet(...)         a generated workbook: Config sheet, mentor sheets and a surgery sheet
+
+    Every API request is counted in FakeSheetsClient.requests ({request type : count}):
+
+        drive.files.get                 spreadsheet revision (version, modifiedTime)
+        spreadsheets.get                spreadsheet metadata (open_by_key), or cells with formatting (sheet.get)
+        values.batchGet                 values of several A1 ranges (sheet.values_batch_get)
+        spreadsheets.batchUpdate        cell updates (sheet.batch_update)
+'''
+import re
+import threading
+
+_A1_RANGE = re.compile(r"^'((?:[^']|'')*)'!([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?$")
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+class FakeWorksheet:
+    def __init__(self, sheet_id, title, rows, hidden = False):
+        self.id = sheet_id
+        self.title = title
+        self.values = rows
+        self.rows = max(len(rows), 1)
+        self.hidden = hidden
+
+class FakeSpreadsheet:
+    def __init__(self, spreadsheet_id, title, sheets):
+        self.id = spreadsheet_id
+        self.title = title
+        self._worksheets = [FakeWorksheet(n, sheet_title, rows) for n, (sheet_title, rows) in enumerate(sheets.items())]
+
+    def worksheets(self):
+        return self._worksheets
+
+    def worksheet_by_title(self, title):
+        return next(ws for ws in self._worksheets if ws.title == title)
+
+class _SheetService:
+    def __init__(self, client):
+        self._client = client
+
+    def values_batch_get(self, spreadsheet_id, ranges):
+        self._client.count('values.batchGet')
+        return [{'range' : a1_range, 'values' : self._client.range_values(a1_range)} for a1_range in ranges]
+
+    def get(self, spreadsheet_id, fields = None, includeGridData = False, ranges = None):
+        self._client.count('spreadsheets.get')
+        data = []
+        for a1_range in ranges or []:
+            values = self._client.range_values(a1_range)
+            value = values[0][0] if values and values[0] else ''
+            data.append({'rowData' : [{'values' : [{'formattedValue' : value, 'effectiveValue' : {'stringValue' : value}}]}]})
+        return {'sheets' : [{'data' : data}]}
+
+    def batch_update(self, spreadsheet_id, requests):
+        self._client.count('spreadsheets.batchUpdate')
+        self._client.updates.extend(requests)
+
+class _Request:
+    def __init__(self, result):
+        self._result = result
+
+    def execute(self):
+        return self._result
+
+class _DriveFiles:
+    def __init__(self, client):
+        self._client = client
+
+    def get(self, fileId, fields = None, supportsAllDrives = False):
+        self._client.count('drive.files.get')
+        return _Request({'version' : str(self._client.revision), 'modifiedTime' : '2022-06-01T09:00:00.000Z'})
+
+class _DriveService:
+    def __init__(self, client):
+        self._files = _DriveFiles(client)
+
+    def files(self):
+        return self._files
+
+class _Drive:
+    def __init__(self, client):
+        self.service = _DriveService(client)
+
+class FakeSheetsClient:
+    ''' Stands in for the pygsheets client: open_by_key(), sheet.values_batch_get(), sheet.get(), sheet.batch_update()
+        and drive.service.files().get(). workbook is {sheet title : rows}. Bump revision to simulate an edit.
+    '''
+    def __init__(self, workbook, title = 'Foster Mentors', spreadsheet_id = 'fake-spreadsheet'):
+        self.workbook = workbook
+        self.revision = 1
+        self.requests = {}
+        self.updates = []
+        self._lock = threading.Lock()
+        self._spreadsheet = FakeSpreadsheet(spreadsheet_id, title, workbook)
+        self.sheet = _SheetService(self)
+        self.drive = _Drive(self)
+
+    def open_by_key(self, key):
+        self.count('spreadsheets.get')
+        return self._spreadsheet
+
+    def count(self, request_type):
+        with self._lock:
+            self.requests[request_type] = self.requests.get(request_type, 0) + 1
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests = {}
+
+    def range_values(self, a1_range):
+        ''' Values of an A1 range ('Title'!A1:H20 or 'Title'!A2), trailing empty cells and rows omitted like the API
+        '''
+        match = _A1_RANGE.match(a1_range)
+        if not match:
+            raise ValueError(f'unsupported range {a1_range}')
+        title, first_col, first_row, last_col, last_row = match.groups()
+        first_col, first_row = _column_index(first_col), int(first_row) - 1
+        last_col, last_row = (_column_index(last_col), int(last_row) - 1) if last_col else (first_col, first_row)
+
+        rows = [list(row[first_col:last_col + 1]) for row in self.workbook[title.replace("''", "'")][first_row:last_row + 1]]
+        for row in rows:
+            while row and row[-1] == '':
+                row.pop()
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+def mentor_spreadsheet(mentors = 10, mentees_per_mentor = 8, config_yaml = 'login_url : https://example.com/login\n'):
+    ''' A workbook ({sheet title : rows}) laid out like the mentors spreadsheet. Returns the workbook, and
+        {mentor sheet title : [mentee person ids]}.
+    '''
+    workbook = {'Config' : [['Config'], [config_yaml]]}
+    mentees = {}
+    for n in range(0, mentors):
+        title = f'Mentor {n + 1}'
+        rows = [['Notes', 'Name', 'Email', 'Date\nKittens\nReceived', 'ID', 'Phone', 'Kittens', 'Mentor Notes'],
+                ['', '', '', '', '', '', '', '']]
+        mentees[title] = []
+        for m in range(0, mentees_per_mentor):
+            pid = 700000 + n * 100 + m
+            rows.append(['', f'Mentee {n + 1}-{m + 1}', f'mentee{pid}@example.com', f'{m + 1:02}-May-2022', str(pid), '4085551212', '3', ''])
+            mentees[title].append(pid)
+        rows.append(['Completed Mentees', '', '', '', '', '', '', ''])
+        workbook[title] = rows
+    workbook['Foster S-N Appts'] = [['Date', 'Patient']] + [[f'{d + 1:02}-Jun-2022', str(40000001 + d)] for d in range(0, 20)]
+    return workbook, mentees
@@ -0,0 +1,340 @@
+''' A local stand-in for the shelter web app and the mentors spreadsheet, used by the end-to-end benchmark.
+
+    StandInShelter generates a deterministic (seeded) set of animals, foster parents and mentors, and serves fixture
+    versions of every page KittenScraper loads:
+
+        /login                  login form (txt_username, txt_password, login button, Continue), sets a session cookie
+        /search                 person search (userid), submits to /person_search
+        /person_search          person search result (person details, reached from /search)
+        /person                 person details (name, phones, emailTable), loaded directly with 'person_url'
+        /animal                 animal details (status, foster parent link, etc.)
+        /medical_details        medical details (spay/neuter status)
+        /adoption_summary       adoption summary (bio)
+        /list_animals           paged list of all animals a person has been responsible for (Table3 sections + pager)
+
+    Current animals are spread over every list_animals page, and each person's last list_animals page also lists
+    animals that are "In Foster" with someone else under another section (e.g. adopted and fostered again since), which
+    must not count as this person's current animals.
+
+    Every request sleeps for the configured latency first. Requests are counted per page, see requests_by_page.
+
+    FakeSheetReader is a SheetReaderBase whose mentor sheets are generated from the same data, and whose additional
+    config YAML points KittenScraper at the local server.
+'''
+from datetime import datetime, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from sheet_reader_base import SheetReaderBase
+
+_PERSON_ID_PREFIX = 'ctl00_ctl00_ContentPlaceHolderBase_ContentPlaceHolder1_personDetailsUC_'
+_SESSION_COOKIE = 'ShelterSession=benchmark'
+_HISTORY_ROWS_PER_PAGE = 30
+
+_FIRST_NAMES = ['Alex', 'Jordan', 'Sam', 'Taylor', 'Casey', 'Morgan', 'Riley', 'Jamie', 'Avery', 'Quinn', 'Drew', 'Robin']
+_LAST_NAMES = ['Smith', 'Garcia', 'Nguyen', 'Johnson', 'Lee', 'Patel', 'Brown', 'Kim', 'Lopez', 'Chen', 'Davis', 'Wong']
+_ANIMAL_NAMES = ['Mittens', 'Shadow', 'Pumpkin', 'Biscuit', 'Luna', 'Pepper', 'Noodle', 'Olive', 'Mochi', 'Ziggy']
+_COLORS = ['Black', 'White', 'Orange', 'Grey', 'Brown Tabby', 'Calico', 'Tortoiseshell']
+_PREVIOUS_STATUSES = ['Adopted', 'Returned to Shelter', 'Transferred Out', 'Euthanized', 'Unassisted Death - In Foster']
+
+class StandInShelter:
+    ''' Generated shelter data and the local HTTP server that serves it
+    '''
+    def __init__(self, animals = 50, foster_parents = 15, history_pages = 3, not_in_foster = 0.1, mentors = 5,
+                 mentees_per_mentor = 4, latency = 0.05, seed = 1):
+        rng = random.Random(seed)
+        self.latency = latency
+        self.history_pages = history_pages
+        self.requests_by_page = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+        # Foster parents (plus a few persons who no longer foster, so some mentees are "completed")
+        #
+        person_ids = [700001 + n for n in range(0, foster_parents + mentors * mentees_per_mentor)]
+        self.persons = {}
+        for p_number in person_ids:
+            first_name, last_name = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+            self.persons[p_number] = {
+                'first_name' : first_name,
+                'last_name'  : last_name,
+                'home_phone' : f'408{rng.randint(1000000, 9999999)}',
+                'cell_phone' : f'669{rng.randint(1000000, 9999999)}',
+                'emails'     : [f'{first_name}.{last_name}{p_number}@example.com'.lower()],
+                'current'    : [],
+                'history'    : [self._history_row(rng, 30000000 + p_number * 100 + n) for n in range(0, max(0, history_pages * _HISTORY_ROWS_PER_PAGE - 5))]
+            }
+        fostering = person_ids[0:foster_parents]
+
+        # Animals, most of them in foster with one of the foster parents
+        #
+        self.animals = {}
+        for a_number in range(40000001, 40000001 + animals):
+            in_foster = rng.random() >= not_in_foster
+            p_number = rng.choice(fostering) if in_foster and fostering else None
+            self.animals[a_number] = {
+                'name'        : rng.choice(_ANIMAL_NAMES),
+                'type'        : rng.choice(['Cat', 'Kitten']),
+                'gender'      : rng.choice(['Male', 'Female']),
+                'color'       : rng.choice(_COLORS),
+                'dob'         : (datetime(2022, 6, 1) - timedelta(days = rng.randint(20, 900))).strftime('%m/%d/%Y'),
+                'status_date' : (datetime(2022, 6, 1) - timedelta(days = rng.randint(0, 10))).strftime('%m/%d/%Y'),
+                'status'      : 'In Foster' if in_foster else rng.choice(['Adopted', 'Available', 'Hold - Medical']),
+                'p_number'    : p_number,
+                'sn'          : rng.choice(['Yes', 'No']),
+                'bio'         : rng.choice(['', 'A sweet and playful companion who loves sunny windowsills.']),
+                'message'     : rng.choice(['', '', 'Needs eye ointment twice daily.'])
+            }
+            if p_number:
+                self.persons[p_number]['current'].append(a_number)
+
+        # Animals now in foster elsewhere that were adopted from one of the foster parents before
+        #
+        in_foster = [a_number for a_number, animal in self.animals.items() if animal['p_number']]
+        for p_number in fostering:
+            for a_number in rng.sample(in_foster, min(2, len(in_foster))):
+                if self.animals[a_number]['p_number'] != p_number:
+                    self.persons[p_number].setdefault('adopted_out', []).append(a_number)
+
+        # Mentors, each with a few mentees
+        #
+        mentees = person_ids[:]
+        rng.shuffle(mentees)
+        self.mentors = {}
+        for n in range(0, mentors):
+            mentor = f'{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)[0]}. ({n + 1})'
+            self.mentors[mentor] = mentees[n * mentees_per_mentor:(n + 1) * mentees_per_mentor]
+
+    @staticmethod
+    def _history_row(rng, a_number):
+        return [(datetime(2022, 1, 1) - timedelta(days = rng.randint(30, 2000))).strftime('%-m/%-d/%Y'),
+                '10:30 AM',
+                rng.choice(_PREVIOUS_STATUSES),
+                str(a_number),
+                rng.choice(_ANIMAL_NAMES),
+                rng.choice(['Cat', 'Kitten', 'Dog', 'Rabbit']),
+                'Domestic Shorthair',
+                rng.choice(['Male', 'Female']),
+                f'{rng.randint(3, 40)} weeks',
+                'Foster Home']
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def start(self):
+        ''' Start serving on a free local port (in a daemon thread)
+        '''
+        shelter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(shelter.latency)
+                url = urlsplit(self.path)
+                page = url.path.strip('/') or 'login'
+                query = {key : values[0] for key, values in parse_qs(url.query).items()}
+                status, body = shelter.render(page, query, _SESSION_COOKIE.split('=')[0] in (self.headers.get('Cookie') or ''))
+                body = body.encode('utf-8')
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if page == 'login':
+                    self.send_header('Set-Cookie', f'{_SESSION_COOKIE}; Path=/')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target = self._server.serve_forever, daemon = True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def page_count(self):
+        with self._lock:
+            return sum(self.requests_by_page.values())
+
+    def render(self, page, query, logged_in):
+        ''' Return (HTTP status, HTML) for a page request
+        '''
+        with self._lock:
+            self.requests_by_page[page] = self.requests_by_page.get(page, 0) + 1
+
+        renderers = {
+            'login'                 : lambda: self._login_page(),
+            'home'                  : lambda: '<html><body><h1>Welcome</h1></body></html>',
+            'search'                : lambda: self._search_page(),
+            'person_search'         : lambda: self._person_page(int(query.get('userid', 0))),
+            'person'                : lambda: self._person_page(int(query.get('personid', 0))),
+            'animal'                : lambda: self._animal_page(int(query.get('animalid', 0))),
+            'medical_details'       : lambda: self._medical_details_page(int(query.get('animalid', 0))),
+            'adoption_summary'      : lambda: self._adoption_summary_page(int(query.get('animalid', 0))),
+            'list_animals'          : lambda: self._list_animals_page(int(query.get('personid', 0)), int(query.get('page', 1))),
+        }
+        if page not in renderers:
+            return 404, '<html><body>Not Found</body></html>'
+        if page not in ['login', 'home'] and not logged_in:
+            return 200, self._login_page()
+        return 200, renderers[page]()
+
+    def _login_page(self):
+        return ('<html><body><form onsubmit="return false;">'
+                '<input id="txt_username" name="username" type="text">'
+                '<input id="txt_password" name="password" type="password">'
+                '<button id="ctl00_ctl00_ContentPlaceHolderBase_ContentPlaceHolder1_btn_login" type="button">Login</button>'
+                '</form>'
+                '<a id="Continue" href="/home">Continue</a>'
+                '</body></html>')
+
+    def _search_page(self):
+        return ('<html><body><form action="/person_search" method="get">'
+                '<input id="userid" name="userid" type="text">'
+                '</form></body></html>')
+
+    def _person_page(self, p_number):
+        person = self.persons.get(p_number)
+        if not person:
+            return '<html><body>Person not found</body></html>'
+
+        field = lambda name, value: f'<input id="{_PERSON_ID_PREFIX}{name}" type="text" value="{escape(value)}">'
+        emails = ''.join(f'<tr><td>{escape(email)}</td><td>Home</td></tr>' for email in person['emails'])
+        return ('<html><body>'
+                f'{field("PersonNameTitle1_txtFirstName", person["first_name"])}'
+                f'{field("PersonNameTitle1_txtLastName", person["last_name"])}'
+                f'{field("PersonNameTitle1_txtPreferredName", "")}'
+                f'{field("PersonContact1_homePhone_txtPhone3", person["home_phone"])}'
+                f'{field("PersonContact1_mobilePhone_txtPhone3", person["cell_phone"])}'
+                f'<table id="emailTable"><tbody>{emails}</tbody></table>'
+                '</body></html>')
+
+    def _animal_page(self, a_number):
+        animal = self.animals.get(a_number)
+        if not animal:
+            return '<html><body>Animal not found<input id="submitbtn2" type="submit"></body></html>'
+
+        select = lambda element_id, value: f'<select id="{element_id}"><option>Select</option><option selected>{escape(value)}</option></select>'
+        foster_parent = f'<a href="/person?personid={animal["p_number"]}">Foster Parent</a>' if animal['p_number'] else ''
+        message = f'<div id="specialMessagesDialog">{escape(animal["message"])}</div>' if animal['message'] else ''
+        return ('<html><body>'
+                f'{message}'
+                '<table id="Table17"><tbody>'
+                f'<tr><td>Responsible</td><td>{foster_parent}</td></tr>'
+                '<tr><td></td><td></td></tr><tr><td></td><td></td></tr><tr><td></td><td></td></tr>'
+                f'<tr><td>Status</td><td>{escape(animal["status"])}</td></tr>'
+                '</tbody></table>'
+                f'{select("status", animal["status"])}'
+                '<select id="subStatus"><option selected></option></select>'
+                f'<input id="animalname" type="text" value="{escape(animal["name"])}">'
+                f'<input id="type" type="text" value="{animal["type"]}">'
+                '<input id="primaryBreed" type="text" value="Domestic Shorthair">'
+                f'{select("primaryColour", animal["color"])}'
+                f'{select("secondaryColour", "None")}'
+                f'{select("sex", animal["gender"])}'
+                f'<img id="animal-default-photo" src="/images/{"NoImage.png" if a_number % 3 == 0 else f"{a_number}.jpg"}">'
+                f'<input id="dob" type="text" value="{animal["dob"]}">'
+                f'<input id="statusdate" type="text" value="{animal["status_date"]}">'
+                '<input id="submitbtn2" type="submit" value="Save">'
+                '</body></html>')
+
+    def _medical_details_page(self, a_number):
+        animal = self.animals.get(a_number, {'sn' : ''})
+        row = lambda cells: '<tr>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>'
+        return ('<html><body>'
+                '<table><tbody><tr><td>Medical Details</td></tr></tbody></table>'
+                '<table><tbody><tr><td>Summary</td></tr><tr><td><table><tbody>'
+                f'{row(["Microchip", "Yes", "Rabies", "No"])}'
+                f'{row(["FVRCP", "Yes", "FeLV", "Negative"])}'
+                f'{row(["Weight", "2.1 lbs", "Dewormed", "Yes"])}'
+                f'{row(["Altered", "", "Spayed/Neutered", animal["sn"]])}'
+                '</tbody></table></td></tr></tbody></table>'
+                '</body></html>')
+
+    def _adoption_summary_page(self, a_number):
+        animal = self.animals.get(a_number, {'bio' : ''})
+        return f'<html><body><div id="adoptSummary">{escape(animal["bio"])}</div></body></html>'
+
+    def _listing_row(self, a_number, status):
+        animal = self.animals[a_number]
+        return [animal['status_date'], '10:00 AM', status, str(a_number), animal['name'], animal['type'],
+                'Domestic Shorthair', animal['gender'], '8 weeks', 'Foster Home']
+
+    def _list_animals_page(self, p_number, page_number):
+        ''' History rows are spread over history_pages pages, under a "Fostered" section. Current animals are spread
+            over the same pages. Animals adopted out and now in foster elsewhere are listed under an "Adopted" section on
+            the last page. Pages past the last page have no listing table.
+        '''
+        person = self.persons.get(p_number)
+        page_count = max(1, self.history_pages)
+        if not person or page_number < 1 or page_number > page_count:
+            return '<html><body>No more animals</body></html>'
+
+        first_row = (page_number - 1) * _HISTORY_ROWS_PER_PAGE
+        rows = person['history'][first_row:first_row + _HISTORY_ROWS_PER_PAGE]
+        rows += [self._listing_row(a_number, 'In Foster') for n, a_number in enumerate(person['current']) if n % page_count == page_number - 1]
+        sections = [('Fostered', rows)]
+        if page_number == page_count and person.get('adopted_out'):
+            sections.append(('Adopted', [self._listing_row(a_number, 'In Foster') for a_number in person['adopted_out']]))
+
+        table_rows = ''.join(f'<tr><td class="section">{name}</td></tr>' +
+                             ''.join('<tr>' + ''.join(f'<td>{escape(cell)}</td>' for cell in row) + '</tr>' for row in section_rows)
+                             for name, section_rows in sections)
+        pager = ' '.join(f'<a href="list_animals?page={n}&amp;personid={p_number}">{n}</a>' for n in range(1, page_count + 1))
+        return ('<html><body>'
+                f'<table id="Table3">{table_rows}</table>'
+                f'<div class="pager">{pager}</div>'
+                '</body></html>')
+
+class FakeSheetReader(SheetReaderBase):
+    ''' Mentors spreadsheet stand-in: one mentor sheet per StandInShelter mentor, listing their mentees' names, person
+        ids and emails. Completed mentees are recorded in completed_mentees.
+    '''
+    def __init__(self, shelter):
+        super().__init__()
+        self._shelter = shelter
+        self.completed_mentees = {}
+
+    def load_mentors_spreadsheet(self, auth):
+        for mentor, mentee_ids in self._shelter.mentors.items():
+            values = []
+            for p_number in mentee_ids:
+                person = self._shelter.persons[p_number]
+                values += [f'{person["first_name"]} {person["last_name"]}'.lower(), str(p_number)] + person['emails']
+            self._mentor_sheets.append(mentor)
+            self._mentor_match_values[mentor] = values
+        self._build_mentor_index()
+
+        url = self._shelter.url
+        return (f'login_url : {url}/login\n'
+                f'search_url : {url}/search\n'
+                f'animal_url : {url}/animal?animalid={{}}\n'
+                f'medical_details_url : {url}/medical_details?animalid={{}}\n'
+                f'adoption_summary_url : {url}/adoption_summary?animalid={{}}\n'
+                f'list_animals_url : {url}/list_animals?page={{}}&personid={{}}\n'
+                f'person_url : {url}/person?personid={{}}\n'
+                f'do_not_assign_mentor : []\n'
+                f'mentors : []\n')
+
+    def get_current_mentees(self):
+        current_mentees = []
+        for mentor, mentee_ids in self._shelter.mentors.items():
+            mentees = [{'name' : f'{self._shelter.persons[p_number]["first_name"]} {self._shelter.persons[p_number]["last_name"]}', 'pid' : p_number}
+                       for p_number in mentee_ids]
+            current_mentees.append({'mentor' : mentor, 'mentees' : mentees, 'most_recent' : datetime(2022, 5, 1)})
+        return current_mentees
+
+    def set_completed_mentees(self, mentor, mentee_ids):
+        self.completed_mentees.setdefault(mentor, []).extend(mentee_ids)
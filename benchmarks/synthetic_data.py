@@ -0,0 +1,175 @@
+''' Synthetic data at configurable scale for the micro-benchmarks (see bench_micro.py). Everything is generated from a
+    seeded random.Random, so the same scale always produces the same data.
+
+        mentor_workbook(mentees)            mentor sheet match values, as loaded by a SheetReaderBase
+        SyntheticSheetReader(workbook)      a SheetReaderBase over a generated mentor workbook
+        write_daily_report(path, animals)   a daily report (.xls, .xlsx or .csv) in the KittenReportReader column layout
+        animal_records(animals)             animal data as returned by KittenScraper._read_animal()
+        person_records(animal_data)         foster parents ({person : [animals]}) and person data for those animals
+'''
+import csv
+from datetime import datetime, timedelta
+import os
+import random
+import sys
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from kitten_report_reader import KittenReportReader
+from sheet_reader_base import SheetReaderBase
+
+MENTEES_PER_MENTOR = 8
+
+_FIRST_NAMES = ['Alex', 'Jordan', 'Sam', 'Taylor', 'Casey', 'Morgan', 'Riley', 'Jamie', 'Avery', 'Quinn', 'Drew', 'Robin',
+                'Charlie', 'Dakota', 'Emerson', 'Finley', 'Harper', 'Jessie', 'Kendall', 'Logan', 'Parker', 'Reese']
+_LAST_NAMES = ['Smith', 'Garcia', 'Nguyen', 'Johnson', 'Lee', 'Patel', 'Brown', 'Kim', 'Lopez', 'Chen', 'Davis', 'Wong',
+               'Martinez', 'Anderson', 'Thomas', 'Hernandez', 'Moore', 'Jackson', 'Martin', 'Thompson', 'White', 'Clark']
+_ANIMAL_NAMES = ['Mittens', 'Shadow', 'Pumpkin', 'Biscuit', 'Luna', 'Pepper', 'Noodle', 'Olive', 'Mochi', 'Ziggy']
+_COLORS = ['Black', 'White', 'Orange', 'Grey', 'Brown Tabby', 'Calico', 'Tortoiseshell']
+
+def person_name(rng):
+    return f'{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}'
+
+def mentor_workbook(mentees, seed = 1):
+    ''' Mentor sheet match values for the given number of mentees, MENTEES_PER_MENTOR mentees per mentor sheet. Each
+        mentee row has a date received, name, person id, email, phone and free-form notes (lowercase, like the values
+        loaded by the sheet readers). Returns {sheet name : [values]}, and [(name, person id, email)] of every mentee.
+    '''
+    rng = random.Random(seed)
+    workbook = {}
+    mentee_list = []
+    for n in range(0, max(1, mentees // MENTEES_PER_MENTOR)):
+        sheet_name = f'{person_name(rng)} ({n + 1})'
+        values = []
+        for _ in range(0, min(MENTEES_PER_MENTOR, mentees - n * MENTEES_PER_MENTOR)):
+            name, pid = person_name(rng), rng.randint(100000, 999999)
+            email = f'{name.replace(" ", ".")}{pid % 1000}@example.com'.lower()
+            date_received = (datetime(2021, 1, 1) + timedelta(days = rng.randint(0, 730))).strftime('%d-%b-%Y')
+            values += [date_received.lower(), name.lower(), str(pid), email, f'(408) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}',
+                       rng.choice(['', 'bottle babies', f'returned {rng.randint(1, 9)} kittens', 'prefers email'])]
+            mentee_list.append((name, pid, email))
+        workbook[sheet_name] = values
+    return workbook, mentee_list
+
+class SyntheticSheetReader(SheetReaderBase):
+    ''' A SheetReaderBase over a generated mentor workbook (see mentor_workbook())
+    '''
+    def __init__(self, workbook):
+        super().__init__()
+        self._mentor_sheets = list(workbook)
+        self._mentor_match_values = workbook
+
+    def load_mentors_spreadsheet(self, auth):
+        self._build_mentor_index()
+        return ''
+
+    def get_current_mentees(self):
+        return []
+
+    def set_completed_mentees(self, mentor, mentee_ids):
+        pass
+
+def write_daily_report(path, animals, seed = 1):
+    ''' Write a daily report with the given number of animals. The format (.xls, .xlsx or .csv) follows the extension.
+        Writing .xls needs xlwt (not a kitten-scraper dependency, the committed fixtures are used when it's missing).
+    '''
+    rng = random.Random(seed)
+    rows = [KittenReportReader.REPORT_COLUMNS]
+    for a_number in range(40000001, 40000001 + animals):
+        status_date = datetime(2022, 6, 1, 9) + timedelta(minutes = rng.randint(0, 600))
+        rows.append([status_date if path.endswith(('.xls', '.xlsx')) else status_date.strftime('%m/%d/%Y %I:%M %p'),
+                     rng.choice(['Cat', 'Kitten']),
+                     a_number,
+                     rng.choice(_ANIMAL_NAMES),
+                     f'{rng.randint(2, 20)} weeks',
+                     rng.randint(100000, 999999)])
+
+    if path.endswith('.xls'):
+        import xlwt
+        workbook = xlwt.Workbook()
+        sheet = workbook.add_sheet('Report')
+        date_style = xlwt.easyxf(num_format_str = 'm/d/yyyy h:mm AM/PM')
+        for row_number, row in enumerate(rows):
+            for col_number, value in enumerate(row):
+                if isinstance(value, datetime):
+                    sheet.write(row_number, col_number, value, date_style)
+                else:
+                    sheet.write(row_number, col_number, value)
+        workbook.save(path)
+    elif path.endswith('.xlsx'):
+        workbook = openpyxl.Workbook(write_only = True)
+        sheet = workbook.create_sheet()
+        for row in rows:
+            sheet.append(row)
+        workbook.save(path)
+    else:
+        with open(path, 'w', newline = '') as csv_file:
+            csv.writer(csv_file).writerows(rows)
+
+def animal_records(animals, seed = 1):
+    ''' Animal data as returned by KittenScraper._read_animal(), {animal number : data}
+    '''
+    rng = random.Random(seed)
+    records = {}
+    for a_number in range(40000001, 40000001 + animals):
+        gender = rng.choice(['Male', 'Female'])
+        in_foster = rng.random() > 0.1
+        records[a_number] = {
+            'message'         : rng.choice(['', '', 'Needs eye ointment twice daily.\nWeigh daily.']),
+            'status'          : 'In Foster' if in_foster else 'Adopted',
+            'name'            : rng.choice(_ANIMAL_NAMES),
+            'type'            : rng.choice(['Cat', 'Kitten']),
+            'breed'           : 'DSH',
+            'primary_color'   : rng.choice(_COLORS),
+            'secondary_color' : '',
+            'color'           : rng.choice(_COLORS),
+            'gender'          : gender,
+            'gender_short'    : gender[0],
+            'photo'           : rng.choice(['Yes', 'No']),
+            'age'             : f'{rng.randint(2, 20)} weeks',
+            'status_date'     : (datetime(2022, 6, 1) - timedelta(days = rng.randint(0, 3))).strftime('%-d-%b-%Y'),
+            'sn'              : rng.choice(['Yes', 'No']),
+            'bio'             : rng.choice(['Yes', 'No'])
+        }
+    return records
+
+def person_records(animal_data, animals_per_person = 3, seed = 1):
+    ''' Foster parents for the in-foster animals of animal_data (a few animals each), and their person data as
+        returned by KittenScraper._get_person_data(). Returns foster_parents, persons_data, animals_not_in_foster.
+    '''
+    rng = random.Random(seed)
+    foster_parents = {}
+    animals_not_in_foster = set()
+    in_foster = []
+    for a_number, data in animal_data.items():
+        if data['status'] == 'In Foster':
+            in_foster.append(a_number)
+        else:
+            animals_not_in_foster.add(a_number)
+
+    p_number = 700000
+    while in_foster:
+        p_number += 1
+        count = rng.randint(1, animals_per_person * 2 - 1)
+        foster_parents[p_number], in_foster = in_foster[0:count], in_foster[count:]
+
+    persons_data = {}
+    for p_number in foster_parents:
+        first_name, last_name = person_name(rng).split()
+        prev_animals_fostered = rng.choice([0, 0, 3, 12, 40])
+        persons_data[p_number] = {
+            'first_name'             : first_name,
+            'last_name'              : last_name,
+            'preferred_name'         : '',
+            'full_name'              : f'{first_name} {last_name}',
+            'home_phone'             : f'408{rng.randint(1000000, 9999999)}',
+            'cell_phone'             : f'669{rng.randint(1000000, 9999999)}',
+            'emails'                 : {f'{first_name}.{last_name}{p_number % 1000}@example.com'.lower()},
+            'prev_animals_fostered'  : prev_animals_fostered,
+            'euthanized_count'       : 0,
+            'unassisted_death_count' : rng.choice([0, 0, 0, 1]) if prev_animals_fostered else 0,
+            'loss_rate'              : 0.0,
+            'notes'                  : rng.choice(['', '', '*** Found 1 matching mentor(s): Mentor (1)'])
+        }
+    return foster_parents, persons_data, animals_not_in_foster
@@ -1,6 +1,8 @@
 import os
-import xlrd
+import tempfile
+import openpyxl
 from boxsdk import Client, JWTAuth
+from kitten_metrics import Metrics
 from kitten_utils import Log, Utils
 from sheet_reader_base import SheetReaderBase
 
@@ -13,17 +15,26 @@ class BoxSheetReader(SheetReaderBase):
 
             jwt_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), auth['box_jwt'])
             client = Client(JWTAuth.from_settings_file(jwt_path))
-            box_file = client.as_user(client.user(user_id = auth['box_user_id'])).file(file_id=auth['box_file_id']).get()
-            xlxs_workbook = xlrd.open_workbook(file_contents=box_file.content())
+            box_file = client.as_user(client.user(user_id = auth['box_user_id'])).file(file_id=auth['box_file_id'])
 
-            config_yaml = xlxs_workbook.sheet_by_name(self._CONFIG_SHEET_NAME).row_values(1)[0]
-
-            for sheet_name in xlxs_workbook.sheet_names():
-                if not self._is_reserved_sheet(sheet_name):
-                    sheet = xlxs_workbook.sheet_by_name(sheet_name)
-                    self._mentor_sheets.append(sheet)
-                    all_values = [sheet.row_values(i) for i in range(1, sheet.nrows)]
-                    self._mentor_match_values[Utils.utf8(sheet_name)] = [Utils.utf8(str(item)).lower() for sublist in all_values for item in sublist]
+            # If nobody has edited the file since the last run, use the local snapshot
+            #
+            Metrics.count('box_api_calls')
+            box_file = box_file.get(fields = ['name', 'etag', 'sha1'])
+            revision = f'{box_file["etag"]}@{box_file["sha1"]}'
+            snapshot = self._load_snapshot(auth['box_file_id'], revision)
+            if snapshot:
+                config_yaml = snapshot['config_yaml']
+            else:
+                with tempfile.TemporaryDirectory() as download_dir:
+                    workbook_path = os.path.join(download_dir, 'mentors.xlsx')
+                    with open(workbook_path, 'wb') as workbook_file:
+                        Metrics.count('box_api_calls')
+                        box_file.download_to(workbook_file)
+                    config_yaml = self._read_workbook(workbook_path)
+
+                self._build_mentor_index()
+                self._save_snapshot(revision, box_file['name'], config_yaml)
 
         except Exception as e:
             Log.error(f'ERROR: Unable to load Feline Foster spreadsheet!\r\n{str(e)}, {repr(e)}')
@@ -32,20 +43,49 @@ class BoxSheetReader(SheetReaderBase):
         print(f'Loaded {len(self._mentor_sheets)} mentors from \"{box_file["name"]}\"')
         return config_yaml
 
+    def _read_workbook(self, workbook_path):
+        ''' Read the mentors workbook one row at a time, keeping only what we need from each mentor sheet: the current
+            mentee block (first 50 rows, columns A-G) and the mentee names/emails/ids (columns B, C, E) used for mentor
+            matching. Memory use doesn't grow with the size of the workbook. Return the config yaml.
+        '''
+        workbook = openpyxl.load_workbook(workbook_path, read_only = True, data_only = True)
+        try:
+            config_yaml = next(workbook[self._CONFIG_SHEET_NAME].iter_rows(min_row = 2, max_row = 2, max_col = 1, values_only = True))[0]
+
+            for sheet in workbook.worksheets:
+                if self._is_reserved_sheet(sheet.title):
+                    continue
+
+                mentee_block = []
+                mentor_match_values = []
+                for row_number, row in enumerate(sheet.iter_rows(max_col = 7, values_only = True)):
+                    if row_number < 50:
+                        mentee_block.append(['' if value is None else value for value in row])
+                    if row_number > 0:
+                        mentor_match_values += [Utils.utf8(str(row[col])).lower() for col in [1, 2, 4] if len(row) > col and row[col] not in [None, '']]
+
+                self._mentor_sheets.append(sheet.title)
+                self._sheet_values[sheet.title] = mentee_block
+                self._mentor_match_values[Utils.utf8(sheet.title)] = mentor_match_values
+
+        finally:
+            workbook.close()
+
+        return config_yaml
+
     def get_current_mentees(self):
         ''' Return the current mentees assigned to each mentor
         '''
         current_mentees = []
-        for worksheet in self._mentor_sheets:
-            if worksheet.name.lower() == 'retired mentor':
+        for mentor in self._mentor_sheets:
+            if mentor.lower() == 'retired mentor':
                 continue
 
-            print(f'Loading current mentees for {worksheet.name}... ', end='')
+            print(f'Loading current mentees for {mentor}... ', end='')
 
-            # It's much faster to grab a whole block of cells at once vs iterating through many API calls
-            #
-            max_search_rows = min(50, worksheet.nrows)
-            cells = [worksheet.row_slice(row, start_colx=0, end_colx=7) for row in range(0, max_search_rows)]
+            rows = self._sheet_values[mentor]
+            max_search_rows = min(50, len(rows))
+            cells = [row[0:7] for row in rows[0:max_search_rows]]
 
             name_col_id = self._find_column_by_name(cells, 'Name')
             pid_col_id = self._find_column_by_name(cells, 'ID')
@@ -55,23 +95,23 @@ class BoxSheetReader(SheetReaderBase):
             for i in range(1, max_search_rows):
                 if i == max_search_rows - 1:
                     search_failed = True
-                    Log.error(f'Unable to determine current mentees for mentor {worksheet.name}')
+                    Log.error(f'Unable to determine current mentees for mentor {mentor}')
                     mentees = []
                     break
 
-                elif str(cells[i][0].value).lower().find('completed mentees') >= 0:
+                elif str(cells[i][0]).lower().find('completed mentees') >= 0:
                     break # We've reach the end of the "active mentee" rows
 
-                elif cells[i][name_col_id].value and cells[i][pid_col_id].value:
-                    mentee_name = cells[i][name_col_id].value
-                    pid = int(cells[i][pid_col_id].value)
+                elif cells[i][name_col_id] and cells[i][pid_col_id]:
+                    mentee_name = cells[i][name_col_id]
+                    pid = int(cells[i][pid_col_id])
                     if not [mentee for mentee in mentees if mentee['pid'] == pid]: # ignore duplicate mentees
                         mentees.append({'name' : mentee_name, 'pid' : pid})
 
             if not search_failed:
                 print(f'found {len(mentees)}')
 
-            current_mentees.append({ 'mentor' : worksheet.name, 'mentees' : mentees})
+            current_mentees.append({ 'mentor' : mentor, 'mentees' : mentees})
 
         return current_mentees
 
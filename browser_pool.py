@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import queue
+import threading
+
+class BrowserPool:
+    ''' A fixed-size pool of browser sessions. Work is sharded across the pool, and each worker thread borrows one
+        browser for the duration of a single work item. Code that simply reads BrowserPool.current will transparently
+        use whichever browser the calling thread has borrowed.
+    '''
+    def __init__(self, drivers):
+        self._drivers = list(drivers)
+        self._available = queue.Queue()
+        self._local = threading.local()
+        for driver in self._drivers:
+            self._available.put(driver)
+
+    @property
+    def size(self):
+        return len(self._drivers)
+
+    @property
+    def drivers(self):
+        return list(self._drivers)
+
+    @property
+    def current(self):
+        ''' The browser borrowed by the calling thread, or the first browser if this thread has not borrowed one
+        '''
+        return getattr(self._local, 'driver', None) or self._drivers[0]
+
+    @contextmanager
+    def borrow(self):
+        ''' Borrow a browser for the calling thread. Nested borrows from the same thread reuse the same browser.
+        '''
+        driver = getattr(self._local, 'driver', None)
+        if driver:
+            yield driver
+            return
+
+        driver = self._available.get()
+        self._local.driver = driver
+        try:
+            yield driver
+        finally:
+            self._local.driver = None
+            self._available.put(driver)
+
+    def imap(self, fn, items, workers = None, borrow = True):
+        ''' Call fn(item) for each item, by default one worker thread per browser. Results are yielded in input order
+            as soon as they (and every result before them) are available. Exceptions are re-raised in the calling
+            thread.
+
+            With borrow = False the worker threads do not hold a browser while running fn; fn is expected to borrow()
+            one itself only when it really needs it. This allows more worker threads than browsers.
+        '''
+        items = list(items)
+        workers = workers or self.size
+
+        # Run inline if there's nothing to parallelize, or if this thread is already holding a browser (a nested
+        # imap() from within a worker would otherwise wait on browsers that will never be returned).
+        #
+        if workers == 1 or len(items) <= 1 or getattr(self._local, 'driver', None):
+            for item in items:
+                yield self._run(fn, item, borrow)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(lambda item: self._run(fn, item, borrow), items):
+                yield result
+
+    def _run(self, fn, item, borrow):
+        if not borrow:
+            return fn(item)
+        with self.borrow():
+            return fn(item)
+
+    def run_on_each(self, fn):
+        ''' Call fn() once on every browser in the pool (e.g. to log in), return the results in pool order
+        '''
+        def run(driver):
+            self._local.driver = driver
+            try:
+                return fn()
+            finally:
+                self._local.driver = None
+
+        if self.size == 1:
+            return [run(self._drivers[0])]
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(run, self._drivers))
+
+    def close(self):
+        for driver in self._drivers:
+            try:
+                driver.close()
+                driver.quit()
+            except Exception:
+                pass
@@ -0,0 +1,110 @@
+''' Fast fuzzy string matching. Edit (Levenshtein) distance is computed with the bit-parallel algorithm of Myers /
+    Hyyrö: one column of the DP table per character of the text, the whole column as bit vectors in a single Python
+    int. Distances can be bounded (early exit once the cutoff can no longer be met), and one query can be scored
+    against many candidates reusing its precomputed bit masks.
+
+    ratio() is the same similarity score as the original Utils.levenshtein_ratio():
+
+        (len(a) + len(b) - distance) / (len(a) + len(b))
+'''
+
+class _Pattern:
+    ''' A query string with its per-character match masks precomputed
+    '''
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.length = len(pattern)
+        self.peq = {}
+        for i, c in enumerate(pattern):
+            self.peq[c] = self.peq.get(c, 0) | (1 << i)
+
+    def distance(self, text, max_distance = None):
+        ''' Edit distance between the pattern and text. If max_distance is given and the distance is larger, some value
+            greater than max_distance is returned (not necessarily the exact distance).
+        '''
+        m = self.length
+        n = len(text)
+        if max_distance is not None and abs(m - n) > max_distance:
+            return max_distance + 1
+        if not m:
+            return n
+
+        full = (1 << m) - 1
+        last = 1 << (m - 1)
+        pv = full
+        mv = 0
+        score = m
+
+        for j, c in enumerate(text):
+            eq = self.peq.get(c, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | ~(xh | pv)
+            mh = pv & xh
+
+            if ph & last:
+                score += 1
+            elif mh & last:
+                score -= 1
+
+            # Each remaining character of text can lower the distance by at most one
+            #
+            if max_distance is not None and score - (n - j - 1) > max_distance:
+                return max_distance + 1
+
+            ph = (ph << 1) | 1
+            mh = mh << 1
+            pv = (mh | ~(xv | ph)) & full
+            mv = ph & xv & full
+
+        return score
+
+def edit_distance(string1, string2, max_distance = None):
+    ''' Levenshtein distance between two strings. See _Pattern.distance() for max_distance.
+    '''
+    # The shorter string as the pattern keeps the bit vectors small
+    #
+    if len(string1) > len(string2):
+        string1, string2 = string2, string1
+    return _Pattern(string1).distance(string2, max_distance)
+
+def ratio(string1, string2, cutoff = 0.0):
+    ''' Similarity of two strings, 0.0 to 1.0. Returns 0.0 if the ratio would be below cutoff.
+    '''
+    total_length = len(string1) + len(string2)
+    if not total_length:
+        return 0.0
+
+    max_distance = _max_distance(total_length, cutoff)
+    if max_distance < 0:
+        return 0.0
+
+    distance = edit_distance(string1, string2, max_distance)
+    return (total_length - distance) / total_length if distance <= max_distance else 0.0
+
+def extract(query, candidates, cutoff = 0.0, limit = None):
+    ''' Score query against every candidate. Return [(candidate, ratio)] for candidates scoring at least cutoff, best
+        first. Candidates whose length difference alone rules them out are skipped without computing a distance.
+    '''
+    pattern = _Pattern(query)
+    results = []
+    for candidate in candidates:
+        total_length = pattern.length + len(candidate)
+        if not total_length:
+            continue
+
+        max_distance = _max_distance(total_length, cutoff)
+        if abs(pattern.length - len(candidate)) > max_distance:
+            continue
+
+        distance = pattern.distance(candidate, max_distance)
+        if distance <= max_distance:
+            results.append((candidate, (total_length - distance) / total_length))
+
+    results.sort(key = lambda result: result[1], reverse = True)
+    return results[0:limit] if limit else results
+
+def _max_distance(total_length, cutoff):
+    ''' Largest distance that still scores at least cutoff: (total_length - distance) / total_length >= cutoff
+    '''
+    return int(total_length * (1.0 - cutoff) + 1e-9)
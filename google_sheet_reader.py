@@ -1,10 +1,26 @@
 from datetime import date
 import time
 import pygsheets
-from kitten_utils import Log, Utils
+from kitten_metrics import Metrics
+from kitten_utils import DateParser, Log, Utils
 from sheet_reader_base import SheetReaderBase
 
 class GoogleSheetReader(SheetReaderBase):
+    # values:batchGet takes its ranges as URL query parameters, keep each request to a reasonable size
+    #
+    _BATCH_GET_MAX_RANGES = 50
+
+    # Updates per spreadsheets.batchUpdate request. Each request counts once against the per-minute write quota.
+    #
+    _BATCH_UPDATE_MAX_REQUESTS = 200
+
+    def __init__(self):
+        super().__init__()
+        self._client = None
+        self._spreadsheet_key = None
+        self._spreadsheet = None
+        self._pending_updates = []
+
     def load_mentors_spreadsheet(self, auth):
         ''' Load the feline foster spreadsheet
         '''
@@ -12,46 +28,104 @@ class GoogleSheetReader(SheetReaderBase):
         try:
             Log.success(f'Loading mentors spreadsheet from Google Sheets (id = \'{auth["google_spreadsheet_key"]}\')...')
 
-            client = pygsheets.authorize(auth['google_client_secret'])
-            spreadsheet = client.open_by_key(auth['google_spreadsheet_key'])
+            self._client = pygsheets.authorize(auth['google_client_secret'])
+            self._spreadsheet_key = auth['google_spreadsheet_key']
 
-            config_yaml = spreadsheet.worksheet_by_title(self._CONFIG_SHEET_NAME)[2][0]
+            # If nobody has edited the spreadsheet since the last run, use the local snapshot
+            #
+            revision = self._get_revision()
+            snapshot = self._load_snapshot(self._spreadsheet_key, revision)
+            if snapshot:
+                config_yaml = snapshot['config_yaml']
+                spreadsheet_title = snapshot['workbook_name']
+            else:
+                config_yaml, spreadsheet_title = self._read_spreadsheet()
+                self._build_mentor_index()
+                self._save_snapshot(revision, spreadsheet_title, config_yaml)
 
-            for worksheet in spreadsheet.worksheets():
-                if not self._is_reserved_sheet(worksheet.title) and not worksheet.hidden:
-                    Log.debug(f'Reading worksheet \"{worksheet.title}\"...')
-                    try:
-                        if self.check_for_surgery_sheet(worksheet):
-                            continue
+        except Exception as e:
+            Log.error(f'ERROR: Unable to load mentors spreadsheet!\r\n{str(e)}, {repr(e)}')
+            return None
 
-                        # Mentor sheet header rows vary slightly between feline and canine. Perform a terrible quick-and-dirty validation.
-                        #
-                        if ['ID'] not in worksheet.get_values('E1', 'E2'):
-                            raise Exception('') from Exception
+        print('Loaded {0} mentors from \"{1}\" in {2:.0f} seconds'.format(len(self._mentor_sheets), spreadsheet_title, time.time() - start_time))
+        return config_yaml
 
-                        # Build a list of mentee names/emails/ids to be used for mentor matching
-                        #
-                        b_rows = worksheet.get_values('B2', f'B{worksheet.rows}', include_tailing_empty = False, include_tailing_empty_rows = False)
-                        c_rows = worksheet.get_values('C2', f'C{worksheet.rows}', include_tailing_empty = False, include_tailing_empty_rows = False)
-                        e_rows = worksheet.get_values('E2', f'E{worksheet.rows}', include_tailing_empty = False, include_tailing_empty_rows = False)
+    def _read_spreadsheet(self):
+        ''' Read the Config sheet and every mentor/surgery sheet. Return (config yaml, spreadsheet title).
 
-                        mentor_match_cells = b_rows + c_rows + e_rows
-                        self._mentor_match_values[Utils.utf8(worksheet.title)] = [Utils.utf8(item).lower() for sublist in mentor_match_cells for item in sublist]
-                        self._mentor_sheets.append(worksheet)
+            Everything is read with as few values:batchGet requests as possible, then validated and extracted locally.
+            Worksheet dimensions and visibility come from the spreadsheet metadata we already have, no extra requests.
+        '''
+        spreadsheet = self._open_spreadsheet()
+        worksheets = [ws for ws in spreadsheet.worksheets() if not self._is_reserved_sheet(ws.title) and not ws.hidden]
+        ranges = [self._a1_range(self._CONFIG_SHEET_NAME, 'A2')] + [self._a1_range(ws.title, f'A1:H{ws.rows}') for ws in worksheets]
+        values = self._batch_get_values(spreadsheet.id, ranges)
 
-                    except Exception:
-                        Log.debug(f'Sheet \'{worksheet.title}\' does not appear to be a mentor sheet (skipping)')
+        config_yaml = values[0][0][0]
 
-        except Exception as e:
-            Log.error(f'ERROR: Unable to load mentors spreadsheet!\r\n{str(e)}, {repr(e)}')
+        for worksheet, rows in zip(worksheets, values[1:]):
+            Log.debug(f'Reading worksheet \"{worksheet.title}\"...')
+            try:
+                if self.check_for_surgery_sheet(worksheet.title, rows):
+                    continue
+
+                # Mentor sheet header rows vary slightly between feline and canine. Perform a terrible quick-and-dirty validation.
+                #
+                if not any(len(row) > 4 and row[4] == 'ID' for row in rows[:2]):
+                    raise Exception('') from Exception
+
+                # Build a list of mentee names/emails/ids (columns B, C, E) to be used for mentor matching
+                #
+                mentor_match_cells = [row[col] for col in [1, 2, 4] for row in rows[1:] if len(row) > col and row[col]]
+                self._mentor_match_values[Utils.utf8(worksheet.title)] = [Utils.utf8(item).lower() for item in mentor_match_cells]
+                self._sheet_values[worksheet.title] = rows
+                self._mentor_sheets.append(worksheet.title)
+
+            except Exception:
+                Log.debug(f'Sheet \'{worksheet.title}\' does not appear to be a mentor sheet (skipping)')
+
+        return config_yaml, spreadsheet.title
+
+    def _get_revision(self):
+        ''' Return the Drive revision of the spreadsheet (a single metadata request), or None if it's not available
+        '''
+        try:
+            Metrics.count('drive_api_calls')
+            metadata = self._client.drive.service.files().get(fileId = self._spreadsheet_key,
+                                                              fields = 'version,modifiedTime',
+                                                              supportsAllDrives = True).execute()
+            return f'{metadata["version"]}@{metadata["modifiedTime"]}'
+
+        except Exception as err:
+            Log.warn(f'Unable to read the mentor spreadsheet revision, ignoring the local snapshot ({err})')
             return None
 
-        print('Loaded {0} mentors from \"{1}\" in {2:.0f} seconds'.format(len(self._mentor_sheets), spreadsheet.title, time.time() - start_time))
-        return config_yaml
+    def _open_spreadsheet(self):
+        if self._spreadsheet is None:
+            self._spreadsheet = self._client.open_by_key(self._spreadsheet_key)
+        return self._spreadsheet
+
+    def _worksheet(self, title):
+        return self._open_spreadsheet().worksheet_by_title(title)
 
-    def check_for_surgery_sheet(self, worksheet):
-        if any(worksheet.title in substr for substr in self._SURGERY_SHEET_NAMES):
-            surgery_rows = worksheet.get_values('A1', f'H{worksheet.rows}', include_tailing_empty = False, include_tailing_empty_rows = False)
+    def _batch_get_values(self, spreadsheet_id, ranges):
+        ''' Fetch the values of every A1 range with values:batchGet, _BATCH_GET_MAX_RANGES ranges per request. Returns
+            one list of rows per range (trailing empty cells and rows are omitted, as returned by the API).
+        '''
+        values = []
+        for i in range(0, len(ranges), self._BATCH_GET_MAX_RANGES):
+            Metrics.count('sheets_api_calls')
+            value_ranges = self._client.sheet.values_batch_get(spreadsheet_id, ranges[i:i + self._BATCH_GET_MAX_RANGES])
+            values += [value_range.get('values', []) for value_range in value_ranges]
+        Log.debug(f'Read {len(ranges)} ranges with {-(-len(ranges) // self._BATCH_GET_MAX_RANGES)} batchGet request(s)')
+        return values
+
+    @staticmethod
+    def _a1_range(sheet_title, cell_range):
+        return "'{0}'!{1}".format(sheet_title.replace("'", "''"), cell_range)
+
+    def check_for_surgery_sheet(self, sheet_title, surgery_rows):
+        if any(sheet_title in substr for substr in self._SURGERY_SHEET_NAMES):
             date_col = -1
             patient_col = -1
             for col in range(0, len(surgery_rows[0])):
@@ -73,7 +147,7 @@ class GoogleSheetReader(SheetReaderBase):
                             if a_number not in self._surgery_dates:
                                 self._surgery_dates[int(a_number)] = surgery_rows[row][date_col]
                     except Exception as e:
-                        Log.warn(f'{worksheet.title} column {patient_col}, row {row} is empty. Assuming this is the end of the list.')
+                        Log.warn(f'{sheet_title} column {patient_col}, row {row} is empty. Assuming this is the end of the list.')
                         break
             else:
                 Log.error(f'Surgery form is not in expected format (date_col={date_col}, patient_col={patient_col}. Skipping.')
@@ -87,21 +161,23 @@ class GoogleSheetReader(SheetReaderBase):
         ''' Return the current mentees assigned to each mentor
         '''
         current_mentees = []
-        for worksheet in self._mentor_sheets:
-            if worksheet.title.lower() == 'retired mentor':
+        received_date_parser = DateParser()
+        for mentor in self._mentor_sheets:
+            if mentor.lower() == 'retired mentor':
                 continue
-            print(f'Loading current mentees for {worksheet.title}... ', end='', flush=True)
+            print(f'Loading current mentees for {mentor}... ', end='', flush=True)
 
-            # It's much faster to grab a whole block of cells at once vs iterating through many API calls
+            # The mentor sheet values were read (values only) when the spreadsheet was loaded, no need to fetch again
             #
-            max_search_rows = min(100, worksheet.rows)
-            cells = worksheet.range(f'A1:G{max_search_rows}', returnas='cells')
+            cells = self._mentee_block(mentor)
+            max_search_rows = len(cells)
 
             name_col_id = self._find_column_by_name(cells, 'Name')
             pid_col_id = self._find_column_by_name(cells, 'ID')
             date_col_id = self._find_column_by_name(cells, 'Date\nKittens\nReceived')
             if date_col_id == -1:
                 date_col_id = self._find_column_by_name(cells, 'Date Dog Received')
+            received_dates = received_date_parser.parse_column([row[date_col_id] for row in cells])
 
             mentees = []
             search_failed = False
@@ -109,17 +185,17 @@ class GoogleSheetReader(SheetReaderBase):
             for i in range(1, max_search_rows):
                 if i == max_search_rows - 1:
                     search_failed = True
-                    Log.error(f'Unable to determine current mentees for mentor {worksheet.title}')
+                    Log.error(f'Unable to determine current mentees for mentor {mentor}')
                     mentees = []
                     break
 
-                elif str(cells[i][0].value).lower().find('completed mentees') >= 0:
+                elif str(cells[i][0]).lower().find('completed mentees') >= 0:
                     break # We've reached the end of the "active mentee" rows
 
-                elif cells[i][name_col_id].value and str(cells[i][pid_col_id].value).isdigit():
-                    mentee_name = cells[i][name_col_id].value
-                    pid = int(cells[i][pid_col_id].value)
-                    received_date = Utils.string_to_datetime(cells[i][date_col_id].value)
+                elif cells[i][name_col_id] and str(cells[i][pid_col_id]).isdigit():
+                    mentee_name = cells[i][name_col_id]
+                    pid = int(cells[i][pid_col_id])
+                    received_date = received_dates[i]
 
                     if received_date and (most_recent_received_date is None or received_date > most_recent_received_date):
                         most_recent_received_date = received_date
@@ -130,42 +206,126 @@ class GoogleSheetReader(SheetReaderBase):
             if not search_failed:
                 print(f'found {len(mentees)}')
 
-            current_mentees.append({ 'mentor' : worksheet.title,
+            current_mentees.append({ 'mentor' : mentor,
                                      'mentees' : mentees,
                                      'most_recent' : most_recent_received_date})
         return current_mentees
 
     def set_completed_mentees(self, mentor, mentee_ids):
-        ''' Mark the given mentees as completed.
+        ''' Mark the given mentees as completed. The spreadsheet updates are queued and sent by commit_updates().
 
             Future refactoring consideration: See similar code between set_completed_mentees() and get_current_mentees().
         '''
-        for worksheet in self._mentor_sheets:
-            if worksheet.title.lower() == mentor.lower():
-                max_search_rows = min(100, worksheet.rows)
-                cells = worksheet.range(f'A1:G{max_search_rows}', returnas='cells')
+        for title in self._mentor_sheets:
+            if title.lower() == mentor.lower():
+                cells = self._mentee_block(title)
 
                 name_col_id = self._find_column_by_name(cells, 'Name')
                 pid_col_id = self._find_column_by_name(cells, 'ID')
                 notes_col_id = 0
 
-                for i in range(1, max_search_rows):
-                    if str(cells[i][0].value).lower().find('completed mentees') >= 0:
+                completed_rows = []
+                for i in range(1, len(cells)):
+                    if str(cells[i][0]).lower().find('completed mentees') >= 0:
                         break # We've reached the end of the "active mentee" rows
 
-                    if cells[i][name_col_id].value and str(cells[i][pid_col_id].value).isdigit():
-                        pid = int(cells[i][pid_col_id].value)
-                        if pid in mentee_ids:
-                            # If this mentee name cell is already marked with strikethrough, leave it alone
-                            #
-                            name_cell_format = cells[i][name_col_id].text_format
-                            if not name_cell_format or 'strikethrough' not in name_cell_format or name_cell_format['strikethrough'] is False:
-                                mentee_name = cells[i][name_col_id].value
-                                mentee_name = mentee_name.replace('\n', ' ').replace('\r', '')
-                                Log.debug(f'Completed: {mentee_name} ({pid}) @ {mentor}[\'{cells[i][name_col_id].label}\']')
-                                debug_mode = False
-                                if not debug_mode:
-                                    cells[i][name_col_id].set_text_format('strikethrough', True)
-                                    notes_current_value = cells[i][notes_col_id].value
-                                    if 'autoupdate: no animals' not in notes_current_value.lower():
-                                        cells[i][notes_col_id].set_value(f'AutoUpdate: No animals {date.today().strftime("%b %-d, %Y")}\r\n{notes_current_value}')
+                    if cells[i][name_col_id] and str(cells[i][pid_col_id]).isdigit() and int(cells[i][pid_col_id]) in mentee_ids:
+                        completed_rows.append(i)
+
+                if not completed_rows:
+                    continue
+
+                # Cell formatting is only needed for the rows we're about to update. Fetch just those cells.
+                #
+                labels = [label for i in completed_rows for label in [self._cell_label(i, name_col_id), self._cell_label(i, notes_col_id)]]
+                fetched_cells = self._fetch_cells(title, labels)
+                sheet_id = self._worksheet(title).id
+
+                for n, i in enumerate(completed_rows):
+                    pid = int(cells[i][pid_col_id])
+                    name_cell, notes_cell = fetched_cells[2 * n], fetched_cells[2 * n + 1]
+
+                    # If this mentee name cell is already marked with strikethrough, leave it alone
+                    #
+                    name_cell_format = name_cell.text_format
+                    if not name_cell_format or 'strikethrough' not in name_cell_format or name_cell_format['strikethrough'] is False:
+                        mentee_name = name_cell.value
+                        mentee_name = mentee_name.replace('\n', ' ').replace('\r', '')
+                        Log.debug(f'Completed: {mentee_name} ({pid}) @ {mentor}[\'{name_cell.label}\']')
+
+                        self._queue_update(title, name_cell.label, f'strikethrough "{mentee_name}"', {
+                            'repeatCell' : {
+                                'range' : self._grid_range(sheet_id, i, name_col_id),
+                                'cell' : {'userEnteredFormat' : {'textFormat' : {'strikethrough' : True}}},
+                                'fields' : 'userEnteredFormat.textFormat.strikethrough'}})
+
+                        notes_current_value = notes_cell.value
+                        if 'autoupdate: no animals' not in notes_current_value.lower():
+                            notes_new_value = f'AutoUpdate: No animals {date.today().strftime("%b %-d, %Y")}\r\n{notes_current_value}'
+                            self._queue_update(title, notes_cell.label, f'notes = {repr(notes_new_value)}', {
+                                'updateCells' : {
+                                    'range' : self._grid_range(sheet_id, i, notes_col_id),
+                                    'rows' : [{'values' : [{'userEnteredValue' : {'stringValue' : notes_new_value}}]}],
+                                    'fields' : 'userEnteredValue'}})
+
+    def commit_updates(self, dry_run = False):
+        ''' Send every queued update with spreadsheets.batchUpdate, _BATCH_UPDATE_MAX_REQUESTS updates per request. Each
+            batchUpdate is applied atomically. With dry_run the planned updates are printed but not sent.
+        '''
+        updates, self._pending_updates = self._pending_updates, []
+        if not updates:
+            print('No mentor spreadsheet updates')
+            return
+
+        if dry_run:
+            for update in updates:
+                print(f'[dry run] {update["sheet"]}!{update["label"]}: {update["description"]}')
+
+        batch_count = -(-len(updates) // self._BATCH_UPDATE_MAX_REQUESTS)
+        for batch_number, i in enumerate(range(0, len(updates), self._BATCH_UPDATE_MAX_REQUESTS), start = 1):
+            batch = updates[i:i + self._BATCH_UPDATE_MAX_REQUESTS]
+            if not dry_run:
+                Metrics.count('sheets_api_calls')
+                self._client.sheet.batch_update(self._spreadsheet_key, [update['request'] for update in batch])
+
+            cells_by_sheet = {}
+            for update in batch:
+                cells_by_sheet[update['sheet']] = cells_by_sheet.get(update['sheet'], 0) + 1
+            summary = ', '.join(f'{sheet} ({count})' for sheet, count in cells_by_sheet.items())
+            print(f'{"[dry run] " if dry_run else ""}batchUpdate {batch_number}/{batch_count}: {len(batch)} cells changed: {summary}')
+
+    def _queue_update(self, sheet, label, description, request):
+        self._pending_updates.append({'sheet' : sheet, 'label' : label, 'description' : description, 'request' : request})
+
+    @staticmethod
+    def _grid_range(sheet_id, row, col):
+        return {'sheetId' : sheet_id, 'startRowIndex' : row, 'endRowIndex' : row + 1, 'startColumnIndex' : col, 'endColumnIndex' : col + 1}
+
+    def _mentee_block(self, title):
+        ''' The top-left A1:G100 block of a mentor sheet (where the current mentees are listed) from the loaded sheet
+            values, as a rectangle of cell values. Ends with an empty row, the same as fetching past the last used row.
+        '''
+        rows = self._sheet_values[title][0:99]
+        return [list(row[0:7]) + [''] * (7 - len(row[0:7])) for row in rows] + [[''] * 7]
+
+    def _fetch_cells(self, title, labels):
+        ''' Fetch the given cells of a worksheet, including their formatting, with a single request. Return a
+            pygsheets.Cell (not linked, changing it doesn't update the spreadsheet) for each label.
+        '''
+        Metrics.count('sheets_api_calls')
+        response = self._client.sheet.get(self._spreadsheet_key,
+                                          fields = 'sheets/data/rowData/values',
+                                          includeGridData = True,
+                                          ranges = [self._a1_range(title, label) for label in labels])
+
+        grid_data = response['sheets'][0]['data'] if response.get('sheets') else []
+        cells = []
+        for n, label in enumerate(labels):
+            row_data = grid_data[n].get('rowData', []) if n < len(grid_data) else []
+            cell_data = row_data[0].get('values', [{}])[0] if row_data else {}
+            cells.append(pygsheets.Cell(label, cell_data = cell_data))
+        return cells
+
+    @staticmethod
+    def _cell_label(row, col):
+        return f'{chr(ord("A") + col)}{row + 1}'
@@ -0,0 +1,161 @@
+import re
+from urllib.parse import urlsplit
+from lxml import etree
+import lxml.html
+import requests
+from requests.adapters import HTTPAdapter
+
+class HtmlPage:
+    ''' A parsed HTML page. Elements are located with the same ids and XPaths used with the browser, and values are
+        read the way chromedriver would report them (input values, selected options, innerText, etc.)
+    '''
+    _BLOCK_TAGS = {'address', 'article', 'aside', 'blockquote', 'caption', 'dd', 'div', 'dl', 'dt', 'fieldset',
+                   'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+                   'main', 'nav', 'ol', 'option', 'p', 'pre', 'section', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead',
+                   'tr', 'ul'}
+    _HIDDEN_TAGS = {'head', 'noscript', 'script', 'style', 'template'}
+
+    def __init__(self, html, url = ''):
+        self.url = url
+        self.html = html
+        self._root = lxml.html.fromstring(html if html and html.strip() else '<html></html>')
+
+    def has_id(self, element_id):
+        return self._by_id(element_id) is not None
+
+    def text_by_id(self, element_id):
+        element = self._by_id(element_id)
+        return self.inner_text(element) if element is not None else ''
+
+    def attr_by_id(self, element_id, attr = 'value'):
+        return self._attr(self._by_id(element_id), attr)
+
+    def attr_by_xpath(self, attr, element_xpath):
+        return self._attr(self._by_xpath(element_xpath), attr)
+
+    def selection_by_id(self, element_id):
+        ''' Text of the selected <option>, or the first <option> if none are explicitly selected (same as a browser)
+        '''
+        element = self._by_id(element_id)
+        if element is None:
+            return ''
+        options = element.xpath('.//option[@selected]') or element.xpath('.//option')
+        return self.inner_text(options[0]) if options else ''
+
+    def read_fields(self, field_map):
+        ''' Read every field in a declarative field map (see page_fields.py), return {field name : value}
+        '''
+        result = {}
+        for name, (locator, path, read_as) in field_map.items():
+            if read_as == 'selection':
+                result[name] = self.selection_by_id(path) if locator == 'id' else ''
+            else:
+                element = self._by_id(path) if locator == 'id' else self._by_xpath(path)
+                result[name] = self.inner_text(element) if read_as == 'text' and element is not None else self._attr(element, read_as)
+        return result
+
+    def hrefs(self):
+        return [element.get('href') for element in self._root.iter('a') if element.get('href')]
+
+    def find_by_id(self, element_id):
+        return self._by_id(element_id)
+
+    def find_by_xpath(self, element_xpath):
+        return self._by_xpath(element_xpath)
+
+    @staticmethod
+    def inner_text(element):
+        ''' Approximate the browser's innerText: block elements and <br> start new lines, whitespace is collapsed
+        '''
+        parts = []
+
+        def walk(el):
+            tag = el.tag if isinstance(el.tag, str) else ''
+            if tag not in HtmlPage._HIDDEN_TAGS:
+                if tag == 'br' or tag in HtmlPage._BLOCK_TAGS:
+                    parts.append('\n')
+                if tag and el.text:
+                    parts.append(el.text)
+                for child in el:
+                    walk(child)
+                if tag in HtmlPage._BLOCK_TAGS:
+                    parts.append('\n')
+            if el is not element and el.tail:
+                parts.append(el.tail)
+
+        walk(element)
+        lines = (' '.join(line.split()) for line in ''.join(parts).split('\n'))
+        return '\n'.join(line for line in lines if line)
+
+    def _by_id(self, element_id):
+        return self._root.get_element_by_id(element_id, None)
+
+    def _by_xpath(self, element_xpath):
+        try:
+            results = self._root.xpath(element_xpath)
+
+            # Browsers insert <tbody> into tables, the raw HTML often doesn't have it
+            #
+            if not results and '/tbody' in element_xpath:
+                results = self._root.xpath(element_xpath.replace('/tbody', ''))
+        except etree.XPathError:
+            return None
+        return results[0] if results else None
+
+    def _attr(self, element, attr):
+        if element is None:
+            return ''
+        if attr in ['innerText', 'textContent']:
+            return self.inner_text(element)
+        if attr == 'value' and element.tag == 'textarea':
+            return element.text or ''
+        return element.get(attr) or ''
+
+class PageLoadError(requests.RequestException):
+    ''' The server answered with its login page (the session expired) or an error page instead of the requested page
+    '''
+
+class HttpPageFetcher:
+    ''' Download pages with a plain HTTP client that shares the browser's login session. The connection pool is sized
+        for the number of threads that will be fetching concurrently.
+
+        The server answers an expired session with its login page, and some failures with an error page, both with
+        HTTP status 200. These raise PageLoadError rather than being returned as the requested page.
+    '''
+    LOGIN_FIELD_ID = 'txt_username'
+    ERROR_PAGE_MARKERS = ['Server Error in \'/\' Application', 'An unhandled exception occurred']
+
+    def __init__(self, cookies, user_agent, pool_size = 1, timeout = 30, login_url = None):
+        self._timeout = timeout
+        self._login_path = urlsplit(login_url).path if login_url else None
+        self._session = requests.Session()
+        self._session.headers.update({'User-Agent' : user_agent})
+        adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        for cookie in cookies:
+            self._session.cookies.set(cookie['name'], cookie['value'], domain = cookie.get('domain'), path = cookie.get('path', '/'))
+
+    def fetch(self, url):
+        ''' Download url, return an HtmlPage. Raises requests.RequestException on HTTP errors, PageLoadError if we got
+            the login page or an error page.
+        '''
+        response = self._session.get(url, timeout = self._timeout)
+        response.raise_for_status()
+
+        page = HtmlPage(response.text, response.url)
+        self.check_page(page, url)
+        return page
+
+    def check_page(self, page, url):
+        ''' Raise PageLoadError if page (loaded for url) is the login page or an error page
+        '''
+        path = urlsplit(page.url).path
+        if page.has_id(self.LOGIN_FIELD_ID) or (self._login_path and path == self._login_path):
+            raise PageLoadError(f'Got the login page (session expired?) instead of {url}')
+        if re.search(r'(?i)/error[^/]*$', path) or any(marker in page.html for marker in self.ERROR_PAGE_MARKERS):
+            raise PageLoadError(f'Got an error page instead of {url}')
+
+    def close(self):
+        self._session.close()
@@ -0,0 +1,175 @@
+from contextlib import contextmanager
+import functools
+import json
+import os
+import re
+import threading
+import time
+from kitten_utils import Utils
+
+class Metrics():
+    ''' Run-wide counters and timings shared by all modules and worker threads. Counter and timing names are dotted,
+        e.g. 'pages.animal' or 'page_load.animal', and can be read back by prefix.
+    '''
+    _lock = threading.Lock()
+    _counters = {}
+    _timings = {}
+
+    @staticmethod
+    def count(name, n = 1):
+        with Metrics._lock:
+            Metrics._counters[name] = Metrics._counters.get(name, 0) + n
+
+    @staticmethod
+    def get(name):
+        with Metrics._lock:
+            return Metrics._counters.get(name, 0)
+
+    @staticmethod
+    def counters(prefix = ''):
+        ''' Return a copy of all counters whose names start with prefix, with the prefix removed
+        '''
+        with Metrics._lock:
+            return {name[len(prefix):] : value for name, value in Metrics._counters.items() if name.startswith(prefix)}
+
+    @staticmethod
+    def record(name, seconds):
+        ''' Add one timed event (count, total and max seconds are kept per name)
+        '''
+        with Metrics._lock:
+            timing = Metrics._timings.setdefault(name, {'count' : 0, 'total' : 0.0, 'max' : 0.0})
+            timing['count'] += 1
+            timing['total'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+
+    @staticmethod
+    @contextmanager
+    def timer(name):
+        ''' Time the enclosed block with record(name, ...), whether or not it raises
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            Metrics.record(name, time.perf_counter() - start)
+
+    @staticmethod
+    def timings(prefix = ''):
+        ''' Return a copy of all timings whose names start with prefix, with the prefix removed
+        '''
+        with Metrics._lock:
+            return {name[len(prefix):] : dict(timing) for name, timing in Metrics._timings.items() if name.startswith(prefix)}
+
+    @staticmethod
+    def reset():
+        with Metrics._lock:
+            Metrics._counters = {}
+            Metrics._timings = {}
+
+    @staticmethod
+    def summary():
+        ''' Everything recorded so far, grouped for export:
+
+                phases      : wall time of each run phase (seconds)
+                lookups     : per-item lookup timings (animal, person, history), overlapping when run in parallel
+                page_loads  : page load timings per page type (one page type per URL template)
+                pages       : pages loaded per page type
+                driver_calls: chromedriver calls per page type
+                api_calls   : Google Sheets / Drive / Box API calls
+                counters    : every other counter (memo hits/misses, etc.)
+        '''
+        with Metrics._lock:
+            counters = dict(Metrics._counters)
+            timings = {name : dict(timing) for name, timing in Metrics._timings.items()}
+
+        grouped = lambda values, prefix: {name[len(prefix):] : value for name, value in values.items() if name.startswith(prefix)}
+        api_calls = {name[:-len('_api_calls')] : value for name, value in counters.items() if name.endswith('_api_calls')}
+        return {
+            'phases'       : {name : timing['total'] for name, timing in grouped(timings, 'phase.').items()},
+            'lookups'      : grouped(timings, 'lookup.'),
+            'page_loads'   : grouped(timings, 'page_load.'),
+            'pages'        : grouped(counters, 'pages.'),
+            'driver_calls' : grouped(counters, 'driver_calls.'),
+            'api_calls'    : api_calls,
+            'counters'     : {name : value for name, value in counters.items()
+                              if not name.startswith(('pages.', 'driver_calls.')) and not name.endswith('_api_calls')}
+        }
+
+    @staticmethod
+    def write_json(path, **extra):
+        ''' Write summary() (plus any extra top-level values) as JSON
+        '''
+        Metrics._write_atomic(path, json.dumps({**extra, **Metrics.summary()}, indent = 2, sort_keys = True))
+
+    @staticmethod
+    def write_prometheus(path, namespace = 'kitten_scraper', labels = None, gauges = None):
+        ''' Write summary() in the Prometheus text exposition format, e.g. for the node-exporter textfile collector.
+            gauges ({name : (help, value)}) are written as {namespace}_{name}, and labels are added to every sample.
+            The file is replaced atomically so the collector never reads a partial file.
+        '''
+        summary = Metrics.summary()
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            if not samples:
+                return
+            lines.append(f'# HELP {namespace}_{name} {help_text}')
+            lines.append(f'# TYPE {namespace}_{name} {metric_type}')
+            for sample_labels, value, suffix in samples:
+                all_labels = {**(labels or {}), **sample_labels}
+                label_str = ','.join(f'{key}="{Metrics._escape_label(value)}"' for key, value in sorted(all_labels.items()))
+                lines.append(f'{namespace}_{name}{suffix}{{{label_str}}} {value}' if label_str else f'{namespace}_{name}{suffix} {value}')
+
+        for name, (help_text, value) in sorted((gauges or {}).items()):
+            metric(Metrics._metric_name(name), 'gauge', help_text, [({}, value, '')])
+
+        metric('phase_seconds', 'gauge', 'Wall time of each run phase',
+               [({'phase' : phase}, seconds, '') for phase, seconds in sorted(summary['phases'].items())])
+
+        for name, group, label, help_text in [('page_load_seconds', 'page_loads', 'page', 'Page load time per page type (URL template)'),
+                                              ('lookup_seconds', 'lookups', 'lookup', 'Time per animal/person/history lookup')]:
+            samples = []
+            for key, timing in sorted(summary[group].items()):
+                samples.append(({label : key}, timing['total'], '_sum'))
+                samples.append(({label : key}, timing['count'], '_count'))
+            metric(name, 'summary', help_text, samples)
+            metric(f'{name}_max', 'gauge', f'{help_text} (slowest)',
+                   [({label : key}, timing['max'], '') for key, timing in sorted(summary[group].items())])
+
+        # Counts are per run (each run rewrites the file), so they're exported as gauges
+        #
+        metric('pages', 'gauge', 'Pages loaded per page type',
+               [({'page' : page}, count, '') for page, count in sorted(summary['pages'].items())])
+        metric('driver_calls', 'gauge', 'Chromedriver calls per page type',
+               [({'page' : page}, count, '') for page, count in sorted(summary['driver_calls'].items())])
+        metric('api_calls', 'gauge', 'Google Sheets / Drive / Box API calls',
+               [({'api' : api}, count, '') for api, count in sorted(summary['api_calls'].items())])
+
+        Metrics._write_atomic(path, '\n'.join(lines) + '\n')
+
+    @staticmethod
+    def _metric_name(name):
+        return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+    @staticmethod
+    def _escape_label(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    @staticmethod
+    def _write_atomic(path, text):
+        Utils.make_dir(path)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+def timed(name):
+    ''' Function/method decorator, records the duration of every call as Metrics timing name
+    '''
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Metrics.timer(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,63 +1,156 @@
+from collections import namedtuple
+import csv
 from datetime import datetime
+import os
+import openpyxl
 import xlrd
 from kitten_utils import Log
 
+ReportRow = namedtuple('ReportRow', ['animal_number',       # int
+                                     'status_date',         # str, ISO 8601 if the report has a date
+                                     'animal_type',         # str
+                                     'name',                # str
+                                     'age',                 # str
+                                     'foster_parent_id'])   # int, or None if the animal has no foster parent
+
 class KittenReportReader:
     ''' KittenReportReader will load animal numbers from the incoming daily foster report. All other data will be
         queried during runtime since other data in the report may already be outdated (or even initially incorrect).
+
+        The report may be a legacy xls, an xlsx, or a CSV export. Only the report columns we use are read: xls
+        columns are read one whole column at a time, xlsx and CSV rows are streamed.
     '''
+    REPORT_COLUMNS = ['Datetime of Current Status Date', 'Current Animal Type', 'AnimalID', 'Animal Name', 'Age', 'Foster Parent ID']
+
     def __init__(self):
         self._workbook = None
         self._sheet = None
+        self.status_dates = {}
+        self.rows = {}
 
     def read_animal_numbers_from_xls(self, xls_filename):
-        ''' Open the daily report xls, read animal numbers
+        ''' Open the daily report (xls, xlsx or csv), read animal numbers. The current status date of each animal is
+            kept in self.status_dates (used to detect animals that changed since a previous report) and every report
+            row in self.rows, both keyed by animal number.
+        '''
+        rows = self.read_report(xls_filename)
+        return {row.animal_number for row in rows} if rows is not None else None
+
+    def read_report(self, report_filename):
+        ''' Open the daily report, return a list of ReportRow (None if the report can't be read)
         '''
+        readers = {'.xls' : self._read_xls_columns, '.xlsx' : self._read_xlsx_rows, '.csv' : self._read_csv_rows}
+        reader = readers.get(os.path.splitext(report_filename)[1].lower(), self._read_xls_columns)
+
+        try:
+            rows = reader(report_filename)
+            if rows is None:
+                return None
+
+            Log.success(f'Loaded report {report_filename}')
+            for row in rows:
+                self.rows[row.animal_number] = row
+                self.status_dates[row.animal_number] = row.status_date
+            return rows
+
+        except IOError as err:
+            Log.error(f'ERROR: Unable to read report file: {report_filename}, {err}')
+
+        except (xlrd.XLRDError, csv.Error, ValueError, KeyError) as err:
+            Log.error(f'ERROR: Unable to read report file: {report_filename}, {err}')
+
+        return None
+
+    def _read_xls_columns(self, xls_filename):
+        self._workbook = xlrd.open_workbook(xls_filename, on_demand = True)
         try:
-            self._workbook = xlrd.open_workbook(xls_filename)
             self._sheet = self._workbook.sheet_by_index(0)
 
             if not self._sheet.nrows:
                 Log.error(f'ERROR: I\'m afraid you have an empty report: {xls_filename}')
                 return None
 
-            # Perform some initial sanity checks
+            if not self._check_header(self._sheet.row_values(0, 0, len(self.REPORT_COLUMNS)), xls_filename):
+                return None
+
+            # Read just the columns we need, a whole column at a time
             #
-            STATUS_DATE_COL = 0
-            ANIMAL_TYPE_COL = 1
-            ANIMAL_ID_COL = 2
-            ANIMAL_NAME_COL = 3
-            ANIMAL_AGE_COL = 4
-            FOSTER_PARENT_ID_COL = 5
-
-            if (self._sheet.row_values(0)[STATUS_DATE_COL] != 'Datetime of Current Status Date' or
-                self._sheet.row_values(0)[ANIMAL_TYPE_COL] != 'Current Animal Type' or
-                self._sheet.row_values(0)[ANIMAL_ID_COL] != 'AnimalID' or
-                self._sheet.row_values(0)[ANIMAL_NAME_COL] != 'Animal Name' or
-                self._sheet.row_values(0)[ANIMAL_AGE_COL] != 'Age' or
-                self._sheet.row_values(0)[FOSTER_PARENT_ID_COL] != 'Foster Parent ID'):
-
-                Log.error(f'ERROR: Unexpected column layout in the report. Something has changed! {xls_filename}')
+            columns = [self._sheet.col_values(col, start_rowx = 1) for col in range(0, len(self.REPORT_COLUMNS))]
+            status_date_types = self._sheet.col_types(0, start_rowx = 1)
+            columns[0] = [self._xlsfloat_as_datetime(value, self._workbook.datemode) if cell_type == xlrd.XL_CELL_DATE else value
+                          for value, cell_type in zip(columns[0], status_date_types)]
+
+            return self._report_rows(zip(*columns))
+
+        finally:
+            self._workbook.release_resources()
+
+    def _read_xlsx_rows(self, xlsx_filename):
+        workbook = openpyxl.load_workbook(xlsx_filename, read_only = True, data_only = True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(max_col = len(self.REPORT_COLUMNS), values_only = True)
+            header = next(rows, None)
+            if header is None:
+                Log.error(f'ERROR: I\'m afraid you have an empty report: {xlsx_filename}')
                 return None
 
-            Log.success(f'Loaded report {xls_filename}')
+            if not self._check_header(header, xlsx_filename):
+                return None
 
-            animal_numbers = set()
-            for row_number in range(1, self._sheet.nrows):
-                animal_number = self._sheet.row_values(row_number)[ANIMAL_ID_COL]
-                # xls stores all numbers as float, but also handle str type just in case
-                #
-                if isinstance(animal_number, float) or (isinstance(animal_number, str) and animal_number.isdigit()):
-                    animal_numbers.add((int(animal_number)))
+            return self._report_rows(rows)
 
-            return animal_numbers
+        finally:
+            workbook.close()
 
-        except IOError as err:
-            Log.error(f'ERROR: Unable to read xls file: {xls_filename}, {err}')
+    def _read_csv_rows(self, csv_filename):
+        with open(csv_filename, 'r', newline = '', encoding = 'utf-8-sig') as csv_file:
+            rows = csv.reader(csv_file)
+            header = next(rows, None)
+            if header is None:
+                Log.error(f'ERROR: I\'m afraid you have an empty report: {csv_filename}')
+                return None
 
-        except xlrd.XLRDError as err:
-            Log.error(f'ERROR: Unable to read xls file: {xls_filename}, {err}')
+            if not self._check_header(header, csv_filename):
+                return None
+
+            return self._report_rows(rows)
 
+    def _check_header(self, header, report_filename):
+        ''' Perform some initial sanity checks on the report header row
+        '''
+        if [str(value).strip() if value is not None else '' for value in header[0:len(self.REPORT_COLUMNS)]] != self.REPORT_COLUMNS:
+            Log.error(f'ERROR: Unexpected column layout in the report. Something has changed! {report_filename}')
+            return False
+        return True
+
+    def _report_rows(self, rows):
+        ''' Convert raw report rows (status date, animal type, animal id, name, age, foster parent id) to ReportRows,
+            skipping rows without a valid animal number
+        '''
+        report_rows = []
+        for status_date, animal_type, animal_number, name, age, foster_parent_id in ((tuple(row) + ('',) * 6)[0:6] for row in rows):
+            animal_number = self._as_int(animal_number)
+            if animal_number is None:
+                continue
+
+            report_rows.append(ReportRow(animal_number,
+                                         status_date.isoformat() if isinstance(status_date, datetime) else str(status_date or '').strip(),
+                                         str(animal_type or '').strip(),
+                                         str(name or '').strip(),
+                                         str(age or '').strip(),
+                                         self._as_int(foster_parent_id)))
+        return report_rows
+
+    @staticmethod
+    def _as_int(value):
+        ''' xls stores all numbers as float, csv stores everything as str. Return None if value isn't a whole number.
+        '''
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().isdigit():
+            return int(value.strip())
         return None
 
     @staticmethod
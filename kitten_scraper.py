@@ -1,10 +1,15 @@
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
 from datetime import date, datetime
+import functools
 import os
 import re
 import math
 import sys
+import threading
 import time
+import zipfile
 import yaml
 from selenium import webdriver
 from selenium.common.exceptions import TimeoutException
@@ -16,53 +21,147 @@ from selenium.webdriver.support.ui import Select
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from __init__ import __version__
+from archive_sheet_reader import ArchiveSheetReader
+from browser_pool import BrowserPool
 from box_sheet_reader import BoxSheetReader
 from google_sheet_reader import GoogleSheetReader
+from http_page_fetcher import HtmlPage, HttpPageFetcher, PageLoadError
+from kitten_metrics import Metrics, timed
 from kitten_report_reader import KittenReportReader
-from kitten_utils import Log, Utils
+from kitten_utils import DateParser, Log, Utils
+import listing_parser
+from lookup_cache import LookupCache
+from lookup_stage import LookupStage
+from page_archive import ArchivePageFetcher, PageArchive
+from run_journal import RunJournal, journaled
+from run_memo import RunMemo, memoized
+from run_state import RunState
+import page_fields
+
+class LookupFailure:
+    ''' Result of a lookup that raised, see KittenScraper._lookup_with_retries()
+    '''
+    def __init__(self, error):
+        self.error = error
 
 class KittenScraper:
-    def __init__(self):
-        self.mentor_sheet_reader = None
+    USER_AGENT = ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_14_3) AppleWebKit/605.1.15 '
+                  '(KHTML, like Gecko) Version/12.0.3 Safari/605.1.15')
+    LOOKUP_RETRIES = 2 # failed lookups are retried this many times before they are skipped
+
+    def __init__(self, mentor_sheet_reader = None):
+        ''' mentor_sheet_reader: optional SheetReaderBase to use instead of the Google/Box reader from config.yaml
+            (used by the benchmarks to run against a local stand-in spreadsheet)
+        '''
+        self.mentor_sheet_reader = mentor_sheet_reader
         self._additional_config_yaml = None
+        self._browser_pool = None
+        self._http_fetcher = None
+        self._prefetch_executor = None
+        self._workers = 1
+        self._person_workers = 1
+        self._use_field_maps = True
+        self._cache = None
+        self._archive = None
+        self._url_templates = {}
+        self._journal = None
+        self._failed_lookups = {}
+        self._memo = RunMemo()
+        self._thread_local = threading.local()
+        self._dob_parser = DateParser(['%m/%d/%Y'])
+        self._status_date_parser = DateParser(['%m/%d/%Y'])
+
+    @property
+    def _driver(self):
+        ''' The browser assigned to the calling thread (see BrowserPool)
+        '''
+        return self._browser_pool.current
 
-    def run(self):
+    @property
+    def _current_page(self):
+        ''' The HtmlPage most recently loaded by the calling thread, or None if the browser holds the current page
+        '''
+        return getattr(self._thread_local, 'page', None)
+
+    def run(self, argv = None):
         print(f'Welcome to KittenScraper {__version__}')
         start_time = time.time()
 
         arg_parser = ArgumentParser()
         arg_parser.add_argument('-i', '--input', help = 'specify the daily foster report (xls), or optionally a comma-separated list of animal numbers', required = False)
-        arg_parser.add_argument('-s', '--status', help = 'retrieve current mentee status [verbose,autoupdate,export]', required = False, nargs='?', default='', const='yes')
+        arg_parser.add_argument('-s', '--status', help = 'retrieve current mentee status [verbose,autoupdate,dryrun,export]', required = False, nargs='?', default='', const='yes')
         arg_parser.add_argument('-c', '--config', help = 'specify a config file (optional, defaults to \'config.yaml\')', required = False, default='config.yaml')
         arg_parser.add_argument('-b', '--show_browser', help = 'show the web browser window (generally used for debugging)', required = False, action = 'store_true')
-        args = arg_parser.parse_args()
+        arg_parser.add_argument('-w', '--workers', help = 'number of browser sessions used to look up animals in parallel (optional, defaults to 1)', required = False, type = int, default = 1)
+        arg_parser.add_argument('-p', '--person_workers', help = 'number of workers that look up foster parents while animals are still being looked up (optional, defaults to 1)', required = False, type = int, default = 1)
+        arg_parser.add_argument('--substring_match', help = 'match foster parents to mentors with the legacy "appears anywhere in the mentor sheet" substring semantics', required = False, action = 'store_true')
+        arg_parser.add_argument('--fuzzy_match', help = 'also match foster parent names to mentee names approximately, e.g. "Jon Smith" and "John Smith" (optional similarity cutoff, defaults to 0.9)', required = False, nargs = '?', type = float, default = None, const = 0.9, metavar = 'CUTOFF')
+        arg_parser.add_argument('--legacy_reads', help = 'read page fields one chromedriver call at a time instead of one call per page (generally used for debugging)', required = False, action = 'store_true')
+        arg_parser.add_argument('--refresh', help = 'ignore cached animal/person lookups from previous runs (the cache is still updated)', required = False, action = 'store_true')
+        arg_parser.add_argument('--max-age', help = 'maximum age (in hours) of cached animal/person lookups, caps every per-field TTL', required = False, type = float, default = None, dest = 'max_age')
+        arg_parser.add_argument('--trust_report', help = 'start foster parent lookups from the report\'s Foster Parent ID column, animal pages only verify them. Skips pages the report doesn\'t need', required = False, action = 'store_true')
+        arg_parser.add_argument('--incremental', help = 'only look up animals that are new or changed since the previous daily report, reuse everything else', required = False, action = 'store_true')
+        arg_parser.add_argument('-e', '--engine', help = 'page fetch engine: \'browser\' renders every page in Chrome, \'http\' downloads pages directly and only falls back to Chrome when required (optional, defaults to \'browser\')', required = False, choices = ['browser', 'http'], default = 'browser')
+        arg_parser.add_argument('--record', help = 'save every fetched page (and the mentor spreadsheet) to a compressed page archive for --replay (optional archive path, defaults to ~/.kitten-scraper/archives)', required = False, nargs = '?', default = None, const = '', metavar = 'ARCHIVE')
+        arg_parser.add_argument('--replay', help = 'run from a page archive saved with --record instead of the shelter website and mentor spreadsheet. No browser, no network', required = False, default = None, metavar = 'ARCHIVE')
+        arg_parser.add_argument('--resume', help = 'resume an interrupted (or partially failed) run with the same arguments from today, lookups it completed are not repeated', required = False, action = 'store_true')
+        args = arg_parser.parse_args(argv)
 
         if not args.input and not args.status:
             arg_parser.print_help()
             sys.exit(0)
 
+        if args.record is not None and args.replay:
+            Log.error('ERROR: --record and --replay can\'t be used together')
+            sys.exit()
+
+        # Replay: the mentor spreadsheet and every page come from the page archive
+        #
+        if args.replay:
+            try:
+                self._archive = PageArchive(args.replay)
+            except (OSError, KeyError, ValueError, zipfile.BadZipFile) as err:
+                Log.error(f'ERROR: Unable to read page archive: {args.replay}, {err}')
+                sys.exit()
+            self.mentor_sheet_reader = ArchiveSheetReader(self._archive)
+            Log.success(f'Replaying {self._archive.page_count} pages from {args.replay}')
+
         # Load config.yaml
         #
-        if not self._load_config_file(args.config):
-            sys.exit()
+        with Metrics.timer('phase.config_load'):
+            if not self._load_config_file(args.config):
+                sys.exit()
+
+        if args.record is not None:
+            archive_path = args.record or os.path.join(Utils.app_data_dir(), 'archives', f'{self.BASE_ANIMAL_TYPE}_pages_{datetime.now().strftime("%Y.%m.%d_%H%M%S")}.zip')
+            self._archive = PageArchive(archive_path, record = True)
+            Log.success(f'Recording pages to {archive_path}')
 
         # Load the Foster Mentors spreadsheet
         #
-        if self._google_spreadsheet_key and self._google_client_secret:
-            self.mentor_sheet_reader = GoogleSheetReader()
-            self._additional_config_yaml = self.mentor_sheet_reader.load_mentors_spreadsheet({
-                'google_spreadsheet_key' : self._google_spreadsheet_key,
-                'google_client_secret' : self._google_client_secret})
-
-        elif self._box_user_id and self._box_file_id and self._box_jwt:
-            self.mentor_sheet_reader = BoxSheetReader()
-            self._additional_config_yaml = self.mentor_sheet_reader.load_mentors_spreadsheet({
-                'box_user_id' : self._box_user_id,
-                'box_file_id' : self._box_file_id,
-                'box_jwt' : self._box_jwt})
-        else:
-            Log.error('ERROR: Incorrect mentor spreadsheet configuration, please check config.yaml')
-            sys.exit()
+        with Metrics.timer('phase.sheet_load'):
+            if self.mentor_sheet_reader:
+                self._additional_config_yaml = self.mentor_sheet_reader.load_mentors_spreadsheet(self.config)
+
+            elif self._google_spreadsheet_key and self._google_client_secret:
+                self.mentor_sheet_reader = GoogleSheetReader()
+                self._additional_config_yaml = self.mentor_sheet_reader.load_mentors_spreadsheet({
+                    'google_spreadsheet_key' : self._google_spreadsheet_key,
+                    'google_client_secret' : self._google_client_secret})
+
+            elif self._box_user_id and self._box_file_id and self._box_jwt:
+                self.mentor_sheet_reader = BoxSheetReader()
+                self._additional_config_yaml = self.mentor_sheet_reader.load_mentors_spreadsheet({
+                    'box_user_id' : self._box_user_id,
+                    'box_file_id' : self._box_file_id,
+                    'box_jwt' : self._box_jwt})
+            else:
+                Log.error('ERROR: Incorrect mentor spreadsheet configuration, please check config.yaml')
+                sys.exit()
+
+        if self.mentor_sheet_reader:
+            self.mentor_sheet_reader.substring_match = args.substring_match
+            self.mentor_sheet_reader.fuzzy_cutoff = args.fuzzy_match
 
         if self._additional_config_yaml is None:
             Log.error('ERROR: configuration YAML from mentors spreadsheet not found, cannot continue')
@@ -74,13 +173,67 @@ class KittenScraper:
         if not self._read_additional_config_yaml(self._additional_config_yaml):
             sys.exit()
 
+        if self._archive and self._archive.recording:
+            self._archive.put_state('mentor_spreadsheet', {'config_yaml' : self._additional_config_yaml, **self.mentor_sheet_reader.workbook_state()})
+
+        # Open the persistent lookup cache. A recording needs every page, so cached lookups are not used (the cache is
+        # still updated). A replay only uses the archive.
+        #
+        if not args.replay:
+            self._cache = LookupCache(os.path.join(Utils.app_data_dir(), f'{self.BASE_ANIMAL_TYPE}_lookup_cache.sqlite'),
+                                      ttl_hours = self.config['cache_ttl_hours'] if 'cache_ttl_hours' in self.config else None,
+                                      max_age_hours = args.max_age,
+                                      refresh = args.refresh or args.record is not None)
+
+        # Journal every completed lookup so an interrupted run can be resumed. Not needed when replaying.
+        #
+        if not args.replay:
+            self._journal = RunJournal(os.path.join(Utils.app_data_dir(), f'{self.BASE_ANIMAL_TYPE}_journal.jsonl'))
+            resumed = self._journal.start({'input' : args.input,
+                                           'status' : args.status,
+                                           'trust_report' : args.trust_report,
+                                           'date' : date.today().isoformat()}, resume = args.resume)
+            if resumed:
+                Log.success(f'Resuming the previous run, reusing {resumed} completed lookups')
+
         # Start the browser, log in
         #
-        self._start_browser(args.show_browser)
-        if not self._login():
-            sys.exit()
+        # With the http engine a single browser is enough: it's used to log in and as a fallback for pages that
+        # require JavaScript. Worker threads share one pooled HTTP session. With the browser engine, each animal
+        # worker and each person worker gets its own browser.
+        #
+        self._workers = max(1, args.workers)
+        self._person_workers = max(1, args.person_workers)
+        self._use_field_maps = not args.legacy_reads
+        browsers = self._workers + (self._person_workers if args.input else 0)
+        if args.replay:
+            # Replay pages like the http engine would fetch them, there's no browser to fall back to
+            #
+            self._browser_pool = BrowserPool([])
+            self._http_fetcher = ArchivePageFetcher(self._archive, self._url_templates)
+        else:
+            with Metrics.timer('phase.browser_start'):
+                self._start_browser(args.show_browser, browsers if args.engine == 'browser' else 1)
+
+            with Metrics.timer('phase.login'):
+                if not all(self._browser_pool.run_on_each(self._login)):
+                    self._exit_browser()
+                    sys.exit()
+
+                if args.engine == 'http':
+                    # Every animal and person worker fetches, plus the listing prefetch threads they share
+                    #
+                    self._http_fetcher = HttpPageFetcher(self._driver.get_cookies(), self.USER_AGENT,
+                                                         pool_size = browsers + self._workers,
+                                                         login_url = self._login_url)
+
+        if self._http_fetcher and self._workers > 1:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers = self._workers, thread_name_prefix = 'prefetch')
 
-        current_mentee_status = self._get_current_mentee_status(args.status) if args.status else None
+        current_mentee_status = None
+        if args.status:
+            with Metrics.timer('phase.status'):
+                current_mentee_status = self._get_current_mentee_status(args.status)
 
         if current_mentee_status:
             status_file = None
@@ -103,7 +256,7 @@ class KittenScraper:
                             surgery_info = ''
                             if surgery_date:
                                 surgery_info = f', Surgery Date {surgery_date}'
-                            if verbose_status:
+                            if verbose_status and data:
                                 self._print_and_write(status_file, f'        {a_number}, {data["age"]}, S/N {data["sn"]}, Bio {data["bio"]}, Photo {data["photo"]}{surgery_info}')
                             else:
                                 self._print_and_write(status_file, f'        {a_number}{surgery_info}')
@@ -113,13 +266,18 @@ class KittenScraper:
                 self._print_and_write(status_file, '')
 
         if args.input:
-            # Load animal numbers. Note that args.input will either be a path to the "daily report" xls, or may
+            # Load animal numbers. Note that args.input will either be a path to the "daily report" (xls, xlsx or csv), or may
             # optionally be a comma-separated list of animal numbers.
             #
+            report_status_dates = {}
+            report_rows = {}
             if re.fullmatch(r'(\s?\d+\s?)(\s?,\s?\d+\s?)*$', args.input):
-                animal_numbers = [s.strip() for s in args.input.split(',')]
+                animal_numbers = [int(s) for s in args.input.split(',')]
             else:
-                animal_numbers = KittenReportReader().read_animal_numbers_from_xls(args.input)
+                report_reader = KittenReportReader()
+                animal_numbers = report_reader.read_animal_numbers_from_xls(args.input)
+                report_status_dates = report_reader.status_dates
+                report_rows = report_reader.rows
 
             if not animal_numbers:
                 sys.exit()
@@ -127,28 +285,57 @@ class KittenScraper:
             print(f'Found {len(animal_numbers)} animal{"s" if len(animal_numbers) != 1 else ""}: {", ".join([str(a) for a in animal_numbers])}')
 
             # Query details for each animal (current foster parent, foster status, breed, color, gender, age, etc.)
+            # and for each foster parent (name, contact details, etc.) This is pipelined: a foster parent is queued for
+            # lookup as soon as the first of their animals has been looked up.
             #
-            animal_data, foster_parents, animals_not_in_foster = self._get_animal_data(animal_numbers)
-
-            for p_number in foster_parents:
-                print(f'Animals for foster parent {p_number} = {foster_parents[p_number]}')
+            run_state = RunState(os.path.join(Utils.app_data_dir(), f'{self.BASE_ANIMAL_TYPE}_report_state.json')) if args.incremental else None
+            report_rows = report_rows if args.trust_report else None
+            with LookupStage(self._lookup_person, workers = self._person_workers, retries = self.LOOKUP_RETRIES) as person_stage:
+                with Metrics.timer('phase.animal_lookups'):
+                    if run_state:
+                        animal_data, foster_parents, animals_not_in_foster, persons_data = self._get_report_data_incremental(animal_numbers,
+                                                                                                                          report_status_dates,
+                                                                                                                          run_state,
+                                                                                                                          person_stage.submit,
+                                                                                                                          report_rows)
+                    else:
+                        animal_data, foster_parents, animals_not_in_foster = self._get_animal_data(animal_numbers,
+                                                                                                   on_foster_parent = person_stage.submit,
+                                                                                                   report_rows = report_rows)
+                        persons_data = {}
 
-            # Query details for each foster parent (name, contact details, etc.)
+                # Person lookups run alongside the animal lookups, this phase is the time spent waiting for the rest
+                #
+                person_lookups_start = time.perf_counter()
+                for p_number in foster_parents:
+                    print(f'Animals for foster parent {p_number} = {foster_parents[p_number]}')
+                    if p_number not in persons_data:
+                        person_stage.submit(p_number)
+
+            # With --trust_report, persons were looked up from the report before their animals were verified. Only
+            # keep (and report failures for) the persons who are still a foster parent.
             #
-            persons_data = {}
-            for person in foster_parents:
-                persons_data[person] = self._get_person_data(person)
+            persons_data.update({p_number : person for p_number, person in person_stage.results.items() if p_number in foster_parents})
+            for p_number, error in person_stage.failed.items():
+                if p_number in foster_parents:
+                    self._lookup_failed('person', p_number, error)
+            Metrics.record('phase.person_lookups', time.perf_counter() - person_lookups_start)
 
             # Save report to file
             #
             output_csv = os.path.join(Utils.default_dir(), f'{self.BASE_ANIMAL_TYPE}_foster_mentor_report_{date.today().strftime("%Y.%m.%d")}.csv')
             Utils.make_dir(output_csv)
-            self._output_results(animal_data,
-                                 foster_parents,
-                                 persons_data,
-                                 animals_not_in_foster,
-                                 current_mentee_status,
-                                 output_csv)
+            with Metrics.timer('phase.output'):
+                self._output_results(animal_numbers,
+                                     animal_data,
+                                     foster_parents,
+                                     persons_data,
+                                     animals_not_in_foster,
+                                     current_mentee_status,
+                                     output_csv)
+
+            if run_state:
+                self._save_run_state(run_state, animal_data, foster_parents, animals_not_in_foster, persons_data, report_status_dates)
 
             # Optional: automatically forward this report via email
             #
@@ -167,16 +354,49 @@ class KittenScraper:
                                           attachment=output_csv)
                     Log.debug(f'Composed email to {recipient_name} <{recipient_email}>')
 
+        if self._journal:
+            # Keep the journal if anything failed, a --resume run only retries the failed lookups
+            #
+            self._journal.finish(keep = bool(self._failed_lookups))
+            if self._failed_lookups:
+                Log.warn(f'Some lookups failed ({", ".join(f"{kind} {keys}" for kind, keys in self._failed_lookups.items())}), '
+                         'run again with --resume to retry them')
+
+        self._print_driver_call_summary()
+        self._memo.print_summary()
+        self._export_metrics(time.time() - start_time)
         print('KittenScraper completed in {0:.0f} seconds'.format(time.time() - start_time))
         self._exit_browser()
 
-    def _start_browser(self, show_browser):
-        ''' Instantiate the browser, configure options as needed
+    def _export_metrics(self, run_seconds):
+        ''' Write this run's metrics (phase timings, page load timings, chromedriver and API call counts) as a JSON
+            summary and as a Prometheus textfile, to 'metrics_dir' from config.yaml (defaults to ~/.kitten-scraper).
+        '''
+        metrics_dir = os.path.expanduser(self.config['metrics_dir']) if 'metrics_dir' in self.config else Utils.app_data_dir()
+        try:
+            Metrics.write_json(os.path.join(metrics_dir, f'{self.BASE_ANIMAL_TYPE}_metrics.json'),
+                               version = __version__,
+                               finished = datetime.now().isoformat(timespec = 'seconds'),
+                               run_seconds = run_seconds)
+            Metrics.write_prometheus(os.path.join(metrics_dir, f'{self.BASE_ANIMAL_TYPE}_metrics.prom'),
+                                     labels = {'animal_type' : self.BASE_ANIMAL_TYPE},
+                                     gauges = {'run_seconds' : ('Wall time of the last run', run_seconds),
+                                               'last_run_timestamp_seconds' : ('Unix time the last run finished', time.time())})
+            Log.debug(f'Wrote run metrics to {metrics_dir}')
+        except OSError as err:
+            Log.warn(f'Unable to write run metrics to {metrics_dir} ({err})')
+
+    def _start_browser(self, show_browser, workers = 1):
+        ''' Instantiate the browser(s), one browser session per worker
+        '''
+        Log.success(f'Starting chromedriver{f" ({workers} workers)" if workers > 1 else ""}...')
+        self._browser_pool = BrowserPool([self._create_browser(show_browser) for _ in range(workers)])
+
+    def _create_browser(self, show_browser):
+        ''' Instantiate a single browser, configure options as needed
         '''
-        Log.success('Starting chromedriver...')
         chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_14_3) AppleWebKit/605.1.15 '
-                                    '(KHTML, like Gecko) Version/12.0.3 Safari/605.1.15')
+        chrome_options.add_argument(f'--user-agent={self.USER_AGENT}')
         if not show_browser:
             chrome_options.add_argument('--headless')
 
@@ -194,14 +414,109 @@ class KittenScraper:
             Log.error(f'Sorry friends, I haven\'t included chromedriver for your platform ({sys.platform}). Exiting now.')
             sys.exit(0)
 
-        self._driver = webdriver.Chrome(chromedriver_path, options = chrome_options)
-        self._driver.set_page_load_timeout(60)
+        driver = webdriver.Chrome(chromedriver_path, options = chrome_options)
+        driver.set_page_load_timeout(60)
+
+        # Every chromedriver command (including WebElement commands) goes through driver.execute(). Count them
+        # by page type so we can see what each page costs.
+        #
+        execute = driver.execute
+        def counted_execute(driver_command, params = None):
+            Metrics.count(f'driver_calls.{getattr(self._thread_local, "page_type", "other")}')
+            return execute(driver_command, params)
+        driver.execute = counted_execute
+
+        return driver
 
     def _exit_browser(self):
-        ''' Close and exit the browser
+        ''' Close and exit all browsers
+        '''
+        if self._cache:
+            self._cache.close()
+        if self._archive:
+            if self._archive.recording:
+                Log.success(f'Recorded {self._archive.page_count} pages to {self._archive.path}')
+            self._archive.close()
+        if self._prefetch_executor:
+            self._prefetch_executor.shutdown()
+        if self._http_fetcher:
+            self._http_fetcher.close()
+        if self._browser_pool:
+            self._browser_pool.close()
+
+    def _set_page_type(self, page_type):
+        ''' Page type of the calling thread's current page, used to attribute metrics
+        '''
+        self._thread_local.page_type = page_type
+        Metrics.count(f'pages.{page_type}')
+
+    def _load_page(self, page_type, url, wait_for_id = None, dismiss_alert = False, browser_only = False):
+        ''' Load url as the calling thread's current page.
+
+            Browser engine: the page is loaded into the thread's browser and read through chromedriver.
+
+            HTTP engine: the raw HTML is downloaded and parsed in-process. If the element wait_for_id is missing from
+            the raw HTML (lazy-loaded content), the page is rendered by a browser instead and its page_source is parsed.
+            Pages loaded with browser_only are always loaded into the thread's browser.
+        '''
+        self._thread_local.page = None
+        self._set_page_type(page_type)
+
+        with Metrics.timer(f'page_load.{page_type}'):
+            self._fetch_page(url, wait_for_id, dismiss_alert, browser_only)
+
+        if self._archive and self._archive.recording:
+            self._record_page(page_type, self._url_templates.get(page_type), url,
+                              self._current_page.html if self._current_page else self._driver.page_source)
+
+    def _fetch_page(self, url, wait_for_id, dismiss_alert, browser_only):
+        if not self._http_fetcher or browser_only:
+            self._browser_get(self._driver, url, wait_for_id, dismiss_alert)
+            return
+
+        try:
+            page = self._http_fetcher.fetch(url)
+            if not wait_for_id or page.has_id(wait_for_id):
+                self._thread_local.page = page
+                return
+        except Exception as e:
+            if not self._browser_pool.size:
+                raise
+            Log.debug(f'HTTP fetch failed, falling back to browser: {url} ({e})')
+
+        with self._browser_pool.borrow() as driver:
+            self._browser_get(driver, url, wait_for_id, dismiss_alert)
+            page = HtmlPage(driver.page_source, driver.current_url)
+        self._http_fetcher.check_page(page, url)
+        self._thread_local.page = page
+
+    def _record_page(self, page_type, template, url, html, params = None):
+        ''' Save a fetched page to the page archive (--record), keyed by page type and URL template parameters
         '''
-        self._driver.close()
-        self._driver.quit()
+        params = params if params is not None else PageArchive.params_of(template, url)
+        if params is None:
+            Log.debug(f'Not recording {page_type} page, URL doesn\'t match its template: {url}')
+            return
+        self._archive.put_page(page_type, params, url, html)
+
+    def _browser_get(self, driver, url, wait_for_id = None, dismiss_alert = False):
+        driver.get(url)
+
+        if dismiss_alert:
+            try:
+                # Dismiss alert (if found)
+                #
+                Alert(driver).dismiss()
+            except NoAlertPresentException:
+                pass
+
+        if wait_for_id:
+            try:
+                # Wait for lazy-loaded content
+                #
+                WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, wait_for_id)))
+            except Exception:
+                raise Exception('Timeout while waiting for content on search page!') from Exception
 
     def _login(self):
         ''' Load the login page, enter credentials, submit
@@ -209,8 +524,10 @@ class KittenScraper:
         Log.success('Logging in...')
 
         try:
+            self._set_page_type('login')
             self._driver.set_page_load_timeout(20)
-            self._driver.get(self._login_url)
+            with Metrics.timer('page_load.login'):
+                self._driver.get(self._login_url)
 
         except TimeoutException:
             Log.error('ERROR: Unable to load the login page. Please check your connection.')
@@ -248,7 +565,8 @@ class KittenScraper:
             self._box_file_id = self.config['box_file_id'] if 'box_file_id' in self.config else None
             self._box_jwt = self.config['box_jwt'] if 'box_jwt' in self.config else None
 
-            if not (self._google_spreadsheet_key and self._google_client_secret) and not (self._box_user_id and self._box_file_id and self._box_jwt):
+            if not self.mentor_sheet_reader and \
+               not (self._google_spreadsheet_key and self._google_client_secret) and not (self._box_user_id and self._box_file_id and self._box_jwt):
                 Log.error(f'ERROR: Incomplete mentor spreadsheet configuration: {config_file}')
                 return False
 
@@ -283,9 +601,14 @@ class KittenScraper:
             self._animal_url = config['animal_url']
             self._medical_details_url = config['medical_details_url']
             self._list_all_animals_url = config['list_animals_url']
-            self._responsible_for_url = config['responsible_for_url']
-            self._responsible_for_paged_url = config['responsible_for_paged_url']
             self._adoption_summary_url = config['adoption_summary_url']
+            self._person_url = config['person_url'] if 'person_url' in config else None
+            self._url_templates.update({
+                'animal'           : self._animal_url,
+                'medical_details'  : self._medical_details_url,
+                'adoption_summary' : self._adoption_summary_url,
+                'list_animals'     : self._list_all_animals_url,
+                'person'           : self._person_url })
             self._do_not_assign_mentor = config['do_not_assign_mentor'] if 'do_not_assign_mentor' in config else []
             self._mentors = config['mentors'] if 'mentors' in config else []
 
@@ -307,132 +630,277 @@ class KittenScraper:
 
         return True
 
-    def _get_animal_data(self, animal_numbers, silent = False):
-        ''' Load additional animal data for each animal number
+    def _imap(self, fn, items):
+        ''' Run fn(item) across the worker pool, yield results in input order. Browser engine workers each hold a
+            browser, HTTP engine workers only borrow the browser for fallback page loads.
+        '''
+        return self._browser_pool.imap(fn, items, workers = self._workers, borrow = not self._http_fetcher)
+
+    def _lookup_with_retries(self, kind, fn, keys):
+        ''' Yield (key, fn(key)) for each key, looked up across the worker pool in input order. A lookup that raises
+            doesn't stop the run: the key goes to a retry queue, queued keys are retried (up to LOOKUP_RETRIES times)
+            once every other key is done, and keys that still fail are reported and skipped.
+        '''
+        def attempt(key):
+            try:
+                return fn(key)
+            except Exception as e:
+                return LookupFailure(e)
+
+        retry_queue = list(keys)
+        for retry in range(1 + self.LOOKUP_RETRIES):
+            failed = []
+            for key, result in zip(retry_queue, self._imap(attempt, retry_queue)):
+                if not isinstance(result, LookupFailure):
+                    yield key, result
+                elif retry < self.LOOKUP_RETRIES:
+                    Log.warn(f'Failed to look up {kind} {key}, will retry ({result.error})')
+                    if self._journal:
+                        self._journal.record_failure(kind, key, result.error)
+                    failed.append(key)
+                else:
+                    self._lookup_failed(kind, key, result.error)
+            retry_queue = failed
+
+    def _lookup_failed(self, kind, key, error):
+        Log.error(f'ERROR: Failed to look up {kind} {key} after {1 + self.LOOKUP_RETRIES} attempts, skipping it ({error})')
+        if self._journal:
+            self._journal.record_failure(kind, key, error)
+        self._failed_lookups.setdefault(kind, []).append(key)
+
+    def _get_animal_data(self, animal_numbers, silent = False, on_foster_parent = None, report_rows = None):
+        ''' Load additional animal data for each animal number. Lookups are sharded across the browser pool, results
+            are merged in the original animal number order. If provided, on_foster_parent(p_number) is
+            called as soon as each animal's foster parent is known.
+
+            If report_rows ({animal number : ReportRow}) is provided the report is trusted (--trust_report): the report's
+            foster parents are passed to on_foster_parent() before any animal is looked up, animals are looked up with
+            report_only, and each foster parent is checked against the report.
         '''
         animal_data = {}
         foster_parents = {}
         animals_not_in_foster = set()
-        for a_number in animal_numbers:
+        animal_numbers = list(animal_numbers)
+        lookup_animal = self._lookup_animal
+        if report_rows is not None:
+            lookup_animal = functools.partial(self._lookup_animal, report_only = True)
+            if on_foster_parent:
+                for p_number in dict.fromkeys(report_rows[a_number].foster_parent_id for a_number in animal_numbers if a_number in report_rows):
+                    if p_number:
+                        on_foster_parent(p_number)
+
+        results = {}
+        for a_number, (data, p_number, in_foster) in self._lookup_with_retries('animal', lookup_animal, animal_numbers):
+            results[a_number] = data, p_number, in_foster
+            if report_rows is not None and a_number in report_rows and report_rows[a_number].foster_parent_id != p_number:
+                Log.warn(f'Animal {a_number} foster parent has changed since the report '
+                         f'(report = {report_rows[a_number].foster_parent_id}, current = {p_number})')
+            if p_number is not None and on_foster_parent:
+                on_foster_parent(p_number)
+
             if not silent:
-                print(f'Looking up animal {a_number}... ', end='', flush=True)
-            sys.stdout.flush()
-            self._driver.get(self._animal_url.format(a_number))
-            try:
-                # Dismiss alert (if found)
-                #
-                Alert(self._driver).dismiss()
-            except NoAlertPresentException:
-                pass
+                print(f'Looking up animal {a_number}... {data["status"]}')
 
-            try:
-                # Wait for lazy-loaded content
-                #
-                WebDriverWait(self._driver, 10).until(EC.presence_of_element_located((By.ID, 'submitbtn2')))
-            except Exception:
-                raise Exception('Timeout while waiting for content on search page!') from Exception
+        # Retried lookups complete out of order, merge in the original animal number order
+        #
+        for a_number in (a_number for a_number in animal_numbers if a_number in results):
+            data, p_number, in_foster = results[a_number]
+            animal_data[a_number] = data
+            if p_number is not None:
+                foster_parents.setdefault(p_number, []).append(a_number)
+            elif not in_foster:
+                animals_not_in_foster.add(a_number)
 
-            # Get Special Message text (if it exists)
-            #
-            special_msg = Utils.utf8(self._get_text_by_id('specialMessagesDialog'))
+        return animal_data, foster_parents, animals_not_in_foster
 
-            if special_msg:
-                # Remove text we don't care about
-                #
-                special_msg = re.sub(r'(?i)This is a special message. If you would like to delete it then clear the Special Message box in the General Details section of this page.', '', special_msg).strip()
+    def _get_report_data_incremental(self, animal_numbers, report_status_dates, run_state, on_foster_parent = None, report_rows = None):
+        ''' Same as _get_animal_data(), but animals that were in the previous daily report with the same status date
+            are reused from the previous run instead of being looked up again. Foster parents with no new or changed
+            animals are reused as well (their notes are refreshed since mentor assignments change daily).
 
-                # Remove empty lines and double quotes
-                #
-                special_msg = os.linesep.join([s for s in special_msg.splitlines() if s])
-                special_msg = special_msg.replace('"', '\'')
-
-            animal_data[a_number] = {}
-            animal_data[a_number]['message'] = special_msg
-            status = self._get_selection_by_id('status')
-
-            if not status:
-                # Status text is usually found within a <select> element, but is sometimes found as innerText within the
-                # <td> that looks something like this: "Adopted - Awaiting Pickup\nChange Status"
-                try:
-                    status = self._get_property_by_xpath('innerText', '//*[@id="Table17"]/tbody/tr[5]/td[2]').split('\n')[0]
-                except Exception:
-                    status = ''
-
-            sub_status = self._get_selection_by_id('subStatus')
-            animal_data[a_number]['status'] = f'{status}{" - " if sub_status else ""}{sub_status}'
-            animal_data[a_number]['name'] = self._get_attr_by_id('animalname').strip()
-            animal_data[a_number]['type'] = self._get_attr_by_id('type')
-            animal_data[a_number]['breed'] = self._get_attr_by_id('primaryBreed').strip()
-            animal_data[a_number]['primary_color'] = self._get_selection_by_id('primaryColour')
-            animal_data[a_number]['secondary_color'] = self._get_selection_by_id('secondaryColour')
-            animal_data[a_number]['gender'] = self._get_selection_by_id('sex')
-            animal_data[a_number]['photo'] = 'No' if 'NoImage.png' in self._get_property_by_xpath('src', '//*[@id="animal-default-photo"]') else 'Yes'
+            Returns animal_data, foster_parents, animals_not_in_foster, and persons_data for the reused persons.
+        '''
+        prev_animals, prev_persons = run_state.load()
+        changed_animals = [a_number for a_number in animal_numbers
+                           if a_number not in prev_animals
+                           or a_number not in report_status_dates
+                           or prev_animals[a_number]['report_status_date'] != report_status_dates[a_number]]
 
-            try:
-                age = datetime.now() - datetime.strptime(self._get_attr_by_id('dob'), '%m/%d/%Y')
-                animal_data[a_number]['age'] = self._stringify_age(age)
-            except Exception:
-                animal_data[a_number]['age'] = 'Unknown Age'
+        Log.success(f'Incremental run: reusing {len(animal_numbers) - len(changed_animals)} unchanged animals from the previous run, '
+                    f'looking up {len(changed_animals)}')
 
-            try:
-                animal_data[a_number]['status_date'] = datetime.strptime(self._get_attr_by_id('statusdate'), '%m/%d/%Y').strftime('%-d-%b-%Y')
-            except ValueError:
-                animal_data[a_number]['status_date'] = 'Unknown'
+        fresh_data, fresh_foster_parents, fresh_not_in_foster = self._get_animal_data(changed_animals,
+                                                                                      on_foster_parent = on_foster_parent,
+                                                                                      report_rows = report_rows)
+        fresh_p_numbers = {a_number : p_number for p_number, animals in fresh_foster_parents.items() for a_number in animals}
 
-            # If this animal is currently in foster, get the responsible person (foster parent).
-            #
-            status = status.lower()
-            if ('in foster' in status and 'unassisted death' not in status):
-                try:
-                    p_number = int(self._get_attr_by_xpath('href', '//*[@id="Table17"]/tbody/tr[1]/td[2]/a').split('personid=')[1])
-                    foster_parents.setdefault(p_number, []).append(a_number)
-                except Exception:
-                    Log.error(f'Failed to find foster parent for animal {a_number}, please check report')
+        animal_data = {}
+        foster_parents = {}
+        animals_not_in_foster = set()
+        for a_number in animal_numbers:
+            if a_number in fresh_data:
+                animal_data[a_number] = fresh_data[a_number]
+                p_number = fresh_p_numbers.get(a_number)
+                in_foster = a_number not in fresh_not_in_foster
+            elif a_number in changed_animals:
+                continue # lookup failed
             else:
+                animal_data[a_number] = prev_animals[a_number]['data']
+                p_number = prev_animals[a_number]['p_number']
+                in_foster = prev_animals[a_number]['in_foster']
+
+            if p_number is not None:
+                foster_parents.setdefault(p_number, []).append(a_number)
+            elif not in_foster:
                 animals_not_in_foster.add(a_number)
 
-            # Perform these operations last. They will load new pages!
+        persons_data = {}
+        for p_number, animals in foster_parents.items():
+            if p_number in prev_persons and not set(animals) & set(changed_animals):
+                person_data = prev_persons[p_number]
+                person_data['notes'] = self._get_person_notes(p_number, person_data['full_name'], person_data['emails'])
+                persons_data[p_number] = person_data
+
+        return animal_data, foster_parents, animals_not_in_foster, persons_data
+
+    def _save_run_state(self, run_state, animal_data, foster_parents, animals_not_in_foster, persons_data, report_status_dates):
+        p_numbers = {a_number : p_number for p_number, animals in foster_parents.items() for a_number in animals}
+        animals = {}
+        for a_number, data in animal_data.items():
+            animals[a_number] = {
+                'report_status_date' : report_status_dates.get(a_number),
+                'data'               : data,
+                'p_number'           : p_numbers.get(a_number),
+                'in_foster'          : a_number not in animals_not_in_foster
+            }
+        run_state.save(animals, persons_data)
+
+    @memoized('animal')
+    @journaled('animal', decode = tuple)
+    def _lookup_animal(self, a_number, report_only = False):
+        ''' Load additional animal data for a single animal number using the calling thread's browser. Returns the
+            animal data, the foster parent person number (or None), and whether or not this animal is in foster.
+
+            With report_only (--trust_report) the pages the report output doesn't need are not loaded: the adoption
+            summary (bio), and spay/neuter status for animals that are not in foster. Either way the lookup is memoized
+            and journaled by animal number, so the report reuses animals already looked up by -s verbose (status lookups
+            always run before the report).
+        '''
+        return self._read_animal(a_number, report_only)
+
+    @timed('lookup.animal')
+    def _read_animal(self, a_number, report_only = False):
+        fields = self._animal_page_fields(a_number)
+
+        # Get Special Message text (if it exists)
+        #
+        special_msg = Utils.utf8(fields['special_msg'])
+
+        if special_msg:
+            # Remove text we don't care about
             #
-            animal_data[a_number]['sn'] = self._get_spay_neuter_status(a_number)
-            animal_data[a_number]['bio'] = 'Yes' if self._animal_has_adoption_summary(a_number) else 'No'
+            special_msg = re.sub(r'(?i)This is a special message. If you would like to delete it then clear the Special Message box in the General Details section of this page.', '', special_msg).strip()
 
-            # Create some helpful/default string representations
+            # Remove empty lines and double quotes
             #
-            set_default = lambda str, default : default if str.strip() in [None, ''] else str
+            special_msg = os.linesep.join([s for s in special_msg.splitlines() if s])
+            special_msg = special_msg.replace('"', '\'')
+
+        data = {}
+        data['message'] = special_msg
+        status = fields['status']
+
+        if not status:
+            # Status text is usually found within a <select> element, but is sometimes found as innerText within the
+            # <td> that looks something like this: "Adopted - Awaiting Pickup\nChange Status"
+            status = fields['status_text'].split('\n')[0]
+
+        sub_status = fields['sub_status']
+        data['status'] = f'{status}{" - " if sub_status else ""}{sub_status}'
+        data['name'] = fields['name'].strip()
+        data['type'] = fields['type']
+        data['breed'] = fields['breed'].strip()
+        data['primary_color'] = fields['primary_color']
+        data['secondary_color'] = fields['secondary_color']
+        data['gender'] = fields['gender']
+        data['photo'] = 'No' if 'NoImage.png' in fields['photo_src'] else 'Yes'
+
+        dob = self._dob_parser.parse(fields['dob'])
+        data['age'] = self._stringify_age(datetime.now() - dob) if dob else 'Unknown Age'
+
+        status_date = self._status_date_parser.parse(fields['status_date'])
+        data['status_date'] = status_date.strftime('%-d-%b-%Y') if status_date else 'Unknown'
+
+        # If this animal is currently in foster, get the responsible person (foster parent).
+        #
+        status = status.lower()
+        p_number = None
+        in_foster = 'in foster' in status and 'unassisted death' not in status
+        if in_foster:
+            try:
+                p_number = int(fields['foster_parent_href'].split('personid=')[1])
+            except Exception:
+                Log.error(f'Failed to find foster parent for animal {a_number}, please check report')
 
-            animal_data[a_number]['sn'] = set_default(animal_data[a_number]['sn'], 'Unknown')
-            animal_data[a_number]['status'] = set_default(animal_data[a_number]['status'], 'Status Unknown')
-            animal_data[a_number]['name'] = set_default(animal_data[a_number]['name'], 'Unnamed')
-            animal_data[a_number]['breed'] = set_default(animal_data[a_number]['breed'], 'Unknown Breed')
-            animal_data[a_number]['gender'] = set_default(animal_data[a_number]['gender'], 'Unknown Gender')
-            animal_data[a_number]['color'] = set_default(animal_data[a_number]['primary_color'], 'Unknown Color')
+        # Perform these operations last. They will load new pages!
+        #
+        data['sn'] = self._get_spay_neuter_status(a_number) if in_foster or not report_only else ''
+        if report_only:
+            data['bio'] = 'Unknown'
+        else:
+            data['bio'] = 'Yes' if self._animal_has_adoption_summary(a_number) else 'No'
 
-            if animal_data[a_number]['secondary_color'].strip() not in [None, '', 'None']:
-                animal_data[a_number]['color'] += f'/{animal_data[a_number]["secondary_color"]}'
+        # Create some helpful/default string representations
+        #
+        set_default = lambda str, default : default if str.strip() in [None, ''] else str
 
-            breed_abbreviations = {
-                # 'Breed' is a free-form text field and not everyone enters data exactly the same. I'll compare against
-                # lowercase/no-whitespace for slightly better odds of matches.
-                #
-                'domesticshorthair'  : 'DSH',
-                'domesticmediumhair' : 'DMH',
-                'domesticlonghair'   : 'DLH' }
-
-            abbreviation = breed_abbreviations.get(animal_data[a_number]['breed'].replace(' ', '').lower())
-            if abbreviation:
-                animal_data[a_number]['breed'] = abbreviation
-
-            if animal_data[a_number]['gender'].lower() == 'male':
-                animal_data[a_number]['gender_short'] = 'M'
-            elif animal_data[a_number]['gender'].lower() == 'female':
-                animal_data[a_number]['gender_short'] = 'F'
-            else:
-                animal_data[a_number]['gender_short'] = animal_data[a_number]['gender']
+        data['sn'] = set_default(data['sn'], 'Unknown')
+        data['status'] = set_default(data['status'], 'Status Unknown')
+        data['name'] = set_default(data['name'], 'Unnamed')
+        data['breed'] = set_default(data['breed'], 'Unknown Breed')
+        data['gender'] = set_default(data['gender'], 'Unknown Gender')
+        data['color'] = set_default(data['primary_color'], 'Unknown Color')
 
-            if not silent:
-                print(animal_data[a_number]['status'])
+        if data['secondary_color'].strip() not in [None, '', 'None']:
+            data['color'] += f'/{data["secondary_color"]}'
 
-        return animal_data, foster_parents, animals_not_in_foster
+        breed_abbreviations = {
+            # 'Breed' is a free-form text field and not everyone enters data exactly the same. I'll compare against
+            # lowercase/no-whitespace for slightly better odds of matches.
+            #
+            'domesticshorthair'  : 'DSH',
+            'domesticmediumhair' : 'DMH',
+            'domesticlonghair'   : 'DLH' }
+
+        abbreviation = breed_abbreviations.get(data['breed'].replace(' ', '').lower())
+        if abbreviation:
+            data['breed'] = abbreviation
+
+        if data['gender'].lower() == 'male':
+            data['gender_short'] = 'M'
+        elif data['gender'].lower() == 'female':
+            data['gender_short'] = 'F'
+        else:
+            data['gender_short'] = data['gender']
+
+        return data, p_number, in_foster
+
+    def _animal_page_fields(self, a_number):
+        ''' Read the animal page fields through the lookup cache. Both field groups come from the same page, so the
+            page is only skipped when both groups are still fresh.
+        '''
+        status_fields = self._cache.get('animal', a_number, 'status') if self._cache else None
+        details_fields = self._cache.get('animal', a_number, 'details') if self._cache else None
+        if status_fields is not None and details_fields is not None:
+            return {**details_fields, **status_fields}
+
+        self._load_page('animal', self._animal_url.format(a_number), wait_for_id = 'submitbtn2', dismiss_alert = True)
+        fields = self._read_fields(page_fields.ANIMAL_PAGE_FIELDS)
+
+        if self._cache:
+            self._cache.put('animal', a_number, 'status', {k : v for k, v in fields.items() if k in page_fields.ANIMAL_STATUS_FIELDS})
+            self._cache.put('animal', a_number, 'details', {k : v for k, v in fields.items() if k not in page_fields.ANIMAL_STATUS_FIELDS})
+        return fields
 
     def _stringify_age(self, age):
         ''' To keep things brief and easy to read, I'll floor()/round() months and weeks. This is close enough for
@@ -458,83 +926,102 @@ class KittenScraper:
 
         return age_string
 
+    @memoized('medical_details')
     def _get_spay_neuter_status(self, animal_number):
         ''' Load spay/neuter status from the medical details page
         '''
+        cached = self._cache.get('animal', animal_number, 'medical') if self._cache else None
+        if cached is not None:
+            return cached['sn']
+
         try:
-            self._driver.get(self._medical_details_url.format(animal_number))
-            return Utils.utf8(self._get_attr_by_xpath('innerText', '/html/body/table[2]/tbody/tr[2]/td/table/tbody/tr[4]/td[4]'))
+            self._load_page('medical_details', self._medical_details_url.format(animal_number))
+            sn = Utils.utf8(self._read_fields(page_fields.MEDICAL_DETAILS_PAGE_FIELDS)['sn'])
+        except PageLoadError:
+            raise # login/error page, fail the animal lookup so it is retried
         except Exception:
             Log.error(f'Failed to read spay/neuter status for animal {animal_number}')
             return 'Unknown'
 
+        if self._cache:
+            self._cache.put('animal', animal_number, 'medical', {'sn' : sn})
+        return sn
+
+    @memoized('adoption_summary')
     def _animal_has_adoption_summary(self, animal_number):
+        cached = self._cache.get('animal', animal_number, 'bio') if self._cache else None
+        if cached is not None:
+            return cached['has_adoption_summary']
+
         adoption_summary = ''
         try:
-            self._driver.get(self._adoption_summary_url.format(animal_number))
-            adoption_summary = self._get_text_by_id('adoptSummary').strip()
+            self._load_page('adoption_summary', self._adoption_summary_url.format(animal_number))
+            adoption_summary = self._read_fields(page_fields.ADOPTION_SUMMARY_PAGE_FIELDS)['adoption_summary'].strip()
+        except PageLoadError:
+            raise # login/error page, fail the animal lookup so it is retried
         except Exception:
             Log.error(f'Failed to read adoption summary for animal {animal_number}')
             return False
 
-        return len(adoption_summary) > 10 # minimum of 10 chars, completely arbitrary in case there is some junk in here
+        has_adoption_summary = len(adoption_summary) > 10 # minimum of 10 chars, completely arbitrary in case there is some junk in here
+        if self._cache:
+            self._cache.put('animal', animal_number, 'bio', {'has_adoption_summary' : has_adoption_summary})
+        return has_adoption_summary
 
-    def _get_person_data(self, person_number):
-        ''' Load the given person number, return details and contact information
+    def _lookup_person(self, person_number):
+        ''' Person lookup for a pipeline worker thread
         '''
-        print(f'Looking up person {person_number}... ', end='', flush=True)
-        sys.stdout.flush()
+        with self._worker_browser():
+            return self._get_person_data(person_number)
 
-        self._driver.get(self._search_url)
-        self._driver.find_element_by_id('userid').send_keys(str(person_number))
-        self._driver.find_element_by_id('userid').send_keys(webdriver.common.keys.Keys.RETURN)
+    def _worker_browser(self):
+        ''' Worker threads need to hold a browser for the duration of a lookup with the browser engine. With the http
+            engine they only borrow one for fallback page loads.
+        '''
+        return self._browser_pool.borrow() if not self._http_fetcher else contextlib.nullcontext()
 
-        first_name     = self._get_attr_by_id('ctl00_ctl00_ContentPlaceHolderBase_ContentPlaceHolder1_personDetailsUC_PersonNameTitle1_txtFirstName').strip()
-        last_name      = self._get_attr_by_id('ctl00_ctl00_ContentPlaceHolderBase_ContentPlaceHolder1_personDetailsUC_PersonNameTitle1_txtLastName').strip()
-        preferred_name = self._get_attr_by_id('ctl00_ctl00_ContentPlaceHolderBase_ContentPlaceHolder1_personDetailsUC_PersonNameTitle1_txtPreferredName').strip()
-        home_phone     = self._get_attr_by_id('ctl00_ctl00_ContentPlaceHolderBase_ContentPlaceHolder1_personDetailsUC_PersonContact1_homePhone_txtPhone3').strip()
-        cell_phone     = self._get_attr_by_id('ctl00_ctl00_ContentPlaceHolderBase_ContentPlaceHolder1_personDetailsUC_PersonContact1_mobilePhone_txtPhone3').strip()
-        email1         = self._get_attr_by_xpath('innerText', '//*[@id="emailTable"]/tbody/tr[1]/td[1]').strip()
-        email2         = self._get_attr_by_xpath('innerText', '//*[@id="emailTable"]/tbody/tr[2]/td[1]').strip()
-        email3         = self._get_attr_by_xpath('innerText', '//*[@id="emailTable"]/tbody/tr[3]/td[1]').strip()
-        email4         = self._get_attr_by_xpath('innerText', '//*[@id="emailTable"]/tbody/tr[4]/td[1]').strip()
+    @memoized('person')
+    @journaled('person',
+               encode = lambda person: {**person, 'emails' : sorted(person['emails'])},
+               decode = lambda person: {**person, 'emails' : set(person['emails'])})
+    @timed('lookup.person')
+    def _get_person_data(self, person_number):
+        ''' Load the given person number, return details and contact information
+        '''
+        fields = self._cache.get('person', person_number, 'contact') if self._cache else None
+        if fields is None:
+            self._load_person_page(person_number)
+            fields = self._read_fields(page_fields.PERSON_PAGE_FIELDS)
+            if self._cache:
+                self._cache.put('person', person_number, 'contact', fields)
+
+        first_name     = fields['first_name'].strip()
+        last_name      = fields['last_name'].strip()
+        preferred_name = fields['preferred_name'].strip()
+        home_phone     = fields['home_phone'].strip()
+        cell_phone     = fields['cell_phone'].strip()
+        email_fields   = [fields[f'email{n}'].strip() for n in range(1, 5)]
 
         emails = set()
-        for email in (email for email in [email1, email2, email3, email4] if email): # add non-empties to set
+        for email in (email for email in email_fields if email): # add non-empties to set
             emails.add(email.lower())
 
-        prev_animals_fostered, euthanized_count, unassisted_death_count = self._prev_animals_fostered(person_number)
+        history = self._get_foster_history(person_number)
+        prev_animals_fostered = history['prev_animals_fostered']
+        euthanized_count = history['euthanized_count']
+        unassisted_death_count = history['unassisted_death_count']
 
         full_name = preferred_name if preferred_name else first_name if first_name else ''
         full_name += ' ' if full_name else ''
         full_name += last_name if last_name else ''
 
-        notes = ''
-
-        # 'do_not_assign_mentor' list may included person number (as number) or email (as string)
-        #
-        if person_number in self._do_not_assign_mentor:
-            notes = '*** Do not assign mentor (Staff)'
-        else:
-            do_not_assign_strings = (s for s in self._do_not_assign_mentor if isinstance(s, str))
-            for dna in do_not_assign_strings:
-                if [s for s in emails if dna.lower() in s]:
-                    notes = '*** Do not assign mentor (Staff)'
-                    break
-
-        if person_number in self._mentors:
-            notes += '{}*** {} is a mentor'.format('\r' if notes else '', full_name)
-
-        match_strings = emails.union([full_name, str(person_number)])
-        matching_sheets = self.mentor_sheet_reader.find_matching_mentors(match_strings)
-        if matching_sheets:
-            notes += '{}*** Found {} matching mentor(s): {}'.format('\r' if notes else '', len(matching_sheets), ', '.join([str(s) for s in matching_sheets]))
+        notes = self._get_person_notes(person_number, full_name, emails)
 
         loss_rate = 0.0
         if prev_animals_fostered > 0:
             loss_rate = 100.0 * (euthanized_count + unassisted_death_count) / prev_animals_fostered
 
-        print(f'{first_name} {last_name}')
+        print(f'Looking up person {person_number}... {first_name} {last_name}')
         return {
             'first_name'             : first_name,
             'last_name'              : last_name,
@@ -550,58 +1037,114 @@ class KittenScraper:
             'notes'                  : notes
         }
 
-    def _prev_animals_fostered(self, person_number):
-        ''' Determine the total number of animals this person has previously fostered. This is a useful metric to gauge
-            experience level, but there are some difficulties interpreting the data without getting unnecessarily crazy
-            in here. Consider these numbers "a decent guess".
-
-            Load the list of all animals this person has been responsible for, page by page until we have no more pages.
-
-            FUTURE REFACTOR: Consider combining this with _current_animals_fostered?
+    def _get_person_notes(self, person_number, full_name, emails):
+        ''' Report notes for this person: staff (do not assign mentor), is a mentor, or already has matching mentor(s)
         '''
-        page_number = 1
-        previous_foster_count = 0
-        euthanized_count = 0
-        unassisted_death_count = 0
+        notes = ''
 
-        while True:
-            self._driver.get(self._list_all_animals_url.format(page_number, person_number))
-            try:
-                table = self._driver.find_element_by_id('Table3')
-                rows = table.find_elements(By.TAG_NAME, 'tr')
-                fostered_tr_active = False
-                agency_outgoing_tr_active = False
-
-                for row in rows:
-                    cols = row.find_elements(By.TAG_NAME, 'td')
-                    num_cols = len(cols)
-
-                    if num_cols == 10:
-                        animal_type = cols[5].text.lower()
-                        animal_status = cols[2].text.lower()
-                        if fostered_tr_active or agency_outgoing_tr_active:
-                            target_types = ['cat', 'kitten'] if not self._dog_mode else ['dog', 'puppy']
-                            if any(s in animal_type for s in target_types):
-                                if 'in foster' not in animal_status or animal_status == 'unassisted death - in foster':
-                                    previous_foster_count += 1
-                                if 'euthanized' in animal_status:
-                                    euthanized_count += 1
-                                elif 'unassisted death' in animal_status:
-                                    unassisted_death_count += 1
-
-                    elif num_cols == 1:
-                        fostered_tr_active = cols[0].text.lower() == 'fostered'
-                        agency_outgoing_tr_active = cols[0].text.lower() == 'agency outgoing'
+        # 'do_not_assign_mentor' list may included person number (as number) or email (as string)
+        #
+        if person_number in self._do_not_assign_mentor:
+            notes = '*** Do not assign mentor (Staff)'
+        else:
+            do_not_assign_strings = (s for s in self._do_not_assign_mentor if isinstance(s, str))
+            for dna in do_not_assign_strings:
+                if [s for s in emails if dna.lower() in s]:
+                    notes = '*** Do not assign mentor (Staff)'
+                    break
 
-                    else:
-                        fostered_tr_active = False
-                        agency_outgoing_tr_active = False
+        if person_number in self._mentors:
+            notes += '{}*** {} is a mentor'.format('\r' if notes else '', full_name)
+
+        match_strings = emails.union([full_name, str(person_number)])
+        matching_sheets = self.mentor_sheet_reader.find_matching_mentors(match_strings)
+        if matching_sheets:
+            notes += '{}*** Found {} matching mentor(s): {}'.format('\r' if notes else '', len(matching_sheets), ', '.join([str(s) for s in matching_sheets]))
 
-            except NoSuchElementException:
-                break
+        return notes
 
-            page_number = page_number + 1
-        return previous_foster_count, euthanized_count, unassisted_death_count
+    def _load_person_page(self, person_number):
+        ''' Load the person details page. The HTTP engine can load this page directly if 'person_url' is provided in
+            the additional config, otherwise we need to go through the search page with a browser.
+        '''
+        if self._http_fetcher and self._person_url:
+            self._load_page('person', self._person_url.format(person_number), wait_for_id = page_fields.PERSON_PAGE_FIELDS['first_name'][1])
+            return
+
+        self._thread_local.page = None
+        self._set_page_type('person')
+        with Metrics.timer('page_load.person'):
+            if self._archive and not self._archive.recording:
+                self._thread_local.page = HtmlPage(self._archive.get_page('person', [person_number]))
+                return
+
+            if not self._http_fetcher:
+                self._search_person(self._driver, person_number)
+                html = self._driver.page_source if self._archive else None
+            else:
+                with self._browser_pool.borrow() as driver:
+                    self._search_person(driver, person_number)
+                    self._thread_local.page = HtmlPage(driver.page_source, driver.current_url)
+                    html = self._thread_local.page.html
+
+        if self._archive:
+            self._record_page('person', None, self._search_url, html, params = [person_number])
+
+    def _search_person(self, driver, person_number):
+        driver.get(self._search_url)
+        driver.find_element_by_id('userid').send_keys(str(person_number))
+        driver.find_element_by_id('userid').send_keys(webdriver.common.keys.Keys.RETURN)
+
+    def _get_foster_history(self, person_number):
+        ''' Foster history for the report. Previous foster/loss counts barely change from day to day so a history record
+            from the persistent cache is fine here.
+        '''
+        history = self._cache.get('person', person_number, 'history') if self._cache else None
+        if not isinstance(history, dict):
+            history = self._crawl_person_history(person_number)
+        return history
+
+    @memoized('current_animals')
+    def _crawl_current_animals(self, person_number):
+        ''' The animals currently in foster with this person, from this run's history crawl (never from the persistent
+            cache, current animals change daily). Shares the crawl with the report's foster history.
+        '''
+        history = self._crawl_person_history(person_number)
+        return [a_number for animals in history['current_animals'].values() for a_number in animals]
+
+    @memoized('person_history')
+    @timed('lookup.history')
+    def _crawl_person_history(self, person_number):
+        ''' Load the list of all animals this person has been responsible for, page by page until we have no more pages,
+            and build the person's history record in a single traversal (see listing_parser.summarize_history). The
+            record serves both the report (foster experience, losses) and mentee status (current animals).
+
+            Each page is parsed from a single HTML snapshot. With the http engine, the remaining pages are prefetched
+            concurrently once the first page tells us how many pages there are, on one executor shared by all workers.
+        '''
+        page_url = lambda page_number: self._list_all_animals_url.format(page_number, person_number)
+
+        if self._http_fetcher:
+            def fetch_html(url):
+                Metrics.count('pages.list_animals')
+                with Metrics.timer('page_load.list_animals'):
+                    html = self._http_fetcher.fetch(url).html
+                if self._archive and self._archive.recording:
+                    self._record_page('list_animals', self._list_all_animals_url, url, html)
+                return html
+            pages = listing_parser.crawl_listing(fetch_html, page_url, prefetch_executor = self._prefetch_executor)
+        else:
+            def fetch_html(url):
+                self._load_page('list_animals', url, browser_only = True)
+                return self._driver.page_source
+            pages = listing_parser.crawl_listing(fetch_html, page_url)
+
+        history = listing_parser.summarize_history(pages, self._dog_mode)
+        if self._cache:
+            # Only the counts are cached, current animals are always crawled fresh
+            #
+            self._cache.put('person', person_number, 'history', {key : value for key, value in history.items() if key != 'current_animals'})
+        return history
 
     def _print_and_write(self, file, s):
         print(s)
@@ -616,24 +1159,40 @@ class KittenScraper:
         ''' Get current mentees and mentee status for each mentor
         '''
         autoupdate_completed_mentees = 'autoupdate' in arg_status # mark 'completed' mentors in the spreadsheet
+        autoupdate_dry_run = 'dryrun' in arg_status # only print the spreadsheet updates autoupdate would make
         verbose_status = 'verbose' in arg_status
         Log.success(f'Looking up mentee status (verbose = {verbose_status}, autoupdate_completed_mentees = {autoupdate_completed_mentees})...')
         completed_mentees = {}
         current_mentees = self.mentor_sheet_reader.get_current_mentees()
+        if self._archive and self._archive.recording:
+            self._archive.put_state('current_mentees', current_mentees)
+
+        # Look up every mentee once (a mentee may be listed by more than one mentor) across the worker pool, then
+        # look up all of their current animals at once.
+        #
+        mentee_pids = list(dict.fromkeys(mentee['pid'] for current in current_mentees for mentee in current['mentees']))
+        Log.success(f'Looking up current animals for {len(mentee_pids)} mentees...')
+        current_animals_by_pid = dict(self._lookup_with_retries('mentee', self._lookup_current_animals, mentee_pids))
+
+        animal_data = {}
+        if verbose_status:
+            all_animal_ids = list(dict.fromkeys(a_number for animal_ids in current_animals_by_pid.values() for a_number in animal_ids))
+            Log.success(f'Looking up {len(all_animal_ids)} current animals...')
+            animal_data, _, _ = self._get_animal_data(all_animal_ids, True)
+
         for current in current_mentees:
             current['active_count'] = 0
             print(f'Checking mentee status for {current["mentor"]}... ', end='', flush=True)
 
             if current['mentees']:
                 for mentee in current['mentees']:
-                    current_animal_ids = self._current_animals_fostered(mentee['pid'])
                     mentee['current_animals'] = {}
+                    if mentee['pid'] not in current_animals_by_pid:
+                        continue # lookup failed, status unknown (never mark this mentee completed)
 
-                    if verbose_status:
-                        animal_data, _, _ = self._get_animal_data(current_animal_ids, True)
-
+                    current_animal_ids = current_animals_by_pid[mentee['pid']]
                     for current_animal_id in current_animal_ids:
-                        mentee['current_animals'][current_animal_id] = animal_data[current_animal_id] if verbose_status else {}
+                        mentee['current_animals'][current_animal_id] = animal_data.get(current_animal_id, {}) if verbose_status else {}
 
                     if current_animal_ids:
                         current['active_count'] = current['active_count'] + 1
@@ -647,43 +1206,20 @@ class KittenScraper:
             Log.success('Auto-updating completed mentees in the mentor spreadsheet...')
             for mentor in completed_mentees:
                 self.mentor_sheet_reader.set_completed_mentees(mentor, completed_mentees[mentor])
+            self.mentor_sheet_reader.commit_updates(dry_run = autoupdate_dry_run)
 
         return current_mentees
 
-    def _current_animals_fostered(self, person_number):
-        ''' Determine the total number of animals this person is currently fostering. Load the list of all animals this
-            person is responsible for, page by page until we have no more pages.
+    @journaled('mentee')
+    def _lookup_current_animals(self, person_number):
+        ''' Current animals from a fresh (this run) history crawl, for a worker thread
         '''
-        page_number = 1
-        current_animals = []
+        with self._worker_browser():
+            return self._crawl_current_animals(person_number)
 
-        while True:
-            self._driver.get(self._responsible_for_paged_url.format(page_number, person_number))
-            try:
-                table = self._driver.find_element_by_xpath('//*[@id="Table4"]/tbody/tr/td[3]/table[2]')
-                rows = table.find_elements(By.TAG_NAME, 'tr')
-                if len(rows) < 3:
-                    break
-                for row in rows:
-                    cols = row.find_elements(By.TAG_NAME, 'td')
-                    if len(cols) == 12:
-                        animal_status = cols[2].text.lower()
-                        animal_type = cols[5].text.lower()
-                        animal_number = int(cols[3].text)
-                        target_types = ['cat', 'kitten', 'rodent', 'guinea pig', 'rabbit'] if not self._dog_mode else ['dog', 'puppy']
-                        if 'in foster' in animal_status and animal_status != 'unassisted death - in foster' and animal_type in target_types:
-                            animal_number = int(cols[3].text)
-                            if animal_number not in current_animals: # ignore duplicates
-                                current_animals.append(animal_number)
-            except NoSuchElementException:
-                break
-
-            page_number = page_number + 1
-
-        return current_animals
-
-    def _output_results(self, animal_data, foster_parents, persons_data, animals_not_in_foster, current_mentee_status, csv_filename):
-        ''' Output all of our new super amazing results to a csv file
+    def _output_results(self, animal_numbers, animal_data, foster_parents, persons_data, animals_not_in_foster, current_mentee_status, csv_filename):
+        ''' Output all of our new super amazing results to a csv file. Report animals (animal_numbers) missing from
+            animal_data are listed as failed lookups.
         '''
         Log.success(f'Writing results to {csv_filename}...')
         csv_rows = []
@@ -704,7 +1240,7 @@ class KittenScraper:
 
         # Build a row for each foster parent
         #
-        for person_number in sorted(foster_parents, key=lambda p: persons_data[p]['notes']):
+        for person_number in sorted((p for p in foster_parents if p in persons_data), key=lambda p: persons_data[p]['notes']):
             person_data = persons_data[person_number]
             name = person_data['full_name']
             report_notes = person_data['notes']
@@ -776,6 +1312,18 @@ class KittenScraper:
                     outfile.write('{} {} - {}\n'.format(a_number,  animal_data[a_number]['type'], animal_data[a_number]['status']))
                     print('{} {} - {}'.format(a_number,  animal_data[a_number]['type'], animal_data[a_number]['status']))
 
+            failed_animals = [a_number for a_number in animal_numbers if a_number not in animal_data]
+            failed_persons = [p_number for p_number in foster_parents if p_number not in persons_data]
+            if failed_animals or failed_persons:
+                outfile.write('\n\n\n*** Lookups failed, run again with --resume to retry\n')
+                Log.warn('\nLookups failed, run again with --resume to retry')
+                for a_number in failed_animals:
+                    outfile.write(f'Animal {a_number}\n')
+                    print(f'Animal {a_number}')
+                for p_number in failed_persons:
+                    outfile.write(f'Foster parent {p_number} - animals {" ".join(str(a) for a in foster_parents[p_number])}\n')
+                    print(f'Foster parent {p_number} - animals {" ".join(str(a) for a in foster_parents[p_number])}')
+
             if current_mentee_status:
                 outfile.write('\n\nMentor,Active Mentees,Last Assigned (days ago)\n')
                 for current in current_mentee_status:
@@ -816,31 +1364,87 @@ class KittenScraper:
                                                                animal_data[a_number]['color'])
         return animal_details, animal_details_brief
 
+    def _read_fields(self, field_map):
+        ''' Read every field in a declarative field map (see page_fields.py) from the calling thread's current page.
+            With a browser this is a single chromedriver round trip, unless legacy per-element reads were requested.
+        '''
+        if self._current_page:
+            return self._current_page.read_fields(field_map)
+
+        if self._use_field_maps:
+            try:
+                return self._driver.execute_script(page_fields.READ_FIELDS_SCRIPT, field_map)
+            except Exception as e:
+                Log.debug(f'Unable to read page fields with a single script call, reading one at a time ({e})')
+
+        readers = {
+            'text'      : lambda locator, path: self._get_text_by_id(path) if locator == 'id' else self._get_attr_by_xpath('innerText', path),
+            'selection' : lambda locator, path: self._get_selection_by_id(path),
+            'value'     : lambda locator, path: self._get_attr_by_id(path) if locator == 'id' else self._get_attr_by_xpath('value', path) }
+
+        result = {}
+        for name, (locator, path, read_as) in field_map.items():
+            reader = readers.get(read_as)
+            if reader:
+                result[name] = reader(locator, path)
+            elif locator == 'xpath':
+                result[name] = self._get_property_by_xpath(read_as, path)
+            else:
+                result[name] = ''
+            result[name] = result[name] or ''
+        return result
+
+    def _print_driver_call_summary(self):
+        ''' Print the average number of chromedriver calls used for each page type
+        '''
+        pages = Metrics.counters('pages.')
+        driver_calls = Metrics.counters('driver_calls.')
+        if not pages:
+            return
+
+        summary = []
+        for page_type in sorted(pages):
+            summary.append('{} {:.1f} ({} page{})'.format(page_type,
+                                                          driver_calls.get(page_type, 0) / pages[page_type],
+                                                          pages[page_type],
+                                                          's' if pages[page_type] != 1 else ''))
+        Log.debug(f'Chromedriver calls per page ({"per-element reads" if not self._use_field_maps else "field maps"}): {", ".join(summary)}')
+
     def _get_text_by_id(self, element_id):
+        if self._current_page:
+            return self._current_page.text_by_id(element_id)
         try:
             return self._driver.find_element_by_id(element_id).text
         except Exception:
             return ''
 
     def _get_attr_by_id(self, element_id):
+        if self._current_page:
+            return self._current_page.attr_by_id(element_id)
         try:
             return self._driver.find_element_by_id(element_id).get_attribute('value')
         except Exception:
             return ''
 
     def _get_property_by_xpath(self, property_name, element_xpath):
+        if self._current_page:
+            return self._current_page.attr_by_xpath(property_name, element_xpath)
         try:
             return self._driver.find_element_by_xpath(element_xpath).get_property(property_name)
         except Exception:
             return ''
 
     def _get_attr_by_xpath(self, attr, element_xpath):
+        if self._current_page:
+            return self._current_page.attr_by_xpath(attr, element_xpath)
         try:
             return self._driver.find_element_by_xpath(element_xpath).get_attribute(attr)
         except Exception:
             return ''
 
     def _get_checked_by_id(self, element_id):
+        if self._current_page:
+            return self._current_page.attr_by_id(element_id, 'checked') != ''
         try:
             attr = self._driver.find_element_by_id(element_id).get_attribute('checked')
             return bool(attr)
@@ -848,6 +1452,8 @@ class KittenScraper:
             return False
 
     def _get_selection_by_id(self, element_id):
+        if self._current_page:
+            return self._current_page.selection_by_id(element_id)
         try:
             select_element = Select(self._driver.find_element_by_id(element_id))
             return select_element.first_selected_option.text
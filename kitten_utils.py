@@ -1,6 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime, time
 import os
 import sys
+import fuzzy_match
 
 class Log():
     if not sys.platform.startswith('win32'):
@@ -30,7 +31,50 @@ class Log():
     def debug(msg):
         print(f'{Log.CYAN}{msg}{Log.END}')
 
+class DateParser():
+    ''' Convert date strings (of various formats) into datetime. Dates from the same source (e.g. one spreadsheet
+        column) nearly always share a format, so the format that worked last is tried first. Repeated strings are
+        only parsed once. Values that aren't date strings, or don't match any format, are returned as None.
+    '''
+    DEFAULT_FORMATS = ['%d-%b-%Y', '%d-%B-%Y', '%m/%d/%Y']
+
+    def __init__(self, formats = None):
+        self._formats = list(formats or DateParser.DEFAULT_FORMATS)
+        self._memo = {}
+
+    def parse(self, date_str):
+        if isinstance(date_str, datetime):
+            return date_str
+        if not isinstance(date_str, str):
+            return None
+
+        try:
+            return self._memo[date_str]
+        except KeyError:
+            pass
+
+        date_obj = None
+        for date_format in list(self._formats):
+            try:
+                date_obj = datetime.strptime(date_str, date_format)
+            except ValueError:
+                continue
+
+            if date_format != self._formats[0]:
+                self._formats = [date_format] + [f for f in self._formats if f != date_format]
+            break
+
+        self._memo[date_str] = date_obj
+        return date_obj
+
+    def parse_column(self, values):
+        ''' Parse a whole column of values at once, return a list of datetime (or None)
+        '''
+        return [self.parse(value) for value in values]
+
 class Utils():
+    _date_parser = DateParser()
+
     @staticmethod
     def utf8(strval):
         return strval.encode('utf-8').decode().strip() if sys.version_info.major >= 3 else strval.encode('utf-8').strip()
@@ -56,6 +100,32 @@ class Utils():
         else:
             return os.path.dirname(os.path.realpath(__file__))
 
+    @staticmethod
+    def app_data_dir():
+        ''' Location for local state that should persist between runs (caches, etc.)
+        '''
+        return os.path.join(os.path.expanduser('~'), '.kitten-scraper')
+
+    @staticmethod
+    def json_default(value):
+        ''' json.dump(default=...) for the local state files: datetime, date and time values are saved as tagged ISO
+            strings, e.g. {"$datetime" : "2022-06-01T00:00:00"}. Decode with json_object_hook.
+        '''
+        for value_type in [datetime, date, time]:
+            if isinstance(value, value_type):
+                return {f'${value_type.__name__}' : value.isoformat()}
+        raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+    @staticmethod
+    def json_object_hook(obj):
+        ''' json.load(object_hook=...), restores the values saved by json_default
+        '''
+        if len(obj) == 1:
+            for value_type in [datetime, date, time]:
+                if f'${value_type.__name__}' in obj:
+                    return value_type.fromisoformat(obj[f'${value_type.__name__}'])
+        return obj
+
     @staticmethod
     def levenshtein_ratio(string1, string2, strip_no_case = True):
         ''' Somewhat fuzzy string matching. Determine how closely two strings resemble each other.
@@ -65,40 +135,10 @@ class Utils():
         '''
         _string1 = string1.lower().strip() if strip_no_case else string1
         _string2 = string2.lower().strip() if strip_no_case else string2
-
-        rows = len(_string1)
-        cols = len(_string2)
-        distances = []
-
-        for row in range(rows + 1):
-            distances.append([row])
-        for col in range(1, cols + 1):
-            distances[0].append(col)
-
-        for col in range(1, cols + 1):
-            for row in range(1, rows + 1):
-                if _string1[row - 1] == _string2[col - 1]:
-                    distances[row].insert(col, distances[row - 1][col - 1])
-                else:
-                    distances[row].insert(col, min(distances[row - 1][col] + 1,      # cost of deletions
-                                                   distances[row][col - 1] + 1,      # cost of insertions
-                                                   distances[row - 1][col - 1] + 1)) # cost of substitutions
-        distance = distances[-1][-1]
-        distance_length = (rows + cols)
-        return (distance_length - distance)/distance_length if distance_length else 0
+        return fuzzy_match.ratio(_string1, _string2)
 
     @staticmethod
     def string_to_datetime(date_str):
         ''' Attempt to convert a date string (of various formats) into datetime
         '''
-        try:
-            date_obj = datetime.strptime(date_str, '%d-%b-%Y')
-        except ValueError:
-            try:
-                date_obj = datetime.strptime(date_str, '%d-%B-%Y')
-            except ValueError:
-                try:
-                    date_obj = datetime.strptime(date_str, '%m/%d/%Y')
-                except ValueError:
-                    date_obj = None
-        return date_obj
+        return Utils._date_parser.parse(date_str)
@@ -0,0 +1,128 @@
+''' Parsing for the paged "list animals" person listing (all animals a person has been responsible for), from which a
+    person's whole foster history record is built in one pass. Each page is parsed in-process from a single HTML
+    snapshot instead of reading every <tr>/<td> through chromedriver.
+'''
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import re
+from urllib.parse import urlsplit
+from http_page_fetcher import HtmlPage
+
+_PAGE_NUMBER_SENTINEL = 987654321
+
+def parse_listing_rows(html):
+    ''' Return the rows of the listing table as lists of cell text, or None if the page has no listing table (we've
+        gone past the last page). Like chromedriver, rows and cells of nested tables are included.
+    '''
+    table = HtmlPage(html).find_by_id('Table3')
+    if table is None:
+        return None
+    return [[HtmlPage.inner_text(td) for td in tr.iter('td')] for tr in table.iter('tr')]
+
+def max_page_number(html, page_url):
+    ''' Find the highest page number linked from this listing page (the pager), or None if there are no page links.
+        page_url(page_number) returns the URL of a listing page.
+    '''
+    sentinel = urlsplit(page_url(_PAGE_NUMBER_SENTINEL))
+    target = sentinel.path.rsplit('/', 1)[-1] + (f'?{sentinel.query}' if sentinel.query else '')
+    if str(_PAGE_NUMBER_SENTINEL) not in target:
+        return None
+
+    page_pattern = re.compile(re.escape(target).replace(str(_PAGE_NUMBER_SENTINEL), r'(\d+)'))
+    page_numbers = [int(match.group(1)) for match in (page_pattern.search(href) for href in HtmlPage(html).hrefs()) if match]
+    return max(page_numbers) if page_numbers else None
+
+def crawl_listing(fetch_html, page_url, prefetch_workers = 1, prefetch_executor = None):
+    ''' Return the parsed rows of every listing page, in page order. fetch_html(url) returns the HTML of a page.
+
+        Once the first page tells us how many pages there are, the remaining pages are fetched with up to
+        prefetch_workers concurrent requests, or on prefetch_executor if provided (an executor shared by concurrent
+        crawls bounds their prefetching as a whole). We always continue one page past the last known page, just in
+        case the pager doesn't link every page.
+    '''
+    pages = []
+    first_html = fetch_html(page_url(1))
+    rows = parse_listing_rows(first_html)
+    if rows is None:
+        return pages
+    pages.append(rows)
+    next_page = 2
+
+    page_count = max_page_number(first_html, page_url) if prefetch_executor or prefetch_workers > 1 else None
+    if page_count and page_count >= next_page:
+        with contextlib.ExitStack() as stack:
+            executor = prefetch_executor or stack.enter_context(ThreadPoolExecutor(max_workers = min(prefetch_workers, page_count - 1)))
+            for html in executor.map(lambda page_number: fetch_html(page_url(page_number)), range(next_page, page_count + 1)):
+                rows = parse_listing_rows(html)
+                if rows is None:
+                    return pages
+                pages.append(rows)
+        next_page = page_count + 1
+
+    while True:
+        rows = parse_listing_rows(fetch_html(page_url(next_page)))
+        if rows is None:
+            return pages
+        pages.append(rows)
+        next_page += 1
+
+def summarize_history(pages, dog_mode = False):
+    ''' Build a person's foster history record from the parsed listing pages, in a single pass:
+
+            prev_animals_fostered  : total number of animals this person has previously fostered
+            euthanized_count       : previously fostered animals that were euthanized
+            unassisted_death_count : previously fostered animals that died (unassisted)
+            current_animals        : animals currently in foster with this person, {animal type : [animal numbers]}
+                                     in page order, from the "Fostered" section
+
+        The previous foster count is a useful metric to gauge experience level, but there are some difficulties
+        interpreting the data without getting unnecessarily crazy in here. Consider these numbers "a decent guess".
+    '''
+    previous_foster_count = 0
+    euthanized_count = 0
+    unassisted_death_count = 0
+    current_animals = {}
+    previous_types = ['cat', 'kitten'] if not dog_mode else ['dog', 'puppy']
+    current_types = ['cat', 'kitten', 'rodent', 'guinea pig', 'rabbit'] if not dog_mode else ['dog', 'puppy']
+
+    for rows in pages:
+        fostered_tr_active = False
+        agency_outgoing_tr_active = False
+
+        for cols in rows:
+            num_cols = len(cols)
+
+            if num_cols == 10:
+                animal_type = cols[5].lower()
+                animal_status = cols[2].lower()
+                if fostered_tr_active or agency_outgoing_tr_active:
+                    if any(s in animal_type for s in previous_types):
+                        if 'in foster' not in animal_status or animal_status == 'unassisted death - in foster':
+                            previous_foster_count += 1
+                        if 'euthanized' in animal_status:
+                            euthanized_count += 1
+                        elif 'unassisted death' in animal_status:
+                            unassisted_death_count += 1
+
+                # Animals listed "In Foster" under another section (e.g. adopted out, now fostered by someone else)
+                # are not this person's current animals
+                #
+                if fostered_tr_active and 'in foster' in animal_status and animal_status != 'unassisted death - in foster' and animal_type in current_types:
+                    animal_number = int(cols[3])
+                    if not any(animal_number in animals for animals in current_animals.values()): # ignore duplicates
+                        current_animals.setdefault(cols[5], []).append(animal_number)
+
+            elif num_cols == 1:
+                fostered_tr_active = cols[0].lower() == 'fostered'
+                agency_outgoing_tr_active = cols[0].lower() == 'agency outgoing'
+
+            else:
+                fostered_tr_active = False
+                agency_outgoing_tr_active = False
+
+    return {
+        'prev_animals_fostered'  : previous_foster_count,
+        'euthanized_count'       : euthanized_count,
+        'unassisted_death_count' : unassisted_death_count,
+        'current_animals'        : current_animals
+    }
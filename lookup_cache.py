@@ -0,0 +1,72 @@
+import json
+import sqlite3
+import threading
+import time
+from kitten_utils import Log, Utils
+
+class LookupCache:
+    ''' Persistent on-disk cache of animal and person lookups. Values are stored per (kind, key, field group) and each
+        field group has its own time-to-live, e.g. foster history barely changes from day to day while an animal's
+        status can change within hours.
+    '''
+    DEFAULT_TTL_HOURS = {
+        'animal.status'  : 4,      # status, sub-status, status date, foster parent, special message
+        'animal.details' : 72,     # name, type, breed, colors, gender, date of birth, photo
+        'animal.medical' : 24,     # spay/neuter status
+        'animal.bio'     : 24,     # adoption summary
+        'person.contact' : 72,     # name, phone numbers, email addresses
+        'person.history' : 72,     # foster history (previous foster count, loss counts)
+    }
+
+    def __init__(self, db_path, ttl_hours = None, max_age_hours = None, refresh = False):
+        ''' ttl_hours optionally overrides DEFAULT_TTL_HOURS per field group, max_age_hours caps every TTL, and refresh
+            ignores all cached values (fresh values are still written back to the cache).
+        '''
+        self._ttl_hours = dict(self.DEFAULT_TTL_HOURS)
+        self._ttl_hours.update(ttl_hours or {})
+        if max_age_hours is not None:
+            self._ttl_hours = {group : min(ttl, max_age_hours) for group, ttl in self._ttl_hours.items()}
+        self._refresh = refresh
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+        Utils.make_dir(db_path)
+        self._db = sqlite3.connect(db_path, check_same_thread = False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS lookups ('
+                         'kind TEXT NOT NULL, '
+                         'key TEXT NOT NULL, '
+                         'field_group TEXT NOT NULL, '
+                         'value TEXT NOT NULL, '
+                         'updated REAL NOT NULL, '
+                         'PRIMARY KEY (kind, key, field_group))')
+        self._db.commit()
+
+    def get(self, kind, key, field_group):
+        ''' Return the cached value, or None if not cached or expired
+        '''
+        ttl_hours = self._ttl_hours.get(f'{kind}.{field_group}', 0)
+        with self._lock:
+            row = None
+            if not self._refresh and ttl_hours > 0:
+                row = self._db.execute('SELECT value, updated FROM lookups WHERE kind = ? AND key = ? AND field_group = ?',
+                                       (kind, str(key), field_group)).fetchone()
+
+            if row and time.time() - row[1] <= ttl_hours * 3600:
+                self._hits += 1
+                return json.loads(row[0])
+
+            self._misses += 1
+            return None
+
+    def put(self, kind, key, field_group, value):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO lookups (kind, key, field_group, value, updated) VALUES (?, ?, ?, ?, ?)',
+                             (kind, str(key), field_group, json.dumps(value), time.time()))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            Log.debug(f'Lookup cache: {self._hits} hits, {self._misses} misses')
+            self._db.close()
@@ -0,0 +1,85 @@
+import queue
+import threading
+
+class LookupStage:
+    ''' One stage of a lookup pipeline: a deduplicated, bounded work queue served by its own worker threads. Keys are
+        submitted as soon as they are known (submit() blocks while the queue is full), results are collected by key.
+
+            with LookupStage(lookup_person, workers = 2) as person_stage:
+                ...
+                person_stage.submit(person_number)
+                ...
+            persons_data = person_stage.results
+
+        Leaving the "with" block waits for all submitted work to finish. The first exception raised by a worker is
+        re-raised at that point.
+
+        With retries, a failed lookup doesn't stop the stage: its key goes to a retry queue, and queued keys are
+        retried (up to retries more times each) when leaving the "with" block. Keys that still fail are left in
+        failed ({key : exception}) instead of raising.
+    '''
+    def __init__(self, fn, workers = 1, max_queued = 16, retries = None):
+        self._fn = fn
+        self._workers = max(1, workers)
+        self._retries = retries
+        self._queue = queue.Queue(maxsize = max_queued)
+        self._lock = threading.Lock()
+        self._submitted = set()
+        self._threads = []
+        self._errors = []
+        self.results = {}
+        self.failed = {}
+
+    def __enter__(self):
+        for _ in range(self._workers):
+            thread = threading.Thread(target = self._work, daemon = True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        if exc_type is None and self._retries is not None:
+            for _ in range(self._retries):
+                for key in list(self.failed):
+                    try:
+                        self.results[key] = self._fn(key)
+                        del self.failed[key]
+                    except Exception as e:
+                        self.failed[key] = e
+
+        if self._errors and exc_type is None:
+            raise self._errors[0]
+        return False
+
+    def submit(self, key):
+        ''' Queue key for lookup unless it has already been submitted
+        '''
+        with self._lock:
+            if key in self._submitted:
+                return
+            self._submitted.add(key)
+        self._queue.put(key)
+
+    def _work(self):
+        while True:
+            key = self._queue.get()
+            if key is None:
+                break
+            if self._errors:
+                continue # something already failed, drain the queue
+            try:
+                result = self._fn(key)
+                with self._lock:
+                    self.results[key] = result
+            except Exception as e:
+                if self._retries is not None:
+                    with self._lock:
+                        self.failed[key] = e
+                else:
+                    self._errors.append(e)
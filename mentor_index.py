@@ -0,0 +1,127 @@
+import re
+import sys
+import fuzzy_match
+
+class MentorIndex:
+    ''' Index of mentor sheet match values (mentee names, emails, person ids), built once after the mentor spreadsheet
+        is loaded. Queries are answered from hash lookups instead of scanning every cell of every mentor sheet:
+
+            emails          : exact match on normalized (lowercase) email addresses found in any cell
+            person ids      : exact match on any run of digits found in a cell
+            phone numbers   : exact match on 10 digit phone numbers (formatting ignored)
+            names           : every word of the name must appear, in order, as whole words within a single cell
+
+        With fuzzy_cutoff, a name with no exact match is matched approximately (edit distance ratio, see fuzzy_match),
+        e.g. "jon smith" matches "john smith". Only cells that share at least one word with the name are compared.
+
+        substring_match() answers queries with the legacy "match string appears anywhere in any cell" semantics,
+        using a trigram index to avoid scanning sheets that can't possibly match.
+    '''
+    _EMAIL_RE = re.compile(r"[\w.!#$%&'*+/=?^`{|}~-]+@[\w-]+(?:\.[\w-]+)+") # RFC 5322 local part (dot-atom)
+    _DIGITS_RE = re.compile(r'\d+')
+    _PHONE_RE = re.compile(r'(?<!\d)(?:1[\s.-]?)?\(?(\d{3})\)?[\s.-]?(\d{3})[\s.-]?(\d{4})(?!\d)')
+    _WORD_RE = re.compile(r'\w+')
+
+    def __init__(self, mentor_match_values):
+        ''' mentor_match_values: {sheet name : [lowercase cell values]}
+        '''
+        self._sheet_values = {}
+        self._emails = {}
+        self._ids = {}
+        self._phones = {}
+        self._word_phrases = {}
+        self._trigrams = {}
+
+        for sheet_name, values in mentor_match_values.items():
+            self.add_sheet(sheet_name, values)
+
+    def add_sheet(self, sheet_name, values):
+        ''' Index the match values of one sheet
+        '''
+        sheet_name = sys.intern(sheet_name)
+        unique_values = {sys.intern(value) for value in values if value}
+        self._sheet_values[sheet_name] = unique_values
+
+        for value in unique_values:
+            for index, key, entry in self._entries_of(sheet_name, value):
+                index.setdefault(sys.intern(key), set()).add(entry)
+
+    def match(self, match_string, fuzzy_cutoff = None):
+        ''' Return the set of sheet names matching a single (lowercase) match string
+        '''
+        if '@' in match_string:
+            return set(self._emails.get(match_string.strip(), ()))
+
+        if match_string.strip().isdigit():
+            matches = set(self._ids.get(match_string.strip(), ()))
+            phone = self._PHONE_RE.fullmatch(match_string.strip())
+            if phone:
+                matches |= self._phones.get(''.join(phone.groups()), set())
+            return matches
+
+        phone = self._PHONE_RE.fullmatch(match_string.strip())
+        if phone:
+            return set(self._phones.get(''.join(phone.groups()), ()))
+
+        words = self._WORD_RE.findall(match_string)
+        if not words:
+            return set()
+
+        # Only cells containing the least common word of the name can possibly match
+        #
+        candidates = min((self._word_phrases.get(word, set()) for word in words), key=len)
+        phrase = f' {" ".join(words)} '
+        matches = {sheet_name for sheet_name, cell_phrase in candidates if phrase in cell_phrase}
+
+        if not matches and fuzzy_cutoff is not None:
+            matches = self.fuzzy_match(words, fuzzy_cutoff)
+        return matches
+
+    def fuzzy_match(self, words, cutoff):
+        ''' Sheets with a cell containing a run of words similar to the given name words (ratio >= cutoff). Candidate
+            cells must share at least one word with the name, and are compared one same-length word window at a time.
+        '''
+        candidates = set().union(*(self._word_phrases.get(word, ()) for word in words))
+        windows = {}
+        for sheet_name, cell_phrase in candidates:
+            cell_words = cell_phrase.split()
+            for i in range(0, max(1, len(cell_words) - len(words) + 1)):
+                windows.setdefault(' '.join(cell_words[i:i + len(words)]), set()).add(sheet_name)
+
+        matches = set()
+        for window, _ in fuzzy_match.extract(' '.join(words), windows, cutoff):
+            matches |= windows[window]
+        return matches
+
+    def substring_match(self, match_string):
+        ''' Legacy semantics: sheets where match_string appears anywhere within any cell
+        '''
+        trigrams = self._trigrams_of(match_string)
+        if trigrams:
+            candidates = set.intersection(*(self._trigrams.get(trigram, set()) for trigram in trigrams))
+        else:
+            candidates = self._sheet_values.keys()
+        return {sheet_name for sheet_name in candidates if any(match_string in value for value in self._sheet_values[sheet_name])}
+
+    def _entries_of(self, sheet_name, value):
+        ''' Yield (index, key, entry) for every index entry of one cell value
+        '''
+        for email in self._EMAIL_RE.findall(value):
+            yield self._emails, email, sheet_name
+        for digits in self._DIGITS_RE.findall(value):
+            yield self._ids, digits, sheet_name
+        for phone in self._PHONE_RE.findall(value):
+            yield self._phones, ''.join(phone), sheet_name
+
+        words = self._WORD_RE.findall(value)
+        if words:
+            phrase = sys.intern(f' {" ".join(words)} ')
+            for word in words:
+                yield self._word_phrases, word, (sheet_name, phrase)
+
+        for trigram in self._trigrams_of(value):
+            yield self._trigrams, trigram, sheet_name
+
+    @staticmethod
+    def _trigrams_of(value):
+        return {value[i:i + 3] for i in range(len(value) - 2)}
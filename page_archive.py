@@ -0,0 +1,107 @@
+import json
+import re
+import threading
+import zipfile
+from http_page_fetcher import HtmlPage
+from kitten_utils import Utils
+
+class PageArchive:
+    ''' Compressed archive (zip) of every page fetched during one run, for --record / --replay. Pages are stored by
+        page type and URL template parameters (e.g. 'animal' + [animal number]) rather than by URL, so an archive can
+        be replayed even if the shelter URLs change. Other run state (e.g. the mentor spreadsheet) is stored by name,
+        as JSON (datetimes as ISO strings, see Utils.json_default).
+
+        manifest.json lists every page with its URL, and is written when the archive is closed.
+    '''
+    VERSION = 2
+
+    def __init__(self, path, record = False):
+        self.path = path
+        self.recording = record
+        self._lock = threading.Lock()
+
+        if record:
+            Utils.make_dir(path)
+            self._zip = zipfile.ZipFile(path, 'w', compression = zipfile.ZIP_DEFLATED, compresslevel = 9)
+            self._manifest = {'version' : self.VERSION, 'pages' : {}}
+        else:
+            self._zip = zipfile.ZipFile(path, 'r')
+            self._manifest = json.loads(self._zip.read('manifest.json'))
+            if self._manifest.get('version') != self.VERSION:
+                raise ValueError(f'unsupported archive version {self._manifest.get("version")}')
+
+    @property
+    def page_count(self):
+        return len(self._manifest['pages'])
+
+    @staticmethod
+    def params_of(template, url):
+        ''' The parameters that template.format(*params) would need to produce url, or None if url doesn't match
+        '''
+        if not template:
+            return None
+        pattern = re.escape(template).replace(re.escape('{}'), r'([^/?&#]*)')
+        match = re.fullmatch(pattern, url)
+        return list(match.groups()) if match else None
+
+    def put_page(self, page_type, params, url, html):
+        ''' Store a page. A page already in the archive is kept as is (the first fetch wins).
+        '''
+        name = self._page_name(page_type, params)
+        with self._lock:
+            if name in self._manifest['pages']:
+                return
+            self._zip.writestr(name, html)
+            self._manifest['pages'][name] = {'page_type' : page_type, 'params' : [str(p) for p in params], 'url' : url}
+
+    def get_page(self, page_type, params):
+        ''' Return the HTML of a stored page. Raises KeyError if the page was not recorded.
+        '''
+        name = self._page_name(page_type, params)
+        with self._lock:
+            if name not in self._manifest['pages']:
+                raise KeyError(f'{page_type} {params} not found in page archive {self.path}')
+            return self._zip.read(name).decode('utf-8')
+
+    def put_state(self, name, value):
+        ''' Store a JSON-serializable value (datetimes allowed). Dict keys are stored as strings.
+        '''
+        with self._lock:
+            self._zip.writestr(f'state/{name}.json', json.dumps(value, default = Utils.json_default))
+
+    def get_state(self, name, default = None):
+        with self._lock:
+            try:
+                return json.loads(self._zip.read(f'state/{name}.json'), object_hook = Utils.json_object_hook)
+            except KeyError:
+                return default
+
+    def close(self):
+        with self._lock:
+            if self.recording:
+                self._zip.writestr('manifest.json', json.dumps(self._manifest, indent = 1))
+            self._zip.close()
+
+    @staticmethod
+    def _page_name(page_type, params):
+        return f'pages/{page_type}/{"_".join(str(p) for p in params)}.html'
+
+class ArchivePageFetcher:
+    ''' Stands in for HttpPageFetcher when replaying: pages are read from a PageArchive instead of being downloaded.
+        url_templates ({page type : URL template}) maps each requested URL back to its page type and parameters.
+    '''
+    def __init__(self, archive, url_templates):
+        self._archive = archive
+        self._url_templates = url_templates
+
+    def fetch(self, url):
+        ''' Return the archived page for url as an HtmlPage. Raises KeyError if it wasn't recorded.
+        '''
+        for page_type, template in self._url_templates.items():
+            params = PageArchive.params_of(template, url)
+            if params is not None:
+                return HtmlPage(self._archive.get_page(page_type, params), url)
+        raise KeyError(f'{url} does not match any page URL template')
+
+    def close(self):
+        pass
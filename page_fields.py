@@ -0,0 +1,89 @@
+''' Declarative field maps for each page we scrape. Each field is described as (locator type, locator, read as):
+
+        locator type : 'id' or 'xpath'
+        read as      : 'text'      - visible text (innerText) of the element
+                       'selection' - text of the selected <option> in a <select>
+                       'value'     - value of an <input>/<textarea>
+                       any other   - attribute/property of the element (e.g. 'href', 'src', 'innerText')
+
+    A field map can be read in a single chromedriver round trip with READ_FIELDS_SCRIPT, or in-process from raw HTML
+    with HtmlPage.read_fields(). Missing elements are always returned as ''.
+'''
+
+_PERSON_ID_PREFIX = 'ctl00_ctl00_ContentPlaceHolderBase_ContentPlaceHolder1_personDetailsUC_'
+
+ANIMAL_PAGE_FIELDS = {
+    'special_msg'        : ('id', 'specialMessagesDialog', 'text'),
+    'status'             : ('id', 'status', 'selection'),
+    'status_text'        : ('xpath', '//*[@id="Table17"]/tbody/tr[5]/td[2]', 'innerText'),
+    'sub_status'         : ('id', 'subStatus', 'selection'),
+    'name'               : ('id', 'animalname', 'value'),
+    'type'               : ('id', 'type', 'value'),
+    'breed'              : ('id', 'primaryBreed', 'value'),
+    'primary_color'      : ('id', 'primaryColour', 'selection'),
+    'secondary_color'    : ('id', 'secondaryColour', 'selection'),
+    'gender'             : ('id', 'sex', 'selection'),
+    'photo_src'          : ('xpath', '//*[@id="animal-default-photo"]', 'src'),
+    'dob'                : ('id', 'dob', 'value'),
+    'status_date'        : ('id', 'statusdate', 'value'),
+    'foster_parent_href' : ('xpath', '//*[@id="Table17"]/tbody/tr[1]/td[2]/a', 'href'),
+}
+
+# Animal page fields that are expected to change frequently (cached with a shorter TTL)
+#
+ANIMAL_STATUS_FIELDS = ['special_msg', 'status', 'status_text', 'sub_status', 'status_date', 'foster_parent_href']
+
+MEDICAL_DETAILS_PAGE_FIELDS = {
+    'sn' : ('xpath', '/html/body/table[2]/tbody/tr[2]/td/table/tbody/tr[4]/td[4]', 'innerText'),
+}
+
+ADOPTION_SUMMARY_PAGE_FIELDS = {
+    'adoption_summary' : ('id', 'adoptSummary', 'text'),
+}
+
+PERSON_PAGE_FIELDS = {
+    'first_name'     : ('id', f'{_PERSON_ID_PREFIX}PersonNameTitle1_txtFirstName', 'value'),
+    'last_name'      : ('id', f'{_PERSON_ID_PREFIX}PersonNameTitle1_txtLastName', 'value'),
+    'preferred_name' : ('id', f'{_PERSON_ID_PREFIX}PersonNameTitle1_txtPreferredName', 'value'),
+    'home_phone'     : ('id', f'{_PERSON_ID_PREFIX}PersonContact1_homePhone_txtPhone3', 'value'),
+    'cell_phone'     : ('id', f'{_PERSON_ID_PREFIX}PersonContact1_mobilePhone_txtPhone3', 'value'),
+    'email1'         : ('xpath', '//*[@id="emailTable"]/tbody/tr[1]/td[1]', 'innerText'),
+    'email2'         : ('xpath', '//*[@id="emailTable"]/tbody/tr[2]/td[1]', 'innerText'),
+    'email3'         : ('xpath', '//*[@id="emailTable"]/tbody/tr[3]/td[1]', 'innerText'),
+    'email4'         : ('xpath', '//*[@id="emailTable"]/tbody/tr[4]/td[1]', 'innerText'),
+}
+
+READ_FIELDS_SCRIPT = '''
+var fields = arguments[0];
+var result = {};
+for (var key in fields) {
+    var locator = fields[key][0], path = fields[key][1], read_as = fields[key][2];
+    var element = null;
+    var value = '';
+    try {
+        element = locator === 'id' ? document.getElementById(path) :
+            document.evaluate(path, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } catch (e) {}
+    if (element) {
+        if (read_as === 'text') {
+            value = element.innerText;
+        } else if (read_as === 'selection') {
+            var options = element.options || [];
+            var option = element.selectedIndex >= 0 ? options[element.selectedIndex] : options[0];
+            value = option ? option.text : '';
+        } else if (read_as === 'value') {
+            value = element.value;
+        } else {
+            value = element[read_as];
+            if (value === undefined || value === null) {
+                value = element.getAttribute(read_as);
+            }
+        }
+    }
+    result[key] = (value === undefined || value === null) ? '' : String(value);
+    if (read_as === 'text' || read_as === 'selection') {
+        result[key] = result[key].trim();
+    }
+}
+return result;
+'''
@@ -0,0 +1,129 @@
+import functools
+import json
+import os
+import threading
+from kitten_utils import Log, Utils
+
+class RunJournal:
+    ''' Crash-safe journal of the lookups completed during a run (JSON lines). A record is written, flushed and
+        fsync'ed as soon as each animal, person or mentee lookup completes, so a run that crashes or is interrupted can
+        be resumed (--resume) without repeating them.
+
+        The first line identifies the run (its arguments and date). A journal is only resumed by the same run, and is
+        removed once a run completes without failed lookups. A partially written last line (the process died while
+        writing it) is ignored.
+    '''
+    VERSION = 1
+
+    def __init__(self, journal_path):
+        self._journal_path = journal_path
+        self._lock = threading.Lock()
+        self._file = None
+        self._entries = {}
+
+    def start(self, run, resume = False):
+        ''' Start journaling the run described by run (a JSON-serializable dict). With resume, the lookups journaled
+            by a previous attempt at the same run are reloaded. Return the number of lookups reloaded.
+        '''
+        self._entries = self._load(run) if resume else {}
+        resumed = sum(len(entries) for entries in self._entries.values())
+
+        Utils.make_dir(self._journal_path)
+        if resumed:
+            self._truncate_partial_record()
+            self._file = open(self._journal_path, 'a')
+        else:
+            self._file = open(self._journal_path, 'w')
+            self._write({'version' : self.VERSION, 'run' : run})
+        return resumed
+
+    def get(self, kind, key):
+        ''' Return (True, value) if the lookup of key was journaled, (False, None) if not
+        '''
+        with self._lock:
+            entries = self._entries.get(kind, {})
+            return (True, entries[str(key)]) if str(key) in entries else (False, None)
+
+    def record(self, kind, key, value):
+        with self._lock:
+            self._entries.setdefault(kind, {})[str(key)] = value
+            self._write({'kind' : kind, 'key' : str(key), 'value' : value})
+
+    def record_failure(self, kind, key, error):
+        ''' Journal a failed lookup. Failures are informational only, a resumed run looks the key up again.
+        '''
+        with self._lock:
+            self._write({'kind' : kind, 'key' : str(key), 'failed' : str(error)})
+
+    def finish(self, keep = False):
+        ''' The run is done. The journal is removed, unless keep (e.g. some lookups failed and may be resumed).
+        '''
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            if not keep and os.path.exists(self._journal_path):
+                os.remove(self._journal_path)
+
+    def _truncate_partial_record(self):
+        ''' Drop a partially written last line (the process died while writing it), so the next record starts on a
+            line of its own
+        '''
+        with open(self._journal_path, 'rb+') as journal_file:
+            contents = journal_file.read()
+            if contents and not contents.endswith(b'\n'):
+                journal_file.truncate(contents.rfind(b'\n') + 1)
+
+    def _write(self, record):
+        if self._file:
+            self._file.write(json.dumps(record) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _load(self, run):
+        entries = {}
+        try:
+            with open(self._journal_path, 'r') as journal_file:
+                lines = journal_file.readlines()
+        except FileNotFoundError:
+            Log.warn(f'Nothing to resume, no journal found ({self._journal_path})')
+            return entries
+
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            header = {}
+        if header.get('version') != self.VERSION or header.get('run') != run:
+            Log.warn(f'Not resuming, the journal is from a different run ({header.get("run")})')
+            return entries
+
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue # partially written record
+            if 'value' in record:
+                entries.setdefault(record['kind'], {})[record['key']] = record['value']
+        return entries
+
+def journaled(kind, encode = None, decode = None):
+    ''' Method decorator, journals the result of self.method(key, ...) by key in self._journal (if there is one), and
+        returns the journaled result instead of calling the method if the key was already journaled. encode/decode
+        convert results to/from JSON-serializable values.
+    '''
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, key, *args, **kwargs):
+            journal = getattr(self, '_journal', None)
+            if journal is None:
+                return method(self, key, *args, **kwargs)
+
+            found, value = journal.get(kind, key)
+            if found:
+                return decode(value) if decode else value
+
+            result = method(self, key, *args, **kwargs)
+            journal.record(kind, key, encode(result) if encode else result)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,54 @@
+from concurrent.futures import Future
+import functools
+import threading
+from kitten_metrics import Metrics
+from kitten_utils import Log
+
+class RunMemo:
+    ''' Run-scoped memoization of lookups (animals, persons, medical details, etc.) Completed lookups are reused, and
+        concurrent requests for the same key wait for the lookup already in flight instead of starting another.
+        Failed lookups are not memoized.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+
+    def get(self, kind, key, loader):
+        with self._lock:
+            future = self._futures.get((kind, key))
+            owner = future is None
+            if owner:
+                future = Future()
+                self._futures[(kind, key)] = future
+
+        Metrics.count(f'memo_{"misses" if owner else "hits"}.{kind}')
+        if not owner:
+            return future.result()
+
+        try:
+            result = loader()
+        except BaseException as e:
+            with self._lock:
+                del self._futures[(kind, key)]
+            future.set_exception(e)
+            raise
+
+        future.set_result(result)
+        return result
+
+    def print_summary(self):
+        hits = Metrics.counters('memo_hits.')
+        misses = Metrics.counters('memo_misses.')
+        summary = [f'{kind} {hits.get(kind, 0)}/{misses.get(kind, 0)}' for kind in sorted(set(hits) | set(misses))]
+        if summary:
+            Log.debug(f'Lookups reused within this run (hits/misses): {", ".join(summary)}')
+
+def memoized(kind):
+    ''' Method decorator, memoizes self.method(key, ...) by key in self._memo
+    '''
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, key, *args, **kwargs):
+            return self._memo.get(kind, key, lambda: method(self, key, *args, **kwargs))
+        return wrapper
+    return decorator
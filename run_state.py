@@ -0,0 +1,53 @@
+import json
+import os
+from kitten_utils import Log, Utils
+
+class RunState:
+    ''' Results of the previous daily report run: the animal set with each animal's report status date and lookup
+        results, and the foster parent lookup results. An incremental run only looks up animals that are new or whose
+        status date changed, everything else is rebuilt from this state.
+    '''
+    VERSION = 1
+
+    def __init__(self, state_path):
+        self._state_path = state_path
+
+    def load(self):
+        ''' Return (animals, persons) from the previous run, both keyed by number. Empty if there is no usable state.
+        '''
+        try:
+            with open(self._state_path, 'r') as state_file:
+                state = json.load(state_file)
+
+            if state.get('version') != self.VERSION:
+                return {}, {}
+
+            animals = {int(a_number) : animal for a_number, animal in state['animals'].items()}
+            persons = {int(p_number) : person for p_number, person in state['persons'].items()}
+            for person in persons.values():
+                person['emails'] = set(person['emails'])
+
+            return animals, persons
+
+        except FileNotFoundError:
+            return {}, {}
+
+        except (ValueError, KeyError, TypeError) as err:
+            Log.warn(f'Ignoring unreadable run state {self._state_path} ({err})')
+            return {}, {}
+
+    def save(self, animals, persons):
+        ''' Save the animals and persons of this run. The file is replaced atomically so an interrupted run never
+            leaves a partial state behind.
+        '''
+        state = {
+            'version' : self.VERSION,
+            'animals' : {str(a_number) : animal for a_number, animal in animals.items()},
+            'persons' : {str(p_number) : {**person, 'emails' : sorted(person['emails'])} for p_number, person in persons.items()}
+        }
+
+        Utils.make_dir(self._state_path)
+        tmp_path = f'{self._state_path}.tmp'
+        with open(tmp_path, 'w') as state_file:
+            json.dump(state, state_file)
+        os.replace(tmp_path, self._state_path)
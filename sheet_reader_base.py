@@ -1,5 +1,8 @@
 from abc import ABCMeta, abstractmethod
-from kitten_utils import Utils
+import os
+from kitten_utils import Log, Utils
+from mentor_index import MentorIndex
+from sheet_snapshot import SheetSnapshot
 
 class SheetReaderBase(metaclass=ABCMeta):
     def __init__(self):
@@ -7,7 +10,12 @@ class SheetReaderBase(metaclass=ABCMeta):
         self._SURGERY_SHEET_NAMES = ['Foster S-N Appts', 'Spay_Neuter Appts']
         self._mentor_sheets = []
         self._mentor_match_values = {}
+        self._mentor_index = None
+        self._sheet_values = {}
         self._surgery_dates = {}
+        self._snapshot = None
+        self.substring_match = False
+        self.fuzzy_cutoff = None
 
     @abstractmethod
     def load_mentors_spreadsheet(self, auth):
@@ -21,26 +29,90 @@ class SheetReaderBase(metaclass=ABCMeta):
     def set_completed_mentees(self, mentor, mentee_ids):
         pass
 
+    def commit_updates(self, dry_run = False):
+        ''' Write any spreadsheet updates queued by set_completed_mentees(). With dry_run, only print them.
+        '''
+
     def find_matching_mentors(self, match_strings):
-        ''' Find mentor worksheets that match any string in match_strings. Not very sophisticated right now,
-            I'm simply searching for a match anywhere in each mentor sheet.
+        ''' Find mentor worksheets that match any string in match_strings (emails, names, person id). Matches are
+            looked up in the mentor index (see MentorIndex). Set fuzzy_cutoff to also match names approximately, or
+            substring_match = True to use the legacy semantics: a match anywhere in any cell of each mentor sheet.
         '''
         match_strings = [Utils.utf8(s).lower() for s in match_strings if s]
-        matching_mentors = set()
+        if self._mentor_index is None:
+            self._build_mentor_index()
 
-        for sheet_name in self._mentor_match_values:
-            if [item for item in self._mentor_match_values[sheet_name] if any(match in item for match in match_strings)]:
-                matching_mentors.add(sheet_name)
+        matching_mentors = set()
+        for match in match_strings:
+            if self.substring_match:
+                matching_mentors |= self._mentor_index.substring_match(match)
+            else:
+                matching_mentors |= self._mentor_index.match(match, self.fuzzy_cutoff)
 
         return matching_mentors
 
+    def _build_mentor_index(self):
+        ''' Build the mentor index from _mentor_match_values. Called once the mentor spreadsheet is loaded (or restored
+            from a snapshot).
+        '''
+        self._mentor_index = MentorIndex(self._mentor_match_values)
+
+    def _load_snapshot(self, workbook_id, revision):
+        ''' Restore the workbook from the local snapshot if it was saved from this revision. Return the snapshot state,
+            or None if the workbook must be read.
+        '''
+        self._snapshot = SheetSnapshot(os.path.join(Utils.app_data_dir(), f'mentors_{workbook_id}.json'))
+        state = self._snapshot.load()
+        if state is None:
+            return None
+
+        if revision is None or state['revision'] != revision:
+            Log.debug(f'Mentor spreadsheet changed since the last run (revision {state["revision"]} -> {revision})')
+            return None
+
+        self.restore_workbook_state(state)
+        self._build_mentor_index()
+        Log.debug(f'Mentor spreadsheet unchanged since the last run (revision {revision}), using local snapshot')
+        return state
+
+    def _save_snapshot(self, revision, workbook_name, config_yaml):
+        if self._snapshot is not None and revision is not None:
+            try:
+                self._snapshot.save({
+                    'revision' : revision,
+                    'workbook_name' : workbook_name,
+                    'config_yaml' : config_yaml,
+                    **self.workbook_state()
+                })
+            except (OSError, TypeError, ValueError) as err:
+                Log.warn(f'Unable to save mentor spreadsheet snapshot ({err})')
+
+    def workbook_state(self):
+        ''' The loaded workbook: mentor sheet names, match values, sheet values and surgery dates
+        '''
+        return {
+            'mentor_sheets' : self._mentor_sheets,
+            'mentor_match_values' : self._mentor_match_values,
+            'sheet_values' : self._sheet_values,
+            'surgery_dates' : self._surgery_dates
+        }
+
+    def restore_workbook_state(self, state):
+        ''' Restore a workbook saved with workbook_state(). The state may have been through JSON, which turns the surgery
+            date keys (animal numbers) into strings.
+        '''
+        self._mentor_sheets = state['mentor_sheets']
+        self._mentor_match_values = state['mentor_match_values']
+        self._sheet_values = state['sheet_values']
+        self._surgery_dates = {int(a_number) : surgery_date for a_number, surgery_date in state['surgery_dates'].items()}
+
     def get_surgery_date(self, a_number):
         return self._surgery_dates[a_number] if a_number in self._surgery_dates else ''
 
     def _find_column_by_name(self, cells, name):
         for n in range(0, len(cells[0])):
             # Allow for an optional header when searching for column names
-            if any(name in substr for substr in [cells[0][n].value, cells[1][n].value]):
+            if any(name in str(getattr(substr, 'value', substr)) for substr in [cells[0][n], cells[1][n]]):
                 return n
         return -1
 
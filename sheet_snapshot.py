@@ -0,0 +1,41 @@
+import json
+import os
+from kitten_utils import Log, Utils
+
+class SheetSnapshot:
+    ''' Local snapshot of a parsed mentor workbook, saved with the revision identifier of the workbook it was read from
+        (Google Drive version/modifiedTime, Box etag/sha1). When the workbook hasn't been edited since the last run
+        the snapshot is used as-is, no need to download and re-index the workbook.
+
+        The snapshot (JSON) holds the config YAML, the values of every worksheet (which includes the current mentee
+        blocks), the mentor match values and the surgery dates. The mentor index is rebuilt from the match values.
+    '''
+    VERSION = 2
+
+    def __init__(self, snapshot_path):
+        self._snapshot_path = snapshot_path
+
+    def load(self):
+        ''' Return the saved snapshot state, or None if there is no usable snapshot
+        '''
+        try:
+            with open(self._snapshot_path, 'r') as snapshot_file:
+                state = json.load(snapshot_file, object_hook = Utils.json_object_hook)
+            return state if state.get('version') == self.VERSION else None
+
+        except FileNotFoundError:
+            return None
+
+        except Exception as err:
+            Log.warn(f'Ignoring unreadable mentor spreadsheet snapshot {self._snapshot_path} ({err})')
+            return None
+
+    def save(self, state):
+        ''' Save the snapshot state. The file is replaced atomically so an interrupted run never leaves a partial
+            snapshot behind.
+        '''
+        Utils.make_dir(self._snapshot_path)
+        tmp_path = f'{self._snapshot_path}.tmp'
+        with open(tmp_path, 'w') as snapshot_file:
+            json.dump({**state, 'version' : self.VERSION}, snapshot_file, default = Utils.json_default)
+        os.replace(tmp_path, self._snapshot_path)